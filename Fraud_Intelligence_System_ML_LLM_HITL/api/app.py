@@ -1,59 +1,525 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-import numpy as np
+import os
+import queue
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
+
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 import joblib
+import numpy as np
+
+from src.scoring import to_feature_matrix, score_batch, format_results, N_FEATURES
+from src.batching import MicroBatcher
+from src.feedback import init_db, store_feedback, FeedbackWriter
+from src.monitoring import monitor_report, AggregateRefresher
+from src.risk import load_calibration
+from src.anomaly import inference_engine
+from src.bundle import load_bundle, MANIFEST
+from src.registry import ModelRegistry, REGISTRY_DIR
+from src.serving import ModelSlot, legacy_bundle, warm_up
+from src.tree_shap import ExplanationCache, explain_row, TOP_K
+from src.decision import APPROVE, REVIEW, BLOCK
+from src.metrics import MetricsRegistry, StageTimer
+from src.wire import decode_float32, decode_arrow, FLOAT32_CONTENT_TYPE, ARROW_CONTENT_TYPE
+from src.drift import DriftMonitor
+from src.anomaly_threshold import AnomalyThreshold, ANOMALY_QUANTILE
+from src.shadow import ShadowScorer, SHADOW_LOG
+
+# Optional request coalescing for /predict (off by default)
+MICROBATCH_ENABLED = os.getenv("FRAUD_MICROBATCH", "0") == "1"
+MICROBATCH_MAX_BATCH = int(os.getenv("FRAUD_MICROBATCH_MAX_BATCH", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("FRAUD_MICROBATCH_MAX_WAIT_MS", "2"))
+
+# Buffered, batched feedback inserts (on by default)
+FEEDBACK_WRITE_BEHIND = os.getenv("FRAUD_FEEDBACK_WRITE_BEHIND", "1") == "1"
+FEEDBACK_QUEUE_SIZE = int(os.getenv("FRAUD_FEEDBACK_QUEUE_SIZE", "10000"))
+
+# New feedback is folded into the /monitoring aggregates in the background
+MONITOR_REFRESH_SECONDS = float(os.getenv("FRAUD_MONITOR_REFRESH_SECONDS", "5"))
+
+# LRU of per-row SHAP values for /explain
+EXPLAIN_CACHE_SIZE = int(os.getenv("FRAUD_EXPLAIN_CACHE_SIZE", "4096"))
+
+# Per-request Server-Timing header with stage durations (off by default)
+SERVER_TIMING = os.getenv("FRAUD_SERVER_TIMING", "0") == "1"
 
-from src.risk import hybrid_risk_score
-from src.decision import decision_engine
-from src.feedback import init_db, store_feedback
+# Input / score drift against the bundle's reference (on by default)
+DRIFT_ENABLED = os.getenv("FRAUD_DRIFT", "1") == "1"
+DRIFT_WINDOW_MINUTES = float(os.getenv("FRAUD_DRIFT_WINDOW_MINUTES", "60"))
 
-app = FastAPI(title="Fraud Intelligence API")
+# Rows below this sliding-window quantile of anomaly scores are flagged
+ANOMALY_QUANTILE = float(os.getenv("FRAUD_ANOMALY_QUANTILE", str(ANOMALY_QUANTILE)))
+ANOMALY_WINDOW_MINUTES = float(os.getenv("FRAUD_ANOMALY_WINDOW_MINUTES", "60"))
+
+# Challenger bundle scored on a sample of traffic after responses are
+# sent (registry version; off unless set, or via /admin/shadow)
+SHADOW_VERSION = os.getenv("FRAUD_SHADOW_VERSION")
+SHADOW_SAMPLE_RATE = float(os.getenv("FRAUD_SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_WORKERS = int(os.getenv("FRAUD_SHADOW_WORKERS", "1"))
+SHADOW_QUEUE_SIZE = int(os.getenv("FRAUD_SHADOW_QUEUE_SIZE", "1000"))
+SHADOW_LOG_PATH = os.getenv("FRAUD_SHADOW_LOG", SHADOW_LOG)
+
+# Versioned model registry; its active version is served on startup
+registry = ModelRegistry(os.getenv("FRAUD_MODEL_REGISTRY", REGISTRY_DIR))
+
+# Standalone bundle (memory-mapped, shared across workers)
+BUNDLE_PATH = os.getenv("FRAUD_MODEL_BUNDLE", "models/bundle")
+
+def load_startup_bundle():
+    active = registry.active_version()
+    if active is not None:
+        return load_bundle(registry.path(active))
+
+    if os.path.exists(os.path.join(BUNDLE_PATH, MANIFEST)):
+        return load_bundle(BUNDLE_PATH)
+
+    # Legacy joblib pickles
+    xgb_model = joblib.load("models/xgb.pkl")
+    iso_model = inference_engine(joblib.load("models/iso.pkl"))
+
+    # Anomaly calibration; without it risk falls back to per-batch
+    # min-max normalisation
+    CALIBRATION_PATH = "models/iso_calibration.npy"
+    calibration = (
+        load_calibration(CALIBRATION_PATH) if os.path.exists(CALIBRATION_PATH) else None
+    )
+    return legacy_bundle(xgb_model, iso_model, calibration)
 
 # Load models
-xgb_model = joblib.load("models/xgb.pkl")
-iso_model = joblib.load("models/iso.pkl")
+model_slot = ModelSlot(load_startup_bundle())
+warm_up(model_slot.current)
 
 # Init DB
 init_db()
 
+# ------------------ Metrics -------------------------------
+
+metrics = MetricsRegistry()
+metrics.histogram("fraud_request_seconds", "End-to-end request latency by endpoint")
+metrics.histogram("fraud_stage_seconds", "Latency of each request / scoring stage")
+metrics.counter("fraud_requests_total", "Requests by endpoint and status code")
+metrics.counter("fraud_decisions_total", "Scored transactions by decision")
+metrics.gauge("fraud_queue_depth", "Items waiting in in-process queues")
+metrics.gauge("fraud_drift_psi", "PSI of each feature / score against the training reference")
+metrics.gauge("fraud_drift_ks", "KS statistic of each feature / score against the training reference")
+metrics.gauge("fraud_anomaly_threshold", "Current anomaly-score threshold for anomaly_flag")
+
+DECISION_LABELS = {APPROVE: "APPROVE", REVIEW: "REVIEW", BLOCK: "BLOCK"}
+
+def observe_stages(timer):
+    for name, seconds in timer.durations.items():
+        metrics.observe("fraud_stage_seconds", seconds, stage=name)
+
+def request_timer(request):
+    """
+    The request's StageTimer; its "parse" stage is everything before the
+    handler ran (body read, pydantic validation, dispatch).
+    """
+    timer = request.state.timer
+    timer.durations["parse"] = time.perf_counter() - request.state.started
+    return timer
+
+# (model version, DriftMonitor or None, AnomalyThreshold); replaced as
+# one tuple on a swap
+monitor_state = (None, None, None)
+
+def traffic_monitors(model):
+    """
+    (drift monitor, anomaly threshold) of the serving bundle; a new
+    version starts new windows. The drift monitor is None if the bundle
+    has no drift reference.
+    """
+    global monitor_state
+    if monitor_state[0] != model.version:
+        reference = model.manifest.get("drift_reference")
+        monitor_state = (
+            model.version,
+            DriftMonitor(reference, DRIFT_WINDOW_MINUTES * 60) if reference else None,
+            AnomalyThreshold.from_calibration(
+                model.calibration, ANOMALY_QUANTILE,
+                window_seconds=ANOMALY_WINDOW_MINUTES * 60
+            )
+        )
+    return monitor_state[1:]
+
+def score_rows(X, timer=None):
+    # Stages go to the caller's timer, or straight to the histograms
+    # (micro-batcher thread)
+    own_timer = timer is None
+    timer = timer or StageTimer()
+
+    # Read the slot once: a concurrent swap cannot mix two versions
+    model = model_slot.current
+    scores = score_batch(model.xgb_model, model.iso_model, X, model.calibration,
+                         timer=timer, **model.decision_params)
+
+    drift_monitor, anomaly_threshold = traffic_monitors(model)
+    if DRIFT_ENABLED and drift_monitor is not None:
+        with timer.stage("drift"):
+            drift_monitor.update(X, scores)
+
+    with timer.stage("anomaly_threshold"):
+        anomaly_flags = anomaly_threshold.flags(scores["anomaly_score"])
+        anomaly_threshold.update(scores["anomaly_score"])
+
+    with timer.stage("format"):
+        results = format_results(scores)
+        for result, flag in zip(results, anomaly_flags):
+            result["anomaly_flag"] = bool(flag)
+            result["model_version"] = model.version
+
+    for decision, count in enumerate(np.bincount(scores["decision"], minlength=3)):
+        if count:
+            metrics.inc("fraud_decisions_total", int(count), decision=DECISION_LABELS[decision])
+    if own_timer:
+        observe_stages(timer)
+    return results
+
+batcher = None
+feedback_writer = None
+monitor_refresher = None
+shadow = None
+explain_cache = ExplanationCache(EXPLAIN_CACHE_SIZE)
+
+def start_shadow(version, sample_rate=SHADOW_SAMPLE_RATE):
+    """
+    Loads a registry version as the challenger, replacing any running one.
+    """
+    global shadow
+    bundle = load_bundle(registry.path(version))
+    warm_up(bundle)
+    previous, shadow = shadow, ShadowScorer(
+        bundle,
+        sample_rate=sample_rate,
+        workers=SHADOW_WORKERS,
+        max_queue=SHADOW_QUEUE_SIZE,
+        log_path=SHADOW_LOG_PATH
+    )
+    if previous is not None:
+        retire_shadow(previous)
+
+def retire_shadow(scorer):
+    """
+    Drains and closes a replaced challenger on its own thread, so the
+    admin request does not wait for its queue.
+    """
+    threading.Thread(target=scorer.close, name="shadow-close", daemon=True).start()
+
+def shadow_score(background_tasks, X, results):
+    # The task only samples and enqueues: it runs before the connection
+    # takes its next request, so the challenger scores on its own threads
+    scorer = shadow
+    if scorer is not None:
+        background_tasks.add_task(scorer.submit, X, results)
+
+@asynccontextmanager
+async def lifespan(app):
+    global batcher, feedback_writer, monitor_refresher, shadow
+    if SHADOW_VERSION:
+        start_shadow(SHADOW_VERSION)
+    if MICROBATCH_ENABLED:
+        batcher = MicroBatcher(
+            score_rows,
+            max_batch=MICROBATCH_MAX_BATCH,
+            max_wait_ms=MICROBATCH_MAX_WAIT_MS
+        )
+    if FEEDBACK_WRITE_BEHIND:
+        feedback_writer = FeedbackWriter(max_queue=FEEDBACK_QUEUE_SIZE)
+    monitor_refresher = AggregateRefresher(interval=MONITOR_REFRESH_SECONDS)
+    yield
+    if batcher is not None:
+        batcher.close()
+        batcher = None
+    if feedback_writer is not None:
+        # Drain queued feedback before the process exits
+        feedback_writer.close()
+        feedback_writer = None
+    monitor_refresher.close()
+    monitor_refresher = None
+    if shadow is not None:
+        shadow.close()
+        shadow = None
+
+app = FastAPI(title="Fraud Intelligence API", lifespan=lifespan)
+
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    request.state.started = time.perf_counter()
+    request.state.timer = StageTimer()
+
+    response = await call_next(request)
+
+    elapsed = time.perf_counter() - request.state.started
+    route = request.scope.get("route")
+    endpoint = route.path if route is not None else "unmatched"
+
+    metrics.observe("fraud_request_seconds", elapsed, endpoint=endpoint)
+    metrics.inc("fraud_requests_total", endpoint=endpoint, status=str(response.status_code))
+    timer = request.state.timer
+    observe_stages(timer)
+
+    if SERVER_TIMING:
+        timer.durations["total"] = elapsed
+        response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
 class Transaction(BaseModel):
     features: list  # length = 30 (Time, V1..V28, Amount)
 
+class TransactionBatch(BaseModel):
+    transactions: list  # N rows, each of length 30
+
+class ExplainRequest(BaseModel):
+    features: list  # length = 30 (Time, V1..V28, Amount)
+    top_k: int = Field(TOP_K, ge=1, le=N_FEATURES)
+
 class Feedback(BaseModel):
     transaction_index: int
     risk_score: float
     model_decision: int
-    human_label: int  # 0 or 1
+    human_label: Literal[0, 1]
+    features: Optional[List[float]] = None  # the scored row (30 values); enables retraining
 
 @app.post("/predict")
-def predict(tx: Transaction):
-    X = np.array(tx.features).reshape(1, -1)
+def predict(tx: Transaction, request: Request, background_tasks: BackgroundTasks):
+    timer = request_timer(request)
+    try:
+        with timer.stage("to_matrix"):
+            X = to_feature_matrix(tx.features, single=True)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-    # Supervised prob
-    xgb_prob = xgb_model.predict_proba(X)[:, 1]
+    if batcher is not None:
+        # Coalesced with other in-flight requests, scored as one matrix
+        try:
+            with timer.stage("microbatch"):
+                result = batcher.score(X[0])
+        except FutureTimeoutError:
+            raise HTTPException(status_code=503, detail="Scoring timed out, retry later")
+    else:
+        result = score_rows(X, timer)[0]
 
-    # Anomaly score
-    anomaly_score = iso_model.decision_function(X)
+    shadow_score(background_tasks, X, [result])
+    return result
 
-    # Hybrid risk
-    risk = hybrid_risk_score(xgb_prob, anomaly_score)[0]
+@app.post("/predict_batch")
+def predict_batch(batch: TransactionBatch, request: Request, background_tasks: BackgroundTasks):
+    timer = request_timer(request)
+    if not batch.transactions:
+        return {"results": []}
 
-    # Decision
-    decision = decision_engine(np.array([risk]))[0]
+    try:
+        with timer.stage("to_matrix"):
+            X = to_feature_matrix(batch.transactions)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-    return {
-        "fraud_probability": float(xgb_prob[0]),
-        "anomaly_score": float(anomaly_score[0]),
-        "risk_score": float(risk),
-        "decision": int(decision)  # 0 approve, 1 review, 2 block
-    }
+    # One call per stage over the whole matrix; rows keep request order
+    results = score_rows(X, timer)
+    shadow_score(background_tasks, X, results)
+    return {"results": results}
+
+@app.post("/predict_batch/binary")
+async def predict_batch_binary(request: Request, background_tasks: BackgroundTasks):
+    """
+    /predict_batch for raw float32 (application/x-fraud-float32) or Arrow
+    IPC bodies, decoded straight into a NumPy matrix (see src/wire.py).
+    """
+    timer = request.state.timer
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type == FLOAT32_CONTENT_TYPE:
+        decode = decode_float32
+    elif media_type == ARROW_CONTENT_TYPE:
+        decode = decode_arrow
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Use {FLOAT32_CONTENT_TYPE} or {ARROW_CONTENT_TYPE}"
+        )
+
+    body = await request.body()
+    try:
+        with timer.stage("decode"):
+            X = decode(body)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if len(X) == 0:
+        return {"results": []}
+
+    # Scoring is CPU-bound: keep it off the event loop
+    results = await run_in_threadpool(score_rows, X, timer)
+    shadow_score(background_tasks, X, results)
+    return {"results": results}
+
+@app.get("/predict/batching")
+def batching_stats():
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+@app.post("/explain")
+def explain(req: ExplainRequest, request: Request):
+    timer = request_timer(request)
+    try:
+        with timer.stage("to_matrix"):
+            X = to_feature_matrix(req.features, single=True)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    # TreeSHAP in log-odds units; the same row and model hit the cache
+    model = model_slot.current
+    with timer.stage("tree_shap"):
+        result = explain_row(model.xgb_model, model.version, X[0], explain_cache, req.top_k)
+    result["model_version"] = model.version
+    return result
+
+@app.get("/explain/cache")
+def explain_cache_stats():
+    return explain_cache.stats()
 
 @app.post("/feedback")
 def feedback(fb: Feedback):
+    if fb.features is not None:
+        try:
+            X = to_feature_matrix(fb.features, single=True)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if not np.all(np.isfinite(X)):
+            raise HTTPException(status_code=422, detail="features must be finite")
+
+    writer = feedback_writer
+    if writer is not None:
+        try:
+            writer.submit(
+                transaction_index=fb.transaction_index,
+                model_risk_score=fb.risk_score,
+                model_decision=fb.model_decision,
+                human_label=fb.human_label,
+                features=fb.features
+            )
+        except queue.Full:
+            raise HTTPException(status_code=503, detail="Feedback queue is full, retry later")
+        except RuntimeError:
+            raise HTTPException(status_code=503, detail="Feedback writer is shutting down, retry later")
+        return {"status": "feedback queued"}
+
     store_feedback(
         transaction_index=fb.transaction_index,
         model_risk_score=fb.risk_score,
         model_decision=fb.model_decision,
-        human_label=fb.human_label
+        human_label=fb.human_label,
+        features=fb.features
     )
     return {"status": "feedback stored"}
+
+@app.get("/feedback/stats")
+def feedback_stats():
+    if feedback_writer is None:
+        return {"write_behind": False}
+    return {"write_behind": True, **feedback_writer.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    # Queue and drift gauges are sampled at scrape time
+    if batcher is not None:
+        metrics.set("fraud_queue_depth", batcher.stats()["queue_depth"], queue="microbatch")
+    if feedback_writer is not None:
+        metrics.set("fraud_queue_depth", feedback_writer.stats()["queue_depth"], queue="feedback")
+    scorer = shadow
+    if scorer is not None:
+        metrics.set("fraud_queue_depth", scorer.stats()["queue_depth"], queue="shadow")
+
+    _, drift_monitor, anomaly_threshold = monitor_state
+    if anomaly_threshold is not None and anomaly_threshold.threshold is not None:
+        metrics.set("fraud_anomaly_threshold", anomaly_threshold.threshold)
+    if drift_monitor is not None:
+        for column, values in drift_monitor.report()["columns"].items():
+            if values["psi"] is not None:
+                metrics.set("fraud_drift_psi", values["psi"], column=column)
+                metrics.set("fraud_drift_ks", values["ks"], column=column)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/monitoring")
+def monitoring():
+    return monitor_report()
+
+@app.get("/drift")
+def drift():
+    if not DRIFT_ENABLED:
+        return {"enabled": False}
+    model = model_slot.current
+    drift_monitor, _ = traffic_monitors(model)
+    if drift_monitor is None:
+        return {"enabled": True, "reason": "model bundle has no drift reference"}
+    return {"enabled": True, "model_version": model.version, **drift_monitor.report()}
+
+@app.get("/anomaly/threshold")
+def anomaly_threshold_stats():
+    model = model_slot.current
+    _, anomaly_threshold = traffic_monitors(model)
+    return {"model_version": model.version, **anomaly_threshold.stats()}
+
+# ------------------ Model admin -------------------------------
+
+@app.get("/admin/models")
+def list_models():
+    return {"versions": registry.versions(), **model_slot.status()}
+
+@app.post("/admin/models/{version}/activate", status_code=202)
+def activate_model(version: str):
+    try:
+        path = registry.path(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    if not model_slot.load_async(path, on_swap=registry.set_active):
+        raise HTTPException(status_code=409, detail="A model load is already running")
+    return {"status": "loading", "version": version}
+
+@app.post("/admin/models/rollback", status_code=202)
+def rollback_model():
+    previous = registry.previous_version()
+    if previous is None:
+        raise HTTPException(status_code=409, detail="No previous model version")
+
+    if not model_slot.load_async(
+            registry.path(previous), on_swap=lambda _: registry.rollback()
+    ):
+        raise HTTPException(status_code=409, detail="A model load is already running")
+    return {"status": "loading", "version": previous}
+
+# ------------------ Shadow scoring -------------------------------
+
+@app.get("/admin/shadow")
+def shadow_stats():
+    scorer = shadow
+    if scorer is None:
+        return {"enabled": False}
+    return {"enabled": True, "champion_version": model_slot.current.version, **scorer.stats()}
+
+@app.post("/admin/shadow/{version}")
+def start_shadow_version(version: str, sample_rate: float = SHADOW_SAMPLE_RATE):
+    if not 0.0 <= sample_rate <= 1.0:
+        raise HTTPException(status_code=422, detail="sample_rate must be in [0, 1]")
+    try:
+        start_shadow(version, sample_rate)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"status": "shadowing", "version": version, "sample_rate": sample_rate}
+
+@app.delete("/admin/shadow")
+def stop_shadow():
+    global shadow
+    previous, shadow = shadow, None
+    if previous is None:
+        raise HTTPException(status_code=409, detail="No challenger is running")
+    # Stats as of the stop; rows still queued are scored and logged
+    # while the scorer drains in the background
+    retire_shadow(previous)
+    return {"status": "stopped", **previous.stats()}
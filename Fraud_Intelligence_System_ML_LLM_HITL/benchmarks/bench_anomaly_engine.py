@@ -0,0 +1,53 @@
+"""
+IsolationForest inference latency: sklearn vs the flattened engine.
+
+Run from the project root:
+    python -m benchmarks.bench_anomaly_engine
+"""
+import argparse
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+from src import anomaly_engine
+from src.anomaly_engine import FlatIsolationForest
+from benchmarks.synthetic import synthetic_transactions
+
+
+def latency_ms(fn, X, repeats):
+    fn(X)  # warm-up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1000.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")  # feature-name warnings from sklearn
+
+    model = joblib.load("models/iso.pkl")
+    engines = {"flat-numpy": FlatIsolationForest.from_sklearn(model)}
+    engines["flat-numpy"].use_numba = False
+
+    if anomaly_engine.njit is not None:
+        engines["flat-numba"] = FlatIsolationForest.from_sklearn(model)
+        engines["flat-numba"].decision_function(synthetic_transactions(1))  # JIT
+
+    for n_rows in (1, 10_000):
+        X = synthetic_transactions(n_rows)
+        sk_ms = latency_ms(model.decision_function, X, args.repeats)
+        print(f"{n_rows:>6} rows | {'sklearn':<10} {sk_ms:9.3f} ms")
+
+        for name, engine in engines.items():
+            max_err = np.abs(model.decision_function(X) - engine.decision_function(X)).max()
+            ms = latency_ms(engine.decision_function, X, args.repeats)
+            print(f"{n_rows:>6} rows | {name:<10} {ms:9.3f} ms | {sk_ms / ms:6.1f}x "
+                  f"| max |diff| {max_err:.1e}")
@@ -0,0 +1,60 @@
+"""
+Micro-benchmark of decision_engine on 10M risk scores.
+
+Run from the project root:
+    python -m benchmarks.bench_decision --n 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.decision import decision_engine, ThresholdTable
+
+
+def loop_decision_engine(risk_scores, low_threshold=0.3, high_threshold=0.8):
+    # Previous per-score Python loop, kept as the baseline
+    decisions = []
+    for score in risk_scores:
+        if score >= high_threshold:
+            decisions.append(2)
+        elif score >= low_threshold:
+            decisions.append(1)
+        else:
+            decisions.append(0)
+    return np.array(decisions)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    risk = rng.random(args.n)
+    amount = rng.lognormal(mean=3.0, sigma=1.5, size=args.n)
+
+    table = ThresholdTable(
+        edges=[50, 500, 5000],
+        low=[0.35, 0.3, 0.25, 0.2],
+        high=[0.85, 0.8, 0.75, 0.7]
+    )
+
+    loop_out, loop_s = timed(loop_decision_engine, risk)
+    vec_out, vec_s = timed(decision_engine, risk)
+    _, table_s = timed(
+        decision_engine, risk, threshold_table=table, segment_values=amount
+    )
+
+    assert np.array_equal(loop_out, vec_out)
+
+    print(f"scores            : {args.n:,}")
+    print(f"python loop       : {loop_s:8.3f}s")
+    print(f"vectorised scalar : {vec_s:8.3f}s  ({loop_s / vec_s:.0f}x)")
+    print(f"vectorised table  : {table_s:8.3f}s  ({loop_s / table_s:.0f}x)")
@@ -0,0 +1,46 @@
+"""
+Permutation SHAP (src.explain.explain_model) versus native TreeSHAP.
+
+Run from the project root (uses models/xgb.pkl):
+    python -m benchmarks.bench_explain --rows 300
+"""
+import argparse
+import time
+
+import joblib
+
+from benchmarks.synthetic import synthetic_transactions
+from src.explain import explain_model
+from src.tree_shap import tree_contributions, explain_row, ExplanationCache
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--permutation-rows", type=int, default=20,
+                        help="rows explained by the permutation explainer (it is slow)")
+    parser.add_argument("--model", default="models/xgb.pkl")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    X = synthetic_transactions(args.rows)
+
+    perm_rows = min(args.permutation_rows, args.rows)
+    _, perm_s = timed(explain_model, model, X[:perm_rows])
+    _, tree_s = timed(tree_contributions, model, X)
+
+    cache = ExplanationCache()
+    _, miss_s = timed(lambda: [explain_row(model, "bench", x, cache) for x in X])
+    _, hit_s = timed(lambda: [explain_row(model, "bench", x, cache) for x in X])
+
+    print(f"permutation SHAP     : {perm_s / perm_rows * 1000:10.2f} ms/row")
+    print(f"TreeSHAP (batch)     : {tree_s / args.rows * 1000:10.3f} ms/row")
+    print(f"explain_row (miss)   : {miss_s / args.rows * 1000:10.3f} ms/row")
+    print(f"explain_row (hit)    : {hit_s / args.rows * 1000:10.3f} ms/row")
+    print(f"speed-up (batch)     : {perm_s / perm_rows / (tree_s / args.rows):10.0f}x")
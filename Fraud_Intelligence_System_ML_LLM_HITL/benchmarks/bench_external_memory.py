@@ -0,0 +1,90 @@
+"""
+Peak RSS and wall time: in-memory vs out-of-core XGBoost training.
+
+Each mode runs in a fresh subprocess so ru_maxrss is its own peak.
+Run from the project root:
+    python -m benchmarks.bench_external_memory --rows 2000000
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_transactions
+from src.scoring import FEATURE_NAMES
+
+MODES = ("in-memory", "quantile", "external")
+
+
+def write_dataset(path, n_rows, chunk=500_000):
+    """
+    Synthetic export written in chunks (about 0.2% fraud, shifted V1..V4).
+    """
+    # Separate stream from the features, or labels would track Time
+    rng = np.random.default_rng([0, 1])
+    for start in range(0, n_rows, chunk):
+        n = min(chunk, n_rows - start)
+        X = synthetic_transactions(n, seed=start)
+        y = (rng.random(n) < 0.002).astype(int)
+        X[y == 1, 1:5] += 3.0
+
+        df = pd.DataFrame(X, columns=FEATURE_NAMES)
+        df["Class"] = y
+        df.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+
+def run_mode(mode, path):
+    from src.data_loader import load_data
+    from src.preprocessing import clean_data
+    from src.target_definition import split_features_target
+    from src.split import train_val_split
+    from src.model import (
+        train_xgboost, evaluate_model,
+        train_xgboost_external, evaluate_model_streaming
+    )
+
+    start = time.perf_counter()
+    if mode == "in-memory":
+        X, y = split_features_target(clean_data(load_data(path)))
+        X_train, X_val, y_train, y_val = train_val_split(X, y)
+        model = train_xgboost(X_train, y_train)
+        evaluate_model(model, X_val, y_val)
+    else:
+        model, val_it = train_xgboost_external(path, mode=mode)
+        evaluate_model_streaming(model, val_it)
+    wall = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(f"RESULT {mode} {wall:.1f} {peak_mb:.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--path", default="data/bench_transactions.csv")
+    parser.add_argument("--run", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_mode(args.run, args.path)
+        sys.exit(0)
+
+    if not os.path.exists(args.path):
+        os.makedirs(os.path.dirname(args.path) or ".", exist_ok=True)
+        print(f"Writing {args.rows:,} synthetic rows to {args.path}")
+        write_dataset(args.path, args.rows)
+
+    print(f"{'mode':<10} {'wall (s)':>9} {'peak RSS (MB)':>14}")
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_external_memory",
+             "--path", args.path, "--run", mode],
+            capture_output=True, text=True, check=True
+        ).stdout
+        _, _, wall, peak = next(l for l in out.splitlines() if l.startswith("RESULT")).split()
+        print(f"{mode:<10} {float(wall):>9.1f} {float(peak):>14.0f}")
@@ -0,0 +1,51 @@
+"""
+Concurrent single-row scoring with and without the micro-batcher.
+
+Run from the project root:
+    python -m benchmarks.bench_microbatch --requests 2000 --concurrency 64
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+
+from src.scoring import score_batch, format_results
+from src.batching import MicroBatcher
+from benchmarks.synthetic import synthetic_transactions
+
+
+def run(score_one, X, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(score_one, X))
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    xgb_model = joblib.load("models/xgb.pkl")
+    iso_model = joblib.load("models/iso.pkl")
+
+    def score_rows(X):
+        return format_results(score_batch(xgb_model, iso_model, X))
+
+    X = synthetic_transactions(args.requests)
+
+    direct_s = run(lambda row: score_rows(row.reshape(1, -1))[0], X, args.concurrency)
+
+    batcher = MicroBatcher(score_rows, args.max_batch, args.max_wait_ms)
+    batched_s = run(batcher.score, X, args.concurrency)
+    stats = batcher.stats()
+    batcher.close()
+
+    print(f"direct      : {args.requests / direct_s:>10,.0f} req/sec")
+    print(f"micro-batch : {args.requests / batched_s:>10,.0f} req/sec")
+    print(f"mean batch size    : {stats['batch_size']['mean']:.1f}")
+    print(f"mean queue delay ms: {stats['queue_delay_ms']['mean']:.2f}")
@@ -0,0 +1,88 @@
+"""
+Model-only micro-benchmarks of the scoring stages, per batch size:
+predict_proba, decision_function (sklearn and flattened engine),
+hybrid_risk_score and decision_engine.
+
+Run from the project root:
+    python -m benchmarks.bench_models --save benchmarks/baseline_models.json
+    python -m benchmarks.bench_models --compare benchmarks/baseline_models.json
+"""
+import argparse
+import sys
+import time
+
+import joblib
+import numpy as np
+
+from benchmarks.regression import save_results, compare
+from benchmarks.synthetic import synthetic_transactions
+from src.anomaly import inference_engine
+from src.decision import decision_engine
+from src.risk import hybrid_risk_score, fit_anomaly_calibration
+
+
+def median_ms(fn, repeats, min_seconds=0.2):
+    """
+    Median wall time of fn() in ms over at least `repeats` calls (more
+    for fast calls, until `min_seconds` have been spent).
+    """
+    fn()  # warm-up
+    times = []
+    started = time.perf_counter()
+    while len(times) < repeats or time.perf_counter() - started < min_seconds:
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--xgb", default="models/xgb.pkl")
+    parser.add_argument("--iso", default="models/iso.pkl")
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    xgb_model = joblib.load(args.xgb)
+    iso_sklearn = joblib.load(args.iso)
+    iso_engine = inference_engine(iso_sklearn)
+
+    calibration = fit_anomaly_calibration(
+        iso_engine.decision_function(synthetic_transactions(10_000, seed=1))
+    )
+
+    results = {}
+    print(f"{'stage':<34} {'batch':>7} {'median ms':>11} {'rows/sec':>14}")
+    for n in args.batch_sizes:
+        X = synthetic_transactions(n)
+        probs = xgb_model.predict_proba(X)[:, 1]
+        anomaly = iso_engine.decision_function(X)
+        risk = hybrid_risk_score(probs, anomaly, calibration=calibration)
+
+        stages = {
+            "predict_proba": lambda: xgb_model.predict_proba(X),
+            "decision_function[sklearn]": lambda: iso_sklearn.decision_function(X),
+            "decision_function[engine]": lambda: iso_engine.decision_function(X),
+            "hybrid_risk_score": lambda: hybrid_risk_score(probs, anomaly, calibration=calibration),
+            "decision_engine": lambda: decision_engine(risk)
+        }
+        for stage, fn in stages.items():
+            ms = median_ms(fn, args.repeats)
+            results[f"{stage}@{n}"] = {"median_ms": ms}
+            print(f"{stage:<34} {n:>7} {ms:>11.3f} {n / ms * 1000.0:>14,.0f}")
+
+    if args.save:
+        save_results(args.save, results)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.compare}")
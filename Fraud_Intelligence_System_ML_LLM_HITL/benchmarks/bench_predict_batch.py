@@ -0,0 +1,53 @@
+"""
+Rows/sec of POST /predict_batch versus looping over POST /predict.
+
+Run from the project root:
+    python -m benchmarks.bench_predict_batch --rows 5000
+"""
+import argparse
+import time
+
+from fastapi.testclient import TestClient
+
+from api.app import app
+from benchmarks.synthetic import synthetic_transactions
+
+
+def bench_loop(client, X):
+    start = time.perf_counter()
+    for row in X:
+        response = client.post("/predict", json={"features": row.tolist()})
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def bench_batch(client, X, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(X), batch_size):
+        chunk = X[i:i + batch_size]
+        response = client.post("/predict_batch", json={"transactions": chunk.tolist()})
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--loop-rows", type=int, default=500,
+                        help="rows scored through /predict (it is slow)")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    X = synthetic_transactions(args.rows)
+
+    loop_rows = min(args.loop_rows, args.rows)
+    loop_s = bench_loop(client, X[:loop_rows])
+    batch_s = bench_batch(client, X, args.batch_size)
+
+    loop_rate = loop_rows / loop_s
+    batch_rate = args.rows / batch_s
+
+    print(f"/predict loop   : {loop_rows:>8} rows  {loop_s:8.3f}s  {loop_rate:>12,.0f} rows/sec")
+    print(f"/predict_batch  : {args.rows:>8} rows  {batch_s:8.3f}s  {batch_rate:>12,.0f} rows/sec")
+    print(f"speed-up        : {batch_rate / loop_rate:.1f}x")
@@ -0,0 +1,61 @@
+"""
+Threshold search: vectorised sweep (binned cumulative counts) versus
+re-running decision_engine per (alpha, low, high) candidate.
+
+Synthetic scores with ~0.2% fraud; the naive loop is timed on a sample
+of candidates and extrapolated to the full grid.
+
+Run from the project root:
+    python -m benchmarks.bench_thresholds --rows 100000 1000000 5000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.thresholds import (
+    ALPHAS, THRESHOLDS, sweep_costs, evaluate_decision, optimise_thresholds
+)
+
+
+def make_scores(n_rows, fraud_rate=0.002, seed=0):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_rows) < fraud_rate).astype(np.int64)
+    # Fraud skews high on both scores
+    xgb_probs = np.clip(rng.beta(0.5, 20, n_rows) + 0.6 * y * rng.random(n_rows), 0, 1)
+    anomaly_norm = np.clip(rng.beta(2, 8, n_rows) + 0.3 * y * rng.random(n_rows), 0, 1)
+    return xgb_probs, anomaly_norm, y
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--naive-samples", type=int, default=20)
+    args = parser.parse_args()
+
+    n_candidates = len(ALPHAS) * len(THRESHOLDS) * (len(THRESHOLDS) + 1) // 2
+    print(f"grid: {len(ALPHAS)} alphas x {len(THRESHOLDS)} thresholds, "
+          f"{n_candidates:,} (alpha, low <= high) candidates")
+    print(f"{'rows':>10} {'sweep s':>9} {'naive s (est.)':>15} {'speedup':>9}  best (alpha, low, high)")
+
+    rng = np.random.default_rng(1)
+    for n in args.rows:
+        xgb_probs, anomaly_norm, y = make_scores(n)
+
+        start = time.perf_counter()
+        grid = sweep_costs(xgb_probs, anomaly_norm, y)
+        sweep_s = time.perf_counter() - start
+
+        # Sampled candidates: identical cost via decision_engine
+        valid = np.argwhere(np.isfinite(grid))
+        sample = valid[rng.choice(len(valid), args.naive_samples, replace=False)]
+        start = time.perf_counter()
+        for a, low, high in sample:
+            naive = evaluate_decision(xgb_probs, anomaly_norm, y,
+                                      ALPHAS[a], THRESHOLDS[low], THRESHOLDS[high])
+            assert np.isclose(naive["expected_cost"], grid[a, low, high]), (a, low, high)
+        naive_s = (time.perf_counter() - start) / len(sample) * n_candidates
+
+        best = optimise_thresholds(xgb_probs, anomaly_norm, y)
+        print(f"{n:>10,} {sweep_s:>9.2f} {naive_s:>15,.0f} {naive_s / sweep_s:>8,.0f}x  "
+              f"({best['alpha']:.2f}, {best['low_threshold']:.3f}, {best['high_threshold']:.3f})")
@@ -0,0 +1,60 @@
+"""
+Request decode cost: JSON + pydantic + to_feature_matrix versus the
+binary formats of src/wire.py, per request size.
+
+Run from the project root:
+    python -m benchmarks.bench_wire --rows 1 100 10000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from pydantic import BaseModel
+
+from benchmarks.synthetic import synthetic_transactions
+from src.scoring import to_feature_matrix
+from src.wire import encode_float32, decode_float32, encode_arrow, decode_arrow
+
+
+class TransactionBatch(BaseModel):
+    # Same model as api/app.py
+    transactions: list
+
+
+def decode_json(body):
+    batch = TransactionBatch(**json.loads(body))
+    return to_feature_matrix(batch.transactions)
+
+
+def median_us(fn, body, min_seconds=0.3):
+    fn(body)  # warm-up
+    times = []
+    started = time.perf_counter()
+    while len(times) < 5 or time.perf_counter() - started < min_seconds:
+        start = time.perf_counter()
+        fn(body)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'format':<8} {'body KB':>9} {'decode us':>11} {'vs JSON':>8}")
+    for n in args.rows:
+        X = synthetic_transactions(n)
+        bodies = {
+            "json": (json.dumps({"transactions": X.tolist()}).encode(), decode_json),
+            "float32": (encode_float32(X), decode_float32),
+            "arrow": (encode_arrow(X), decode_arrow)
+        }
+
+        json_us = None
+        for name, (body, decode) in bodies.items():
+            assert np.allclose(decode(body), X.astype(np.float32), rtol=1e-6)
+            us = median_us(decode, body)
+            json_us = json_us or us
+            print(f"{n:>7} {name:<8} {len(body) / 1024:>9.1f} {us:>11.1f} {json_us / us:>7.1f}x")
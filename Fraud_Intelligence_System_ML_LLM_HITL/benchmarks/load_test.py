@@ -0,0 +1,230 @@
+"""
+Load test of the serving path.
+
+Starts the API with uvicorn on localhost (a separate process, so the
+load generator does not share its GIL or CPU accounting) and drives an
+endpoint with synthetic transactions at each concurrency level for a
+fixed duration. Reports p50/p95/p99 latency, throughput and the server's
+CPU use (cores busy, from /proc).
+
+Run from the project root:
+    python -m benchmarks.load_test --concurrency 1 8 32 --duration 10
+    python -m benchmarks.load_test --endpoint predict_batch --batch-size 100
+    python -m benchmarks.load_test --endpoint predict_batch_binary --batch-size 100
+    python -m benchmarks.load_test --endpoint predict_microbatch --concurrency 32
+    python -m benchmarks.load_test --url http://host:8000   # existing server, no CPU
+
+Endpoints: predict (JSON, one row), predict_microbatch (the same
+/predict calls with the server's micro-batcher enabled), predict_batch
+(JSON rows) and predict_batch_binary (float32 wire format). FRAUD_*
+environment variables (e.g. FRAUD_MICROBATCH_MAX_WAIT_MS) are passed to
+the server, so serving options can be compared.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.regression import save_results, compare
+from benchmarks.synthetic import synthetic_transactions
+from src.wire import encode_float32, FLOAT32_CONTENT_TYPE
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+# --endpoint -> (path, server environment)
+ENDPOINTS = {
+    "predict": ("/predict", {}),
+    "predict_microbatch": ("/predict", {"FRAUD_MICROBATCH": "1"}),
+    "predict_batch": ("/predict_batch", {}),
+    "predict_batch_binary": ("/predict_batch/binary", {})
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, workers=1, timeout=60.0, env=None):
+    """
+    uvicorn api.app:app on localhost; returns the process once it answers.
+    `env` adds to (and overrides) this process's environment.
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.app:app",
+         "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env={**os.environ, **(env or {})}
+    )
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("API server exited during startup")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=1.0).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("API server did not start in time")
+
+
+def cpu_seconds(pid):
+    """
+    User + system CPU of a process and its children (uvicorn workers).
+    """
+    total = 0.0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(p) for p in f.read().split()]
+    except OSError:
+        pass
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / CLK_TCK  # utime, stime
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+def make_payloads(endpoint, batch_size, n=512):
+    """
+    Keyword arguments for `client.post`, one dict per request.
+    """
+    X = synthetic_transactions(n * batch_size)
+    if endpoint in ("predict", "predict_microbatch"):
+        return [{"json": {"features": row.tolist()}} for row in X[:n]]
+    batches = [X[i * batch_size:(i + 1) * batch_size] for i in range(n)]
+    if endpoint == "predict_batch_binary":
+        headers = {"content-type": FLOAT32_CONTENT_TYPE}
+        return [{"content": encode_float32(batch), "headers": headers} for batch in batches]
+    return [{"json": {"transactions": batch.tolist()}} for batch in batches]
+
+
+async def drive(url, payloads, concurrency, duration):
+    """
+    `concurrency` closed-loop clients posting for `duration` seconds.
+    Returns (latencies in seconds of the 2xx responses, errors, elapsed);
+    fast failures are counted as errors, not as latency samples.
+    """
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def worker(offset):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(url, **payloads[i % len(payloads)])
+                    if response.is_success:
+                        latencies.append(time.perf_counter() - start)
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                i += concurrency
+
+        await asyncio.gather(*(worker(k) for k in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return np.array(latencies), errors, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--endpoint", choices=list(ENDPOINTS), default="predict")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--url", help="target an already running server instead")
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    path, server_env = ENDPOINTS[args.endpoint]
+    server = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        server = start_server(port, args.workers, env=server_env)
+        base_url = f"http://127.0.0.1:{port}"
+    base_url = base_url.rstrip("/")
+
+    batching = args.endpoint == "predict_microbatch"
+    if batching and not httpx.get(f"{base_url}/predict/batching", timeout=5.0).json()["enabled"]:
+        print("Warning: the server's micro-batcher is off (start it with FRAUD_MICROBATCH=1)")
+
+    rows_per_request = 1 if path == "/predict" else args.batch_size
+    payloads = make_payloads(args.endpoint, rows_per_request)
+    url = base_url + path
+
+    results = {}
+    try:
+        # Warm-up (connections, lazy imports, caches)
+        asyncio.run(drive(url, payloads, 1, 1.0))
+
+        print(f"{args.endpoint}, {rows_per_request} row(s)/request, {args.duration:.0f}s per level")
+        print(f"{'conc':>5} {'req/s':>9} {'rows/s':>10} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'max ms':>8} {'errors':>7} {'cpu cores':>10}")
+
+        for concurrency in args.concurrency:
+            cpu_before = cpu_seconds(server.pid) if server else None
+            latencies, errors, elapsed = asyncio.run(
+                drive(url, payloads, concurrency, args.duration)
+            )
+            cpu = (cpu_seconds(server.pid) - cpu_before) / elapsed if server else float("nan")
+
+            if len(latencies):
+                p50, p95, p99, worst = np.percentile(latencies, [50, 95, 99, 100]) * 1000.0
+            else:
+                p50 = p95 = p99 = worst = float("nan")
+            rps = len(latencies) / elapsed  # successful requests only
+            results[f"{args.endpoint}@c{concurrency}"] = {
+                "requests_per_sec": rps,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "errors": errors
+            }
+            print(f"{concurrency:>5} {rps:>9,.0f} {rps * rows_per_request:>10,.0f} {p50:>8.2f} "
+                  f"{p95:>8.2f} {p99:>8.2f} {worst:>8.2f} "
+                  f"{errors:>7} {cpu:>10.2f}")
+
+        if batching:
+            stats = httpx.get(f"{base_url}/predict/batching", timeout=5.0).json()
+            print(f"\nMicro-batcher: {stats['batch_size']['count']:,} batches, "
+                  f"mean size {stats['batch_size']['mean']:.2f}, "
+                  f"mean queue delay {stats['queue_delay_ms']['mean']:.2f} ms")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    if args.save:
+        save_results(args.save, results)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.compare}")
@@ -0,0 +1,39 @@
+import json
+
+
+def save_results(path, results):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def compare(results, baseline_path, tolerance, floor_ms=0.05):
+    """
+    Compares {name: {metric: value}} against a saved baseline. Metrics
+    ending in "_ms" regress when they grow, every other metric when it
+    shrinks, by more than `tolerance` (a fraction). Timings that moved
+    by less than `floor_ms` are treated as timer noise. An "errors"
+    metric fails on any error, whatever the baseline. Returns the list
+    of regressions as printable strings.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            if metric == "errors":
+                if value:
+                    regressions.append(f"{name} errors: {value}")
+                continue
+
+            old = baseline.get(name, {}).get(metric)
+            if not old:
+                continue
+            change = (value - old) / old
+            if metric.endswith("_ms"):
+                worse = change > tolerance and value - old > floor_ms
+            else:
+                worse = -change > tolerance
+            if worse:
+                regressions.append(f"{name} {metric}: {old:.4g} -> {value:.4g} ({change:+.0%})")
+    return regressions
@@ -0,0 +1,15 @@
+import numpy as np
+
+
+def synthetic_transactions(n_rows, seed=42):
+    """
+    Generates (n_rows, 30) transactions shaped like the training data:
+    Time in seconds over two days, PCA components V1..V28, skewed Amount.
+    """
+    rng = np.random.default_rng(seed)
+
+    time = rng.uniform(0, 172_800, size=(n_rows, 1))
+    v = rng.standard_normal(size=(n_rows, 28))
+    amount = rng.lognormal(mean=3.0, sigma=1.5, size=(n_rows, 1))
+
+    return np.hstack([time, v, amount])
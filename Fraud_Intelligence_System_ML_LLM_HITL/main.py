@@ -1,66 +1,205 @@
-from src.data_loader import load_data
+from src.data_loader import load_data_columnar, file_hash
 from src.preprocessing import clean_data
 from src.target_definition import split_features_target
 from src.split import train_val_split
-from src.model import train_xgboost, evaluate_model
+from src.model import train_xgboost, evaluate_model, downsample_negatives
 from src.anomaly import train_isolation_forest,anomaly_scores 
-from src.explain import explain_model, global_explanation, local_explanation
+from src.explain import materialize_explanations
+from src.tree_shap import tree_contributions
 from src.decision import decision_engine
-from src.risk import hybrid_risk_score
+from src.risk import hybrid_risk_score, fit_anomaly_calibration
+from src.thresholds import (optimise_thresholds, sweep_costs, anomaly_risk, decision_config,
+                            cost_matrix, ALPHAS, THRESHOLDS)
+from src.drift import build_reference, drift_values
+from src.anomaly_threshold import reference_quantile, ANOMALY_QUANTILE
+from src.bundle import data_hash, MANIFEST
+from src.registry import ModelRegistry, REGISTRY_DIR
+from src.pipeline import Pipeline
 import numpy as np 
 import os 
-import joblib 
 from src.feedback import init_db,store_feedback
 from src.monitoring import monitor_model
 
-if __name__ == "__main__":
+DATA_PATH = "data/raw_transactions.csv"
+
+# Fraction of legitimate rows used for training (None = all of them)
+NEG_SAMPLE_RATE = None
+
+# ------------------ Pipeline stages -------------------------------
 
-    # Load → clean → split
-    df = load_data("data/raw_transactions.csv")
-    df_clean = clean_data(df)
+def split_stage(df_clean):
     X, y = split_features_target(df_clean)
-    X_train, X_val, y_train, y_val = train_val_split(X, y)
+    return train_val_split(X, y)
+
+def train_xgb_stage(split, n_jobs=-1, neg_sample_rate=None):
+    X_train, _, y_train, _ = split
+    return train_xgboost(X_train, y_train, n_jobs=n_jobs,
+                         neg_sample_rate=neg_sample_rate)
+
+def evaluate_stage(xgb_model, split):
+    _, X_val, _, y_val = split
+    evaluate_model(xgb_model, X_val, y_val)
+
+def train_iso_stage(split, n_jobs=-1, neg_sample_rate=None):
+    X_train, _, y_train, _ = split
+    return train_isolation_forest(X_train, y_train, n_jobs=n_jobs,
+                                  neg_sample_rate=neg_sample_rate)
+
+def calibration_stage(iso_model, split):
+    # Anomaly-score calibration (quantiles over training data) so online
+    # risk does not depend on which rows share a batch
+    return fit_anomaly_calibration(anomaly_scores(iso_model, split[0]))
+
+def val_scores_stage(iso_model, split):
+    return anomaly_scores(iso_model, split[1])
+
+def xgb_probs_stage(xgb_model, split):
+    return xgb_model.predict_proba(split[1])[:, 1]
+
+def explain_stage(xgb_model, split, n_jobs=-1):
+    # TreeSHAP for the whole validation set, written to reports/explanations
+    return materialize_explanations(xgb_model, split[1], n_jobs=n_jobs)
+
+def explain_outputs(explanations):
+    return [explanations["values"], explanations["importance"], *explanations["plots"].values()]
+
+def thresholds_stage(xgb_probs, val_scores, calibration, split, alphas, thresholds, costs):
+    # Cost-optimal alpha / REVIEW / BLOCK thresholds on the validation set
+    y_val = np.asarray(split[3])
+    return optimise_thresholds(xgb_probs, anomaly_risk(val_scores, calibration), y_val,
+                               alphas=np.asarray(alphas), thresholds=np.asarray(thresholds),
+                               costs=costs)
+
+def drift_reference_stage(xgb_probs, val_scores, calibration, split, thresholds):
+    # Reference bins / counts that the API's drift monitor compares
+    # live features and scores against
+    risk = hybrid_risk_score(xgb_probs, val_scores, alpha=thresholds["alpha"],
+                             calibration=calibration)
+    scores = {"fraud_probability": xgb_probs, "anomaly_score": val_scores, "risk_score": risk}
+    return build_reference(drift_values(split[1], scores))
+
+def publish_stage(xgb_model, iso_model, calibration, split, thresholds, drift_reference):
+    X_train = split[0]
+    registry = ModelRegistry()
+    manifest = registry.publish(
+        xgb_model,
+        iso_model,
+        feature_names=list(X_train.columns),
+        training_data_hash=data_hash(X_train),
+        calibration=calibration,
+        extra={
+            "decision": decision_config(thresholds),
+            "drift_reference": drift_reference
+        }
+    )
+    print(f"Published model version {manifest['version']} to {registry.root}")
+
+    # First model becomes active; later ones are promoted via the API
+    if registry.active_version() is None:
+        registry.set_active(manifest["version"])
+    return manifest
+
+def publish_outputs(manifest):
+    return [os.path.join(REGISTRY_DIR, manifest["version"], MANIFEST)]
+
+
+def build_pipeline(data_path=DATA_PATH, neg_sample_rate=NEG_SAMPLE_RATE):
+    """
+    Load → clean → split → (XGBoost || IsolationForest) → calibration,
+    scores, thresholds, drift reference, SHAP, publish. Cached stages are skipped on reruns.
+    """
+    pipeline = Pipeline()
+
+    # Loading has its own columnar cache; split output is cached instead.
+    # The file is hashed once, for both the stage key and that cache
+    data_digest = file_hash(data_path)
+    pipeline.add("load", load_data_columnar,
+                 params={"path": data_path, "content_hash": data_digest},
+                 fingerprint={"data": data_digest}, cache=False)
+    pipeline.add("clean", clean_data, inputs=["load"], cache=False)
+    pipeline.add("split", split_stage, inputs=["clean"],
+                 code=[split_features_target, train_val_split])
+
+    sampling = {"neg_sample_rate": neg_sample_rate}
+    pipeline.add("train_xgb", train_xgb_stage, inputs=["split"], params=sampling,
+                 code=[train_xgboost, downsample_negatives], uses_cpu=True)
+    pipeline.add("train_iso", train_iso_stage, inputs=["split"], params=sampling,
+                 code=[train_isolation_forest], uses_cpu=True)
+
+    pipeline.add("evaluate", evaluate_stage, inputs=["train_xgb", "split"],
+                 code=[evaluate_model], cache=False)
+    pipeline.add("calibration", calibration_stage, inputs=["train_iso", "split"],
+                 code=[fit_anomaly_calibration, anomaly_scores])
+    pipeline.add("val_scores", val_scores_stage, inputs=["train_iso", "split"],
+                 code=[anomaly_scores])
+    pipeline.add("xgb_probs", xgb_probs_stage, inputs=["train_xgb", "split"])
+    pipeline.add("explain", explain_stage, inputs=["train_xgb", "split"],
+                 code=[materialize_explanations, tree_contributions], uses_cpu=True,
+                 outputs=explain_outputs)
+    # Grids and costs are params, so changing them invalidates the cache
+    search = {
+        "alphas": ALPHAS.tolist(),
+        "thresholds": THRESHOLDS.tolist(),
+        "costs": cost_matrix().tolist()
+    }
+    pipeline.add("thresholds", thresholds_stage,
+                 inputs=["xgb_probs", "val_scores", "calibration", "split"], params=search,
+                 code=[optimise_thresholds, sweep_costs, cost_matrix])
+    pipeline.add("drift_reference", drift_reference_stage,
+                 inputs=["xgb_probs", "val_scores", "calibration", "split", "thresholds"],
+                 code=[build_reference, drift_values])
+    pipeline.add("publish", publish_stage,
+                 inputs=["train_xgb", "train_iso", "calibration", "split", "thresholds",
+                         "drift_reference"],
+                 outputs=publish_outputs)
+    return pipeline
 
-    # Supervised Model 
-    xgb_model = train_xgboost(X_train,y_train)
-    evaluate_model(xgb_model,X_val,y_val)
 
-    # Unsupervised Model 
-    iso_model = train_isolation_forest(X_train,y_train)
+if __name__ == "__main__":
 
-    # ------------------ Save Models -------------------------------
-    os.makedirs("models", exist_ok=True)
-    joblib.dump(xgb_model, "models/xgb.pkl")
-    joblib.dump(iso_model, "models/iso.pkl")
+    pipeline = build_pipeline()
+    outputs = pipeline.run(
+        "evaluate", "publish", "calibration", "val_scores", "xgb_probs", "explain",
+        "thresholds"
+    )
+    pipeline.print_report()
 
+    calibration = outputs["calibration"]
+    val_scores = outputs["val_scores"]
+    xgb_probs = outputs["xgb_probs"]
+    explanations = outputs["explain"]
+    thresholds = outputs["thresholds"]
 
-    val_scores = anomaly_scores(iso_model,X_val)
 
-    # Convert anomaly scores to flags (lower score = more anomalous)
-    threshold = np.percentile(val_scores,1) # top 1% most anomalous
+    # Convert anomaly scores to flags (lower score = more anomalous), at
+    # the training 1% quantile the API's online threshold starts from
+    threshold = reference_quantile(calibration, ANOMALY_QUANTILE)
     anomaly_flags = (val_scores < threshold).astype(int)
 
     print("\nAnomaly Detection Summary:")
     print("Total anomalies flagged:",anomaly_flags.sum())
 
     # ---- SHAP Explainability ----
-    X_explain = X_val.sample(300, random_state=42)
-
-    explainer, shap_values = explain_model(xgb_model, X_explain)
-
-    print("\nGlobal SHAP explanation")
-    global_explanation(shap_values)
-
-    print("\nLocal SHAP explanation")
-    local_explanation(shap_values, index=0)
+    print(f"\nSHAP values for {explanations['rows']} validation rows: {explanations['values']}")
+    print("Top features (mean |SHAP|):", ", ".join(explanations["ranking"][:10]))
+    print("Global explanation:", explanations["plots"]["beeswarm"])
+    print(f"Local explanation (row {explanations['waterfall_row']}):",
+          explanations["plots"]["waterfall"])
+
+    # ------------------ Threshold Search -------------------------------
+    default = thresholds["default"]
+    print(f"\nCost-optimal operating point ({thresholds['candidates']:,} candidates, "
+          f"{thresholds['seconds']:.2f}s):")
+    print(f"alpha={thresholds['alpha']:.2f} low={thresholds['low_threshold']:.3f} "
+          f"high={thresholds['high_threshold']:.3f} cost={thresholds['expected_cost']:,.0f} "
+          f"(default 0.7/0.3/0.8: {default['expected_cost']:,.0f})")
 
     # ------------------ Hybrid Risk Scoring -------------------------------
-    xgb_probs = xgb_model.predict_proba(X_val)[:, 1]
-
     risk_scores = hybrid_risk_score(
         xgb_probs=xgb_probs,
         anomaly_scores=val_scores,
-        alpha=0.7
+        alpha=thresholds["alpha"],
+        calibration=calibration
     )
 
     # ------------------ Top Risky Transactions -------------------------------
@@ -69,8 +208,8 @@ if __name__ == "__main__":
     # ------------------ Decision Engine -------------------------------
     decisions = decision_engine(
         risk_scores,
-        low_threshold=0.3,
-        high_threshold=0.8
+        low_threshold=thresholds["low_threshold"],
+        high_threshold=thresholds["high_threshold"]
     )
 
     print("\nDecision Summary:")
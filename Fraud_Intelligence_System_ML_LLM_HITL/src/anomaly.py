@@ -1,19 +1,26 @@
 from sklearn.ensemble import IsolationForest
 import numpy as np 
 
-def train_isolation_forest(X_train,y_train):
+def train_isolation_forest(X_train,y_train,n_jobs=-1,neg_sample_rate=None):
     """
     Train Isolation Forest on Normal transactions only. 
+
+    `neg_sample_rate` fits on that fraction of normal rows; no correction
+    is needed since a uniform sample has the same distribution.
     """
 
     # Train Only on non-fraud data 
     X_normal = X_train[y_train == 0]
 
+    if neg_sample_rate is not None:
+        keep = np.random.default_rng(42).random(len(X_normal)) < neg_sample_rate
+        X_normal = X_normal[keep]
+
     model = IsolationForest(
         n_estimators=200,
         contamination=0.002, 
         random_state=42,
-        n_jobs=-1
+        n_jobs=n_jobs
     )
 
     model.fit(X_normal)
@@ -24,4 +31,20 @@ def anomaly_scores(model,X):
     Returns anomaly scores (lower = more anomalous)
     """
     scores = model.decision_function(X)
-    return scores 
\ No newline at end of file
+    return scores 
+
+def inference_engine(model):
+    """
+    Flattened NumPy engine for a fitted Isolation Forest; falls back to
+    the sklearn model if its trees cannot be flattened.
+    """
+    try:
+        from src.anomaly_engine import FlatIsolationForest
+        engine = FlatIsolationForest.from_sklearn(model)
+    except (AttributeError, ValueError) as e:
+        print(f"Warning: using sklearn IsolationForest inference ({e})")
+        return model
+
+    # Compile / warm up before the first real request
+    engine.decision_function(np.zeros((1, model.n_features_in_)))
+    return engine
@@ -0,0 +1,226 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the NumPy traversal is used instead
+    njit = None
+
+# Rows traversed per step by the NumPy path; bounds the (trees x rows)
+# working arrays and keeps them cache-sized
+CHUNK_ROWS = 1024
+
+
+def average_path_length(n_samples):
+    """
+    Expected path length of an unsuccessful BST search over n samples
+    (same formula as sklearn's IsolationForest).
+    """
+    n_samples = np.asarray(n_samples, dtype=float)
+    out = np.zeros_like(n_samples)
+
+    out[n_samples == 2] = 1.0
+    big = n_samples > 2
+    n = n_samples[big]
+    out[big] = 2.0 * (np.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+    return out
+
+
+if njit is not None:
+
+    # Rows walked together through one tree; independent traversals let
+    # the CPU overlap their dependent loads
+    _NUMBA_BLOCK = 64
+
+    # Single-threaded but GIL-free: the API's worker threads score
+    # concurrently, and numba's parallel workqueue is not safe to launch
+    # from several threads at once
+    @njit(cache=True, nogil=True)
+    def _numba_path_lengths(X, feature, threshold, missing_left, path_length, max_depth):
+        n_rows = X.shape[0]
+        n_trees, n_internal = feature.shape
+        out = np.zeros(n_rows)
+        n_blocks = (n_rows + _NUMBA_BLOCK - 1) // _NUMBA_BLOCK
+
+        for b in range(n_blocks):
+            lo = b * _NUMBA_BLOCK
+            n = min(lo + _NUMBA_BLOCK, n_rows) - lo
+            node = np.empty(n, dtype=np.int64)
+
+            for t in range(n_trees):
+                feat = feature[t]
+                thr = threshold[t]
+                miss = missing_left[t]
+                node[:] = 0
+
+                for _ in range(max_depth):
+                    for r in range(n):
+                        nd = node[r]
+                        x = X[lo + r, feat[nd]]
+                        # Right unless x <= threshold; NaN goes left only if
+                        # the split sends missing values left
+                        node[r] = (2 * nd + 2 - np.int64(x <= thr[nd])
+                                   - np.int64(miss[nd] and x != x))
+
+                for r in range(n):
+                    out[lo + r] += path_length[t, node[r] - n_internal]
+
+        return out
+
+
+class FlatIsolationForest:
+    """
+    Inference-only IsolationForest.
+
+    Every fitted tree is padded to a complete binary tree of the forest's
+    max depth and stored level by level in contiguous arrays, so a whole
+    batch walks all trees at once with `node = 2 * node + 1 + go_right`
+    and no child-pointer lookups. Leaves above the last level are copied
+    down with an infinite threshold; the last level holds each leaf's
+    path length (depth + expected remaining depth).
+
+    The traversal is compiled with numba when it is installed and falls
+    back to vectorised NumPy otherwise. `decision_function` matches
+    sklearn's to floating-point tolerance.
+    """
+
+    ARRAYS = ("feature", "threshold", "missing_left", "path_length")
+
+    def __init__(self, feature, threshold, missing_left, path_length,
+                 max_depth, max_samples, offset, use_numba=None):
+        # (n_trees, n_internal) split arrays and (n_trees, n_leaves) path lengths
+        self.feature = feature
+        self.threshold = threshold
+        self.missing_left = missing_left
+        self.path_length = path_length
+        self.max_depth = int(max_depth)
+        self.max_samples = int(max_samples)
+        self.offset = float(offset)
+
+        self.use_numba = njit is not None if use_numba is None else use_numba
+        if self.use_numba and njit is None:
+            raise ValueError("use_numba=True but numba is not installed")
+
+        self.n_trees = feature.shape[0]
+        self._denominator = self.n_trees * float(average_path_length([max_samples])[0])
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Flattens a fitted sklearn IsolationForest.
+        """
+        n_features = model.n_features_in_
+        subsample = model._max_features != n_features
+
+        trees = [est.tree_ for est in model.estimators_]
+        max_depth = max(tree.max_depth for tree in trees)
+        n_internal = 2 ** max_depth - 1
+        n_leaves = 2 ** max_depth
+
+        feature = np.zeros((len(trees), n_internal), dtype=np.int32)
+        threshold = np.full((len(trees), n_internal), np.inf)
+        missing_left = np.zeros((len(trees), n_internal), dtype=bool)
+        path_length = np.zeros((len(trees), n_leaves))
+
+        for t, (tree, est_features) in enumerate(zip(trees, model.estimators_features_)):
+            is_leaf = tree.children_left == -1
+            feat = tree.feature.astype(np.int64)
+            if subsample:
+                feat = np.asarray(est_features)[np.where(is_leaf, 0, feat)]
+            mgl = np.asarray(
+                getattr(tree, "missing_go_to_left", np.zeros(tree.node_count)), dtype=bool
+            )
+
+            # sklearn node id and its true depth at each complete-tree position
+            src = np.array([0])
+            depth = np.array([0])
+            for level in range(max_depth):
+                pos = slice(2 ** level - 1, 2 ** (level + 1) - 1)
+                leaf = is_leaf[src]
+
+                feature[t, pos] = np.where(leaf, 0, feat[src])
+                threshold[t, pos] = np.where(leaf, np.inf, tree.threshold[src])
+                missing_left[t, pos] = mgl[src] & ~leaf
+
+                # Leaves copy themselves into both children
+                left = np.where(leaf, src, tree.children_left[src])
+                right = np.where(leaf, src, tree.children_right[src])
+                src = np.stack([left, right], axis=1).ravel()
+                depth = np.repeat(depth + ~leaf, 2)
+
+            path_length[t] = depth + average_path_length(tree.n_node_samples[src])
+
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            missing_left=missing_left,
+            path_length=path_length,
+            max_depth=max_depth,
+            max_samples=model._max_samples,
+            offset=model.offset_
+        )
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    def params(self):
+        return {
+            "max_depth": self.max_depth,
+            "max_samples": self.max_samples,
+            "offset": self.offset
+        }
+
+    def _path_lengths_numpy(self, X):
+        n_rows, n_features = X.shape
+        n_internal = self.feature.shape[1]
+
+        feature = self.feature.ravel()
+        threshold = self.threshold.ravel()
+        tree_base = (np.arange(self.n_trees) * n_internal)[:, None]
+        row_base = (np.arange(n_rows) * n_features)[None, :]
+        X_flat = X.ravel()
+        has_nan = np.isnan(X).any()
+
+        # (n_trees, n_rows) position of every row inside every tree
+        node = np.zeros((self.n_trees, n_rows), dtype=np.intp)
+
+        for _ in range(self.max_depth):
+            idx = tree_base + node
+            x = X_flat.take(row_base + feature.take(idx))
+            go_right = ~(x <= threshold.take(idx))
+
+            if has_nan:
+                go_right &= ~(np.isnan(x) & self.missing_left.ravel().take(idx))
+
+            node = 2 * node + 1 + go_right
+
+        leaf = node - n_internal + (tree_base // n_internal) * (n_internal + 1)
+        return self.path_length.ravel().take(leaf).sum(axis=0)
+
+    def score_samples(self, X):
+        """
+        Same convention as sklearn: the lower, the more abnormal.
+        """
+        # sklearn compares float32 inputs against the tree thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+
+        if self.use_numba:
+            depths = _numba_path_lengths(
+                X, self.feature, self.threshold, self.missing_left,
+                self.path_length, self.max_depth
+            )
+        else:
+            depths = np.empty(X.shape[0])
+            for start in range(0, X.shape[0], CHUNK_ROWS):
+                depths[start:start + CHUNK_ROWS] = self._path_lengths_numpy(
+                    X[start:start + CHUNK_ROWS]
+                )
+
+        if self._denominator == 0:
+            return -np.ones_like(depths)
+        return -(2.0 ** (-depths / self._denominator))
+
+    def decision_function(self, X):
+        """
+        Returns anomaly scores (lower = more anomalous)
+        """
+        return self.score_samples(X) - self.offset
@@ -0,0 +1,164 @@
+"""
+Online anomaly threshold: the q-quantile (1% by default) of
+IsolationForest scores over a sliding time window.
+
+Scores are counted into fixed bins: a uniform 0.001 grid over the
+decision_function range merged with the bundle's anomaly calibration
+table (1001 training quantiles, so dense regions get extra edges). The
+grid keeps the tails resolved when traffic moves outside the training
+range. The window is a ring of per-slice bin counts, so no raw scores
+are kept and old traffic ages out one slice at a time. The quantile is
+read off the cumulative counts, interpolating inside the bin, and
+cached for `refresh_seconds`. Until the window holds `min_rows` scores
+the training quantile is used.
+"""
+import threading
+import time
+
+import numpy as np
+
+ANOMALY_QUANTILE = 0.01
+
+WINDOW_SECONDS = 3600
+WINDOW_SLICES = 12
+MIN_ROWS = 1000
+REFRESH_SECONDS = 1.0
+
+# decision_function = score_samples - offset lies in about [-0.5, 0.5]
+GRID_EDGES = np.linspace(-0.5, 0.5, 1001)
+
+
+def reference_quantile(calibration, quantile=ANOMALY_QUANTILE):
+    """
+    The q-quantile of the training scores, from the calibration table
+    (evenly spaced quantiles).
+    """
+    calibration = np.asarray(calibration, dtype=float)
+    return float(np.interp(quantile, np.linspace(0, 1, len(calibration)), calibration))
+
+
+def histogram_quantile(counts, edges, quantile):
+    """
+    q-quantile of binned data; bin i holds values in [edges[i-1], edges[i])
+    (the two outer bins are clamped to the first / last edge).
+    """
+    cumulative = np.cumsum(counts)
+    target = quantile * cumulative[-1]
+    b = int(np.searchsorted(cumulative, target, side="left"))
+    if b == 0:
+        return float(edges[0])
+    if b >= len(edges):
+        return float(edges[-1])
+
+    lo, hi = edges[b - 1], edges[b]
+    fraction = (target - cumulative[b - 1]) / counts[b]
+    return float(lo + fraction * (hi - lo))
+
+
+class AnomalyThreshold:
+    """
+    Sliding-window quantile of anomaly scores; rows scoring below it are
+    flagged (lower score = more anomalous).
+    """
+
+    def __init__(self, edges=GRID_EDGES, quantile=ANOMALY_QUANTILE, initial=None,
+                 window_seconds=WINDOW_SECONDS, slices=WINDOW_SLICES, min_rows=MIN_ROWS,
+                 refresh_seconds=REFRESH_SECONDS, clock=time.monotonic):
+        self.edges = np.asarray(edges, dtype=float)
+        if np.any(np.diff(self.edges) <= 0):
+            raise ValueError("Bin edges must be strictly increasing")
+
+        self.quantile = quantile
+        self.initial = initial
+        self.window_seconds = window_seconds
+        self.min_rows = min_rows
+        self.refresh_seconds = refresh_seconds
+
+        self._slice_seconds = window_seconds / slices
+        self._slices = np.zeros((slices, len(self.edges) + 1), dtype=np.int64)
+        self._current = 0
+        self._clock = clock
+        self._slice_start = clock()
+        self._lock = threading.Lock()
+
+        # (threshold, source, window rows, computed at)
+        self._cached = None
+
+    @classmethod
+    def from_calibration(cls, calibration, quantile=ANOMALY_QUANTILE, **kwargs):
+        """
+        Grid plus calibration edges, starting from the calibration's
+        q-quantile. Without a calibration there is no threshold until
+        `min_rows` scores have been seen.
+        """
+        if calibration is None:
+            return cls(GRID_EDGES, quantile, **kwargs)
+        return cls(np.union1d(GRID_EDGES, calibration), quantile,
+                   initial=reference_quantile(calibration, quantile), **kwargs)
+
+    def _rotate(self):
+        elapsed = int((self._clock() - self._slice_start) // self._slice_seconds)
+        if elapsed <= 0:
+            return
+        for _ in range(min(elapsed, len(self._slices))):
+            self._current = (self._current + 1) % len(self._slices)
+            self._slices[self._current] = 0
+        self._slice_start += elapsed * self._slice_seconds
+
+    def update(self, anomaly_scores):
+        bins = np.searchsorted(self.edges, anomaly_scores, side="right")
+        with self._lock:
+            self._rotate()
+            if len(bins) == 1:
+                self._slices[self._current, bins[0]] += 1
+            else:
+                self._slices[self._current] += np.bincount(bins, minlength=self._slices.shape[1])
+
+    def _compute(self):
+        with self._lock:
+            self._rotate()
+            counts = self._slices.sum(axis=0)
+        rows = int(counts.sum())
+        if rows < self.min_rows:
+            return self.initial, "reference", rows
+        return histogram_quantile(counts, self.edges, self.quantile), "window", rows
+
+    def current(self):
+        """
+        (threshold, source, window rows); source is "window" once the
+        window has min_rows scores, else "reference" (threshold may be
+        None without a calibration).
+        """
+        now = self._clock()
+        cached = self._cached
+        if cached is None or now - cached[3] >= self.refresh_seconds:
+            cached = (*self._compute(), now)
+            self._cached = cached
+        return cached[:3]
+
+    @property
+    def threshold(self):
+        return self.current()[0]
+
+    def flags(self, anomaly_scores):
+        """
+        Boolean flags (score below the threshold); all False while there
+        is no threshold yet.
+        """
+        threshold = self.threshold
+        anomaly_scores = np.asarray(anomaly_scores)
+        if threshold is None:
+            return np.zeros(anomaly_scores.shape, dtype=bool)
+        return anomaly_scores < threshold
+
+    def stats(self):
+        threshold, source, rows = self.current()
+        return {
+            "quantile": self.quantile,
+            "threshold": threshold,
+            "source": source,
+            "reference_threshold": self.initial,
+            "window_rows": rows,
+            "window_seconds": self.window_seconds,
+            "min_rows": self.min_rows
+        }
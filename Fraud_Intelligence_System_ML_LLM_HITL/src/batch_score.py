@@ -0,0 +1,213 @@
+"""
+Streaming batch scorer for large transaction files.
+
+    python -m src.batch_score INPUT OUTPUT [--bundle PATH] [--workers N]
+
+INPUT (CSV / Parquet) is read in fixed-size chunks; each chunk goes
+through IsolationForest, XGBoost, hybrid_risk_score and decision_engine
+(score_batch) in a pool of worker processes that memory-map the same
+model bundle. At most `max_in_flight` chunks are queued or being scored,
+and results are written in input order as they complete, so memory is
+bounded by chunk size, not file size.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.bundle import load_bundle, read_manifest
+from src.data_loader import iter_chunks, CHUNK_ROWS
+from src.registry import ModelRegistry, REGISTRY_DIR
+from src.scoring import score_batch, FEATURE_NAMES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: CSV output only
+    pa = None
+
+PROGRESS_INTERVAL = 5.0  # seconds between progress lines
+
+OUTPUT_COLUMNS = ["row", "fraud_probability", "anomaly_score", "risk_score", "decision"]
+
+
+def resolve_bundle(bundle=None, registry_root=REGISTRY_DIR):
+    """
+    Explicit bundle path, else the registry's active version.
+    """
+    if bundle is not None:
+        return bundle
+    registry = ModelRegistry(registry_root)
+    active = registry.active_version()
+    if active is None:
+        raise ValueError(f"No active model in {registry_root}; pass --bundle")
+    return registry.path(active)
+
+
+# ------------------ Workers -------------------------------
+
+_bundle = None
+
+
+def _init_worker(bundle_path):
+    # Arrays are memory-mapped, so workers share the bundle's pages;
+    # one XGBoost thread per worker, parallelism comes from the pool
+    global _bundle
+    _bundle = load_bundle(bundle_path)
+    _bundle.xgb_model.set_params(n_jobs=1)
+
+
+def _score_chunk(start, X):
+    scores = score_batch(_bundle.xgb_model, _bundle.iso_model, X, _bundle.calibration,
+                         **_bundle.decision_params)
+    return pd.DataFrame({
+        "row": np.arange(start, start + len(X), dtype=np.int64),
+        "fraud_probability": scores["fraud_probability"].astype(np.float32),
+        "anomaly_score": scores["anomaly_score"].astype(np.float32),
+        "risk_score": scores["risk_score"].astype(np.float32),
+        "decision": scores["decision"].astype(np.int8)
+    })
+
+
+# ------------------ Output -------------------------------
+
+class ResultWriter:
+    """
+    Appends result chunks to CSV or Parquet (by extension) under a
+    temporary name; `close` renames it into place.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.parquet = path.endswith((".parquet", ".pq"))
+        if self.parquet and pa is None:
+            raise ImportError("Writing Parquet requires pyarrow")
+        self._writer = None
+        self._header = True
+
+    def write(self, df):
+        if self.parquet:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.tmp, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.tmp, mode="w" if self._header else "a",
+                      header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._header:  # empty input: still produce a valid file
+            self.write(pd.DataFrame({c: [] for c in OUTPUT_COLUMNS}))
+            if self._writer is not None:
+                self._writer.close()
+        os.replace(self.tmp, self.path)
+
+
+# ------------------ Driver -------------------------------
+
+def score_file(
+        input_path,
+        output_path,
+        bundle_path,
+        workers=None,
+        chunksize=CHUNK_ROWS,
+        max_in_flight=None,
+        progress=True
+):
+    """
+    Scores every row of `input_path` into `output_path`; returns
+    {"rows", "seconds", "rows_per_sec"}.
+    """
+    if read_manifest(bundle_path).get("calibration") is None:
+        print("Warning: bundle has no anomaly calibration; risk scores are "
+              "min-max normalised per chunk")
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    writer = ResultWriter(output_path)
+
+    started = last_report = time.perf_counter()
+    rows = 0
+
+    def report(force=False):
+        nonlocal last_report
+        now = time.perf_counter()
+        if progress and (force or now - last_report >= PROGRESS_INTERVAL):
+            elapsed = now - started
+            print(f"{rows:>14,} rows  {elapsed:8.1f}s  {rows / max(elapsed, 1e-9):>12,.0f} rows/sec",
+                  flush=True)
+            last_report = now
+
+    def emit(result):
+        nonlocal rows
+        writer.write(result)
+        rows += len(result)
+        report()
+
+    chunks = iter_chunks(input_path, chunksize)
+    start = 0
+
+    if workers == 1:
+        _init_worker(bundle_path)
+        for chunk in chunks:
+            emit(_score_chunk(start, chunk[FEATURE_NAMES].to_numpy()))
+            start += len(chunk)
+    else:
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(bundle_path,)
+        ) as pool:
+            in_flight = deque()
+            for chunk in chunks:
+                # Bounded: wait for the oldest chunk before reading more
+                if len(in_flight) >= max_in_flight:
+                    emit(in_flight.popleft().result())
+                in_flight.append(pool.submit(_score_chunk, start, chunk[FEATURE_NAMES].to_numpy()))
+                start += len(chunk)
+            while in_flight:
+                emit(in_flight.popleft().result())
+
+    writer.close()
+    report(force=True)
+
+    seconds = time.perf_counter() - started
+    return {"rows": rows, "seconds": seconds, "rows_per_sec": rows / max(seconds, 1e-9)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a transaction file in chunks")
+    parser.add_argument("input", help="CSV or Parquet with Time, V1..V28, Amount")
+    parser.add_argument("output", help="results .csv or .parquet")
+    parser.add_argument("--bundle", help="model bundle (default: registry active version)")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--max-in-flight", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        bundle_path = resolve_bundle(args.bundle, args.registry)
+    except (KeyError, ValueError) as e:
+        print(e)
+        sys.exit(1)
+
+    summary = score_file(
+        args.input, args.output, bundle_path,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        max_in_flight=args.max_in_flight
+    )
+    print(f"Scored {summary['rows']:,} rows in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_sec']:,.0f} rows/sec) -> {args.output}")
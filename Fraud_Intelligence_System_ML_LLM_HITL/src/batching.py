@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from src.metrics import Histogram
+
+# Histogram buckets (upper bounds) for the coalescer metrics
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+QUEUE_DELAY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+# Longest a caller of score() waits for its row (seconds)
+SCORE_TIMEOUT = 5.0
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    In-process request coalescer.
+
+    Single rows submitted from concurrent requests are collected until
+    either `max_batch` rows are waiting or the oldest one has waited
+    `max_wait_ms`; the batch is scored as one matrix and every caller
+    gets its own row back through a Future.
+
+    `score_fn` takes an (N, 30) matrix and returns a list of N results.
+    """
+
+    def __init__(self, score_fn, max_batch=64, max_wait_ms=2.0):
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self._queue_delay_ms = Histogram(QUEUE_DELAY_BUCKETS_MS)
+
+        self._worker = threading.Thread(
+            target=self._run, name="micro-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, row):
+        """
+        Queues one feature row; returns a Future resolving to its result.
+        Raises RuntimeError once the batcher is closed.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((row, future, time.perf_counter()))
+        return future
+
+    def score(self, row, timeout=SCORE_TIMEOUT):
+        """
+        Blocking helper: submit a row and wait for its result (raises
+        concurrent.futures.TimeoutError after `timeout` seconds).
+        """
+        return self.submit(row).result(timeout=timeout)
+
+    def close(self, timeout=5.0):
+        """
+        Stops the worker after it has scored everything already queued.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._worker.join(timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "queue_depth": self._queue.qsize(),
+                "batch_size": self._batch_sizes.snapshot(),
+                "queue_delay_ms": self._queue_delay_ms.snapshot()
+            }
+
+    # ------------------------------------------------------------------
+
+    def _collect(self, first):
+        """
+        Gathers rows arriving within the window opened by `first`.
+        """
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        stop = False
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                break
+
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+
+        return batch, stop
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+
+            batch, stop = self._collect(first)
+            started = time.perf_counter()
+
+            with self._lock:
+                self._batch_sizes.observe(len(batch))
+                for _, _, enqueued in batch:
+                    self._queue_delay_ms.observe((started - enqueued) * 1000.0)
+
+            self._score(batch)
+
+        # Anything still queued after a stop gets scored one last time
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftovers.append(item)
+
+        if leftovers:
+            self._score(leftovers)
+
+    def _score(self, batch):
+        """
+        Scores a batch and resolves its futures; a failure is handed to
+        every waiting caller.
+        """
+        futures = [f for _, f, _ in batch]
+        try:
+            X = np.vstack([row for row, _, _ in batch])
+            results = self.score_fn(X)
+        except Exception as e:
+            for f in futures:
+                f.set_exception(e)
+            return
+
+        for f, result in zip(futures, results):
+            f.set_result(result)
@@ -0,0 +1,232 @@
+"""
+Versioned model bundle.
+
+    <bundle>/
+        manifest.json       version, feature schema, data hash, calibration,
+                            decision thresholds
+        xgb.ubj             XGBoost model in its native UBJSON format
+        iso/<name>.npy      flattened IsolationForest arrays (memory-mappable)
+
+Loading maps the .npy files read-only, so every API worker on the host
+shares the same page-cache pages instead of unpickling its own copy.
+"""
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from src.anomaly_engine import FlatIsolationForest
+from src.decision import ThresholdTable
+from src.scoring import FEATURE_NAMES
+
+BUNDLE_FORMAT = 1
+MANIFEST = "manifest.json"
+XGB_FILE = "xgb.ubj"
+ISO_DIR = "iso"
+
+
+def data_hash(X):
+    """
+    Stable content hash of the training features (values + column order).
+    """
+    digest = hashlib.sha256()
+    digest.update(",".join(map(str, X.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelBundle:
+    """
+    Loaded bundle: the two models, calibration and the manifest.
+    """
+
+    def __init__(self, path, manifest, xgb_model, iso_model, calibration):
+        self.path = path
+        self.manifest = manifest
+        self.xgb_model = xgb_model
+        self.iso_model = iso_model
+        self.calibration = calibration
+
+        # Parsed once so a bad table fails the load, not every request
+        table = (manifest.get("decision") or {}).get("threshold_table")
+        self.threshold_table = ThresholdTable.from_dict(table) if table else None
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    @property
+    def feature_names(self):
+        return self.manifest["feature_names"]
+
+    @property
+    def decision_params(self):
+        """
+        alpha / low_threshold / high_threshold tuned by src.thresholds and
+        the per-segment threshold_table, as score_batch keyword arguments
+        ({} keeps its defaults).
+        """
+        decision = self.manifest.get("decision") or {}
+        params = {
+            key: decision[key]
+            for key in ("alpha", "low_threshold", "high_threshold") if key in decision
+        }
+        if self.threshold_table is not None:
+            params["threshold_table"] = self.threshold_table
+        return params
+
+
+def save_bundle(
+        path,
+        xgb_model,
+        iso_model,
+        feature_names,
+        training_data_hash=None,
+        calibration=None,
+        version=None,
+        extra=None
+):
+    """
+    Writes a model bundle directory and returns its manifest.
+    """
+    if list(feature_names) != FEATURE_NAMES:
+        raise ValueError(
+            f"Feature order {list(feature_names)} does not match the API schema"
+        )
+
+    os.makedirs(os.path.join(path, ISO_DIR), exist_ok=True)
+
+    xgb_model.save_model(os.path.join(path, XGB_FILE))
+
+    if not isinstance(iso_model, FlatIsolationForest):
+        iso_model = FlatIsolationForest.from_sklearn(iso_model)
+
+    files = {XGB_FILE: None}
+    for name, array in iso_model.arrays().items():
+        rel = os.path.join(ISO_DIR, f"{name}.npy")
+        np.save(os.path.join(path, rel), np.ascontiguousarray(array))
+        files[rel] = None
+
+    for rel in files:
+        files[rel] = _file_sha256(os.path.join(path, rel))
+
+    created_at = datetime.utcnow()
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": version or _default_version(created_at, files),
+        "created_at": created_at.isoformat(),
+        "feature_names": list(feature_names),
+        "training_data_hash": training_data_hash,
+        "calibration": None if calibration is None else np.asarray(calibration).tolist(),
+        "iso_params": iso_model.params(),
+        "files": files
+    }
+    if extra:
+        manifest.update(extra)
+
+    # Manifest last: a bundle without one is incomplete
+    _write_manifest(path, manifest)
+    return manifest
+
+
+def _default_version(created_at, files):
+    # Sortable timestamp plus a short hash of the model files and the
+    # exact creation time, so two publishes in one second never collide
+    digest = hashlib.sha256(created_at.isoformat().encode())
+    for rel in sorted(files):
+        digest.update(files[rel].encode())
+    return f"{created_at:%Y%m%d%H%M%S}-{digest.hexdigest()[:8]}"
+
+
+def _write_manifest(path, manifest):
+    tmp = os.path.join(path, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(path, MANIFEST))
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST)) as f:
+        return json.load(f)
+
+
+def update_manifest(path, updates):
+    """
+    Merges `updates` into a bundle's manifest (model files are untouched).
+    """
+    manifest = read_manifest(path)
+    manifest.update(updates)
+    _write_manifest(path, manifest)
+    return manifest
+
+
+def load_bundle(path, mmap=True, verify=False):
+    """
+    Loads a bundle; IsolationForest arrays are memory-mapped read-only.
+
+    `verify=True` re-hashes every file against the manifest (reads all
+    pages, so it is off for normal startup).
+    """
+    manifest = read_manifest(path)
+
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format: {manifest.get('format')}")
+    if manifest["feature_names"] != FEATURE_NAMES:
+        raise ValueError("Bundle feature schema does not match the API schema")
+
+    if verify:
+        for rel, expected in manifest["files"].items():
+            if _file_sha256(os.path.join(path, rel)) != expected:
+                raise ValueError(f"Checksum mismatch for {rel}")
+
+    xgb_model = xgb.XGBClassifier()
+    xgb_model.load_model(os.path.join(path, XGB_FILE))
+
+    booster_features = xgb_model.get_booster().feature_names
+    if booster_features is not None and booster_features != manifest["feature_names"]:
+        raise ValueError("XGBoost feature names do not match the bundle manifest")
+
+    mmap_mode = "r" if mmap else None
+    arrays = {
+        name: np.load(os.path.join(path, ISO_DIR, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in FlatIsolationForest.ARRAYS
+    }
+    iso_model = FlatIsolationForest(**arrays, **manifest["iso_params"])
+
+    calibration = manifest.get("calibration")
+    if calibration is not None:
+        calibration = np.asarray(calibration, dtype=float)
+
+    return ModelBundle(path, manifest, xgb_model, iso_model, calibration)
+
+
+if __name__ == "__main__":
+    # Convert legacy pickles: python -m src.bundle xgb.pkl iso.pkl out_dir [calibration.npy]
+    import joblib
+
+    if len(sys.argv) not in (4, 5):
+        print("usage: python -m src.bundle XGB_PKL ISO_PKL OUT_DIR [CALIBRATION_NPY]")
+        sys.exit(1)
+
+    calibration = np.load(sys.argv[4]) if len(sys.argv) == 5 else None
+    manifest = save_bundle(
+        sys.argv[3],
+        joblib.load(sys.argv[1]),
+        joblib.load(sys.argv[2]),
+        feature_names=FEATURE_NAMES,
+        calibration=calibration
+    )
+    print(f"Wrote bundle {manifest['version']} to {sys.argv[3]}")
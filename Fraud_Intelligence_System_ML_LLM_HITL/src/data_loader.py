@@ -1,5 +1,29 @@
+import hashlib
+import json
+import os
+
+import numpy as np
 import pandas as pd 
 
+from src.scoring import FEATURE_NAMES
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # optional: pandas chunked parsing, no columnar cache
+    pa = None
+
+# Everything is read as float32 (Class too: it may be missing before cleaning)
+COLUMN_DTYPES = {col: np.float32 for col in FEATURE_NAMES + ["Class"]}
+
+CACHE_DIR = "data/.cache"
+CHUNK_ROWS = 250_000
+ARROW_BLOCK_BYTES = 64 << 20
+
+# Bump when the cached layout / dtypes change
+CACHE_FORMAT = 1
+
 def load_data(path: str) -> pd.DataFrame: 
     """
     Loads raw transaction data and performs basic validation.
@@ -13,4 +37,142 @@ def load_data(path: str) -> pd.DataFrame:
     if df.isnull().sum().sum():
         print("Warning: Missing values detected")
 
-    return df 
\ No newline at end of file
+    return df
+
+
+def file_hash(path: str) -> str:
+    """
+    Content hash of a file, read in 8 MB blocks.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(8 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _downcast(df: pd.DataFrame) -> pd.DataFrame:
+    cols = {c: t for c, t in COLUMN_DTYPES.items() if c in df.columns and df[c].dtype != t}
+    return df.astype(cols) if cols else df
+
+
+def _read_csv_chunks(path: str, chunksize: int):
+    """
+    Streams the CSV as float32 chunks, counting missing values per chunk
+    so no second pass over the full frame is needed.
+    """
+    chunks = []
+    missing = 0
+
+    for chunk in pd.read_csv(path, dtype=COLUMN_DTYPES, chunksize=chunksize):
+        missing += int(chunk.isnull().values.sum())
+        chunks.append(chunk)
+
+    if not chunks:
+        return pd.DataFrame(columns=list(COLUMN_DTYPES)), 0
+
+    df = pd.concat(chunks, ignore_index=True)
+    return df, missing
+
+
+def _read_csv_arrow(path: str):
+    """
+    Streams the CSV through Arrow's multi-threaded reader in record
+    batches typed as float32, counting nulls per batch.
+    """
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=ARROW_BLOCK_BYTES),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={c: pa.float32() for c in COLUMN_DTYPES}
+        )
+    )
+
+    batches = []
+    missing = 0
+    for batch in reader:
+        missing += sum(col.null_count for col in batch.columns)
+        batches.append(batch)
+
+    return pa.Table.from_batches(batches, schema=reader.schema), missing
+
+
+def iter_chunks(path: str, chunksize: int = CHUNK_ROWS):
+    """
+    Yields float32 DataFrame chunks of a CSV or Parquet file without ever
+    holding the whole file in memory.
+    """
+    if path.endswith((".parquet", ".pq")):
+        if pa is None:
+            raise ImportError("Reading Parquet in chunks requires pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield _downcast(batch.to_pandas())
+    else:
+        yield from pd.read_csv(path, dtype=COLUMN_DTYPES, chunksize=chunksize)
+
+
+def _read_columnar(path: str) -> pd.DataFrame:
+    if path.endswith((".feather", ".arrow")):
+        return pd.read_feather(path)
+    return pd.read_parquet(path)
+
+
+def load_data_columnar(
+        path: str,
+        chunksize: int = CHUNK_ROWS,
+        cache_dir: str = CACHE_DIR,
+        use_cache: bool = True,
+        content_hash: str = None
+) -> pd.DataFrame:
+    """
+    Memory-lean loader for large transaction exports.
+
+    - CSV is parsed in chunks straight to float32 (Arrow record batches
+      when pyarrow is installed, pandas chunks otherwise); Parquet /
+      Feather (Arrow) inputs are read natively and downcast.
+    - Missing values are counted in the same pass and kept in
+      df.attrs["missing_values"] so later cleaning can skip its own scan.
+    - With pyarrow, a Parquet copy of a parsed CSV is cached under
+      `cache_dir`, keyed by the file's content hash, so reruns skip CSV
+      parsing entirely. Pass `content_hash` (file_hash(path)) when the
+      caller has already computed it, to avoid reading the file twice.
+    """
+    if path.endswith((".parquet", ".pq", ".feather", ".arrow")):
+        df = _downcast(_read_columnar(path))
+        missing = int(df.isnull().values.sum())
+    else:
+        use_cache = use_cache and pa is not None
+        if use_cache:
+            key = f"{content_hash or file_hash(path)}-v{CACHE_FORMAT}"
+            cached = os.path.join(cache_dir, f"{key}.parquet")
+            meta_path = os.path.join(cache_dir, f"{key}.json")
+
+        if use_cache and os.path.exists(cached) and os.path.exists(meta_path):
+            df = pd.read_parquet(cached)
+            with open(meta_path) as f:
+                missing = json.load(f)["missing_values"]
+            print(f"Loaded cached columnar copy {cached}")
+        elif pa is not None:
+            table, missing = _read_csv_arrow(path)
+
+            if use_cache:
+                os.makedirs(cache_dir, exist_ok=True)
+                pq.write_table(table, cached)
+                with open(meta_path, "w") as f:
+                    json.dump({"source": path, "rows": table.num_rows,
+                               "missing_values": missing}, f)
+
+            df = table.to_pandas()
+            del table
+        else:
+            df, missing = _read_csv_chunks(path, chunksize)
+
+    # Basic sanity checks
+    if df.empty:
+        raise ValueError("Dataset is empty")
+
+    if missing:
+        print("Warning: Missing values detected")
+
+    df.attrs["missing_values"] = missing
+    return df
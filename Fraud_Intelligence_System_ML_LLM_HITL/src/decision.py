@@ -1,27 +1,91 @@
-import numpy as np 
+import numpy as np
+
+APPROVE = 0
+REVIEW = 1
+BLOCK = 2
+
+
+class ThresholdTable:
+    """
+    Per-segment decision thresholds.
+
+    Segments are bands of one feature (Amount by default): `edges` are the
+    sorted band boundaries, so k edges give k + 1 segments and a value v
+    falls in segment i when edges[i-1] <= v < edges[i]. `low` and `high`
+    hold one REVIEW / BLOCK threshold per segment.
+    """
+
+    def __init__(self, edges, low, high, feature="Amount"):
+        self.edges = np.asarray(edges, dtype=float)
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.feature = feature
+
+        n_segments = len(self.edges) + 1
+        if len(self.low) != n_segments or len(self.high) != n_segments:
+            raise ValueError(
+                f"{len(self.edges)} edges need {n_segments} low/high thresholds"
+            )
+        if np.any(np.diff(self.edges) <= 0):
+            raise ValueError("Segment edges must be strictly increasing")
+        if np.any(self.low > self.high):
+            raise ValueError("Each low threshold must be <= its high threshold")
+
+    @classmethod
+    def from_dict(cls, config):
+        return cls(
+            edges=config["edges"],
+            low=config["low"],
+            high=config["high"],
+            feature=config.get("feature", "Amount")
+        )
+
+    def to_dict(self):
+        return {
+            "feature": self.feature,
+            "edges": self.edges.tolist(),
+            "low": self.low.tolist(),
+            "high": self.high.tolist()
+        }
+
+    def segments(self, segment_values):
+        return np.searchsorted(self.edges, segment_values, side="right")
+
+    def thresholds_for(self, segment_values):
+        """
+        Returns per-row (low, high) threshold arrays.
+        """
+        seg = self.segments(np.asarray(segment_values, dtype=float))
+        return self.low[seg], self.high[seg]
+
 
 def decision_engine(
         risk_scores,
         low_threshold=0.3,
-        high_threshold=0.8
+        high_threshold=0.8,
+        threshold_table=None,
+        segment_values=None
 ):
     """
-    Converts risk scores into actions. 
+    Converts risk scores into actions.
+
+    Thresholds are either the two scalars or, with `threshold_table`,
+    looked up per row from `segment_values` (e.g. the Amount column).
 
     Returns:
     0 -> APPROVE
-    1 -> REVIEW 
+    1 -> REVIEW
     2 -> BLOCK
     """
+    risk_scores = np.asarray(risk_scores)
+
+    if threshold_table is not None:
+        if segment_values is None:
+            raise ValueError("threshold_table needs segment_values")
+        low_threshold, high_threshold = threshold_table.thresholds_for(segment_values)
+
+    # Same precedence as the rule list: BLOCK, then REVIEW, else APPROVE
+    decisions = (risk_scores >= low_threshold).astype(np.int64)
+    decisions[risk_scores >= high_threshold] = BLOCK
 
-    decisions = []
-
-    for score in risk_scores: 
-        if score >= high_threshold:
-            decisions.append(2) # BLOCK
-        elif score >= low_threshold:
-            decisions.append(1) # REVIEW 
-        else:
-            decisions.append(0) # APPROVE 
-        
-    return np.array(decisions)
\ No newline at end of file
+    return decisions
@@ -1,6 +1,27 @@
+import os
+
+import numpy as np
+import pandas as pd
 import shap
 import matplotlib.pyplot as plt
 
+from src.scoring import FEATURE_NAMES
+from src.tree_shap import iter_contributions, CHUNK_ROWS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: SHAP values are written as CSV without it
+    pa = None
+
+EXPLANATIONS_DIR = "reports/explanations"
+VALUES_FILE = "shap_values.parquet"
+CSV_VALUES_FILE = "shap_values.csv"
+IMPORTANCE_FILE = "feature_importance.csv"
+
+# Rows drawn into the beeswarm plot (all rows go to the values file)
+PLOT_ROWS = 5000
+
 def explain_model(model, X_background):
     """
     SHAP explainer for XGBoost using probability output.
@@ -15,18 +36,161 @@ def explain_model(model, X_background):
     return explainer, shap_values
 
 
-def global_explanation(shap_values):
+def _show_or_save(path):
+    # Saving keeps headless runs (pipeline, CI) from blocking on a window
+    if path is None:
+        plt.show()
+    else:
+        plt.savefig(path, dpi=150, bbox_inches="tight")
+        plt.close()
+
+
+def global_explanation(shap_values, path=None):
     """
     Global feature importance
     """
     shap.plots.beeswarm(shap_values[..., 1], show=False)
     plt.tight_layout()
-    plt.show()
+    _show_or_save(path)
 
 
-def local_explanation(shap_values, index=0):
+def local_explanation(shap_values, index=0, path=None):
     """
     Local explanation for a single sample
     """
     shap.plots.waterfall(shap_values[index, ..., 1], show=False)
-    plt.show()
+    _show_or_save(path)
+
+
+def materialize_explanations(
+        xgb_model,
+        X,
+        out_dir=EXPLANATIONS_DIR,
+        n_jobs=-1,
+        chunk_rows=CHUNK_ROWS,
+        plot_rows=PLOT_ROWS
+):
+    """
+    Offline TreeSHAP for every row of X (e.g. the validation set).
+
+    Chunks are explained in parallel worker processes and streamed to
+    <out_dir>/shap_values.parquet (shap_values.csv without pyarrow): the
+    row's index in X, its base value and one SHAP column per feature
+    (log-odds units). Also writes the
+    global mean-|SHAP| ranking (feature_importance.csv) and beeswarm /
+    waterfall plots (most suspicious row) as PNG files.
+    Returns a summary dict with the ranking and output paths.
+    """
+    if not isinstance(X, pd.DataFrame):
+        X = pd.DataFrame(X, columns=FEATURE_NAMES)
+    os.makedirs(out_dir, exist_ok=True)
+
+    values_path = os.path.join(out_dir, VALUES_FILE if pa is not None else CSV_VALUES_FILE)
+    tmp_path = values_path + ".tmp"
+
+    rng = np.random.default_rng(42)
+    plot_idx = np.sort(rng.choice(len(X), size=min(plot_rows, len(X)), replace=False))
+
+    abs_sum = np.zeros(len(FEATURE_NAMES))
+    plot_values, plot_base = [], []
+    top = (-np.inf, None, None, None)  # margin, row, contributions, base
+
+    writer = None
+    try:
+        for start, contributions, base_values in iter_contributions(
+                xgb_model, X.to_numpy(), n_jobs, chunk_rows
+        ):
+            stop = start + len(contributions)
+            columns = {
+                "index": X.index[start:stop].to_numpy(),
+                "base_value": base_values.astype(np.float32),
+                **{name: contributions[:, j].astype(np.float32)
+                   for j, name in enumerate(FEATURE_NAMES)}
+            }
+            if pa is not None:
+                table = pa.table(columns)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+            else:
+                pd.DataFrame(columns).to_csv(tmp_path, mode="w" if start == 0 else "a",
+                                             header=start == 0, index=False)
+
+            abs_sum += np.abs(contributions).sum(axis=0)
+
+            in_chunk = plot_idx[(plot_idx >= start) & (plot_idx < stop)] - start
+            plot_values.append(contributions[in_chunk])
+            plot_base.append(base_values[in_chunk])
+
+            margins = base_values + contributions.sum(axis=1)
+            best = int(np.argmax(margins))
+            if margins[best] > top[0]:
+                top = (margins[best], start + best, contributions[best], base_values[best])
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, values_path)
+
+    # Values from an earlier run in the other format would be stale
+    for name in (VALUES_FILE, CSV_VALUES_FILE):
+        stale = os.path.join(out_dir, name)
+        if stale != values_path and os.path.exists(stale):
+            os.remove(stale)
+
+    importance = pd.DataFrame({
+        "feature": FEATURE_NAMES,
+        "mean_abs_shap": abs_sum / max(len(X), 1)
+    }).sort_values("mean_abs_shap", ascending=False, ignore_index=True)
+    importance["rank"] = np.arange(1, len(importance) + 1)
+    importance_path = os.path.join(out_dir, IMPORTANCE_FILE)
+    importance.to_csv(importance_path, index=False)
+
+    beeswarm_path = os.path.join(out_dir, "beeswarm.png")
+    shap.plots.beeswarm(shap.Explanation(
+        values=np.concatenate(plot_values),
+        base_values=np.concatenate(plot_base),
+        data=X.to_numpy()[plot_idx],
+        feature_names=FEATURE_NAMES
+    ), show=False)
+    plt.tight_layout()
+    _show_or_save(beeswarm_path)
+
+    _, top_row, top_values, top_base = top
+    waterfall_path = os.path.join(out_dir, "waterfall.png")
+    shap.plots.waterfall(shap.Explanation(
+        values=top_values,
+        base_values=top_base,
+        data=X.to_numpy()[top_row],
+        feature_names=FEATURE_NAMES
+    ), show=False)
+    _show_or_save(waterfall_path)
+
+    return {
+        "rows": len(X),
+        "values": values_path,
+        "importance": importance_path,
+        "ranking": importance["feature"].tolist(),
+        "plots": {"beeswarm": beeswarm_path, "waterfall": waterfall_path},
+        "waterfall_row": X.index[top_row]
+    }
+
+
+def load_explanations(out_dir=EXPLANATIONS_DIR, rows=None):
+    """
+    Materialised SHAP values (optionally only the given X indices)
+    without recomputing them; reads the Parquet or the CSV file.
+    """
+    parquet_path = os.path.join(out_dir, VALUES_FILE)
+    if os.path.exists(parquet_path):
+        filters = None if rows is None else [("index", "in", list(rows))]
+        return pd.read_parquet(parquet_path, filters=filters)
+
+    csv_path = os.path.join(out_dir, CSV_VALUES_FILE)
+    if rows is None:
+        return pd.read_csv(csv_path)
+    rows = list(rows)
+    return pd.concat(
+        [chunk[chunk["index"].isin(rows)]
+         for chunk in pd.read_csv(csv_path, chunksize=CHUNK_ROWS)],
+        ignore_index=True
+    )
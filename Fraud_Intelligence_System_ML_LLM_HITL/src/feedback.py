@@ -1,6 +1,15 @@
+import json
+import queue
 import sqlite3
+import threading
+import time
 from datetime import datetime
 
+import numpy as np
+
+from src.metrics import Histogram
+from src.scoring import N_FEATURES
+
 DB_PATH = "feedback/feedback.db"
 
 def init_db():
@@ -14,39 +23,213 @@ def init_db():
           model_risk_score REAL, 
           model_decision INTEGER, 
           human_label INTEGER, 
-          timestamp TEXT         
+          timestamp TEXT,
+          features TEXT
                    )
 """)
+
+    # Databases created before transaction features were stored
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(feedback)")]
+    if "features" not in columns:
+        cursor.execute("ALTER TABLE feedback ADD COLUMN features TEXT")
+
+    # Time-range scans for monitoring windows
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_feedback_timestamp ON feedback(timestamp)"
+    )
     
     conn.commit()
     conn.close()
 
+_INSERT_SQL = """
+    INSERT INTO feedback (
+                   transaction_index,
+                   model_risk_score,
+                   model_decision,
+                   human_label,
+                   timestamp,
+                   features
+    ) VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def _encode_features(features):
+    # Transaction features (JSON list) make the label usable for retraining;
+    # anything but one row of finite values would break retraining later
+    if features is None:
+        return None
+    values = np.asarray(features, dtype=float)
+    if values.shape != (N_FEATURES,) or not np.all(np.isfinite(values)):
+        raise ValueError(f"features must be one row of {N_FEATURES} finite numbers")
+    return json.dumps(values.tolist())
+
+
 def store_feedback(
         transaction_index, 
         model_risk_score, 
         model_decision, 
-        human_label
+        human_label,
+        features=None
 ):
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
-    cursor.execute("""
-    INSERT INTO feedback (
-                   transaction_index,
-                   model_risk_score,
-                   model_decision,
-                   human_label,
-                   timestamp
-    ) VALUES (?, ?, ?, ?, ?)
-    """, (
+    cursor.execute(_INSERT_SQL, (
         transaction_index,
         model_risk_score,
         model_decision,
         human_label,
-        datetime.utcnow().isoformat()
-
+        datetime.utcnow().isoformat(),
+        _encode_features(features)
     ))
 
     conn.commit()
     conn.close()
-    
\ No newline at end of file
+    
+# Histogram buckets (upper bounds) for flush latency
+FLUSH_LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+class FeedbackWriter:
+    """
+    Write-behind feedback store.
+
+    `submit` only enqueues the row (bounded queue); a background thread
+    owns one persistent WAL-mode connection and flushes whatever is
+    queued in a single transaction. `close` drains the queue first;
+    after it, `submit` raises RuntimeError.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_queue=10_000, max_batch=500,
+                 flush_interval=0.05):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._flush_latency_ms = Histogram(FLUSH_LATENCY_BUCKETS_MS)
+        self._rows_written = 0
+        self._flush_errors = 0
+        self._closed = False
+
+        self._worker = threading.Thread(
+            target=self._run, name="feedback-writer", daemon=True
+        )
+        self._worker.start()
+
+    def submit(
+            self,
+            transaction_index,
+            model_risk_score,
+            model_decision,
+            human_label,
+            features=None,
+            timeout=1.0
+    ):
+        """
+        Queues one feedback row. Raises queue.Full if the writer has
+        fallen behind for longer than `timeout` seconds (backpressure),
+        RuntimeError once the writer is closed.
+        """
+        if self._closed:
+            raise RuntimeError("FeedbackWriter is closed")
+        self._queue.put((
+            transaction_index,
+            model_risk_score,
+            model_decision,
+            human_label,
+            datetime.utcnow().isoformat(),
+            _encode_features(features)
+        ), timeout=timeout)
+
+    def close(self, timeout=10.0):
+        """
+        Flushes everything still queued, then stops the writer. Returns
+        the number of rows left unwritten (queued when the join timed
+        out, or submitted while the writer was stopping).
+        """
+        self._closed = True
+        self._stop.set()
+        self._worker.join(timeout=timeout)
+
+        pending = self._queue.qsize()
+        if self._worker.is_alive():
+            print(f"Warning: feedback writer still flushing after {timeout}s, "
+                  f"{pending} rows queued")
+        elif pending:
+            print(f"Warning: {pending} feedback rows not written at shutdown")
+        return pending
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "rows_written": self._rows_written,
+                "flush_errors": self._flush_errors,
+                "flush_latency_ms": self._flush_latency_ms.snapshot()
+            }
+
+    # ------------------------------------------------------------------
+
+    def _drain(self):
+        rows = []
+        while len(rows) < self.max_batch:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _flush(self, conn, rows):
+        started = time.perf_counter()
+        try:
+            with conn:  # one transaction per batch
+                conn.executemany(_INSERT_SQL, rows)
+        except sqlite3.Error as e:
+            print(f"Warning: feedback flush of {len(rows)} rows failed ({e})")
+            with self._lock:
+                self._flush_errors += 1
+            return False
+
+        with self._lock:
+            self._rows_written += len(rows)
+            self._flush_latency_ms.observe((time.perf_counter() - started) * 1000.0)
+        return True
+
+    def _requeue(self, rows):
+        for i, row in enumerate(rows):
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                print(f"Warning: dropped {len(rows) - i} feedback rows (queue full)")
+                return
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        try:
+            while not self._stop.is_set():
+                try:
+                    first = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                rows = [first] + self._drain()
+                if not self._flush(conn, rows):
+                    self._requeue(rows)
+                    time.sleep(self.flush_interval)
+
+            # Shutdown: drain whatever is left
+            while True:
+                rows = self._drain()
+                if not rows:
+                    break
+                if not self._flush(conn, rows):
+                    lost = len(rows) + self._queue.qsize()
+                    print(f"Warning: {lost} feedback rows not written at shutdown")
+                    break
+        finally:
+            conn.close()
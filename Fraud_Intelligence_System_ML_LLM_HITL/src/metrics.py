@@ -0,0 +1,159 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram (Prometheus style) with running sum/count.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = int(np.searchsorted(self.buckets, value, side="left"))
+        self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+    def observe_many(self, values):
+        values = np.asarray(values, dtype=float)
+        bins = np.searchsorted(self.buckets, values, side="left")
+        for i, n in enumerate(np.bincount(bins, minlength=len(self.counts))):
+            self.counts[i] += int(n)
+        self.total += float(values.sum())
+        self.count += len(values)
+
+    def snapshot(self):
+        cumulative = np.cumsum(self.counts).tolist()
+        labels = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, cumulative)),
+            "sum": self.total,
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0
+        }
+
+
+# Stage latency buckets in seconds (Prometheus convention)
+LATENCY_BUCKETS_S = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                     0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _label_text(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _number(value):
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value) if value != int(value) else str(int(value))
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters, gauges and histograms, keyed by name + labels,
+    rendered in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}  # name -> [type, help, buckets, {labels: value}]
+
+    def _family(self, name, kind, help_text, buckets=None):
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = [kind, help_text, buckets, {}]
+        elif family[0] != kind:
+            raise ValueError(f"Metric {name} is a {family[0]}, not a {kind}")
+        return family
+
+    def counter(self, name, help_text):
+        with self._lock:
+            self._family(name, "counter", help_text)
+
+    def gauge(self, name, help_text):
+        with self._lock:
+            self._family(name, "gauge", help_text)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS_S):
+        with self._lock:
+            self._family(name, "histogram", help_text, tuple(buckets))
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._families[name][3]
+            values[key] = values.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._families[name][3][tuple(sorted(labels.items()))] = value
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families[name]
+            histogram = family[3].get(key)
+            if histogram is None:
+                histogram = family[3][key] = Histogram(family[2])
+            histogram.observe(value)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, _, values) in sorted(self._families.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(values.items()):
+                    if kind != "histogram":
+                        lines.append(f"{name}{_label_text(labels)} {_number(value)}")
+                        continue
+                    cumulative = np.cumsum(value.counts)
+                    for bound, count in zip(value.buckets + ("+Inf",), cumulative):
+                        le = ("le", bound if bound == "+Inf" else _number(bound))
+                        lines.append(f"{name}_bucket{_label_text(labels, le)} {int(count)}")
+                    lines.append(f"{name}_sum{_label_text(labels)} {_number(value.total)}")
+                    lines.append(f"{name}_count{_label_text(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """
+    Collects named stage durations (seconds) for one request or batch:
+
+        with timer.stage("xgboost"):
+            ...
+    """
+
+    def __init__(self):
+        self.durations = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - started
+
+    def server_timing(self):
+        """
+        Server-Timing header value (milliseconds).
+        """
+        return ", ".join(f"{name};dur={seconds * 1000.0:.3f}"
+                         for name, seconds in self.durations.items())
@@ -1,3 +1,7 @@
+import json
+import os
+
+import numpy as np
 import xgboost as xgb
 from sklearn.metrics import (
     classification_report,
@@ -5,14 +9,77 @@ from sklearn.metrics import (
     average_precision_score
 )
 
-def train_xgboost(X_train, y_train):
+from src.data_loader import iter_chunks, CHUNK_ROWS
+from src.scoring import FEATURE_NAMES
+
+# Negative-sampling corrections: importance weights, or a prior shift
+CORRECTIONS = ("weights", "prior")
+
+
+def downsample_negatives(X, y, rate, seed=42):
+    """
+    Keeps every fraud row and a `rate` fraction of legitimate ones.
+    Returns (X, y, weights) with importance weight 1/rate on kept negatives.
+    """
+    if not 0 < rate <= 1:
+        raise ValueError("rate must be in (0, 1]")
+
+    y = np.asarray(y)
+    keep = (y == 1) | (np.random.default_rng(seed).random(len(y)) < rate)
+    weights = np.where(y[keep] == 1, 1.0, 1.0 / rate)
+
+    return X[keep], y[keep], weights
+
+
+def prior_correct(probs, rate):
+    """
+    Maps probabilities of a model fit on unweighted downsampled data back
+    to the original class prior: p = r*q / (r*q + 1 - q).
+    """
+    probs = np.asarray(probs)
+    return rate * probs / (rate * probs + 1 - probs)
+
+
+def apply_prior_correction(model, rate):
+    """
+    Bakes prior_correct into a fitted XGBClassifier by shifting its base
+    margin by log(rate), so saved bundles serve corrected probabilities.
+    """
+    booster = model.get_booster()
+    config = json.loads(booster.save_config())
+    base_score = float(
+        str(config["learner"]["learner_model_param"]["base_score"]).strip("[]")
+    )
+    margin = np.log(base_score / (1 - base_score)) + np.log(rate)
+    booster.set_param({"base_score": float(1 / (1 + np.exp(-margin)))})
+    return model
+
+
+def train_xgboost(X_train, y_train, n_jobs=-1, neg_sample_rate=None,
+                  correction="weights"):
     """
     Trains baseline XGBoost fraud model.
+
+    With `neg_sample_rate`, only that fraction of legitimate rows is used
+    and the loss is corrected back to the full data:
+    - "weights": kept negatives get importance weight 1/rate;
+    - "prior":   no weights, the fitted model's margin is shifted by
+                 log(rate) (see prior_correct).
+    Either way scale_pos_weight comes from the full class counts, so
+    probabilities stay comparable with a model trained on every row.
     """
+    if correction not in CORRECTIONS:
+        raise ValueError(f"correction must be one of {CORRECTIONS}")
 
     # Handle class imbalance
     scale_pos_weight = (y_train == 0).sum() / (y_train == 1).sum()
 
+    sample_weight = None
+    if neg_sample_rate is not None:
+        X_train, y_train, weights = downsample_negatives(X_train, y_train, neg_sample_rate)
+        if correction == "weights":
+            sample_weight = weights
+
     model = xgb.XGBClassifier(
         n_estimators=200,
         max_depth=6,
@@ -22,10 +89,13 @@ def train_xgboost(X_train, y_train):
         scale_pos_weight=scale_pos_weight,
         eval_metric="logloss",
         random_state=42,
-        n_jobs=-1
+        n_jobs=n_jobs
     )
 
-    model.fit(X_train, y_train)
+    model.fit(X_train, y_train, sample_weight=sample_weight)
+
+    if neg_sample_rate is not None and correction == "prior":
+        apply_prior_correction(model, neg_sample_rate)
     return model
 
 
@@ -42,3 +112,177 @@ def evaluate_model(model, X_val, y_val):
     print(classification_report(y_val, y_pred, digits=4))
 
     print(f"PR-AUC: {pr_auc:.4f}")
+    return pr_auc
+
+
+# ------------------ Out-of-core training -------------------------------
+
+class TransactionChunkIter(xgb.DataIter):
+    """
+    Streams (features, label) chunks of a CSV / Parquet file into XGBoost.
+
+    Rows are assigned to the train or validation subset by a draw seeded
+    with the chunk number, so every pass (XGBoost makes several) sees the
+    same split. Label counts of the last full pass are kept for
+    scale_pos_weight.
+    """
+
+    def __init__(self, path, subset="train", val_fraction=0.2,
+                 chunksize=CHUNK_ROWS, cache_prefix=None, seed=42):
+        if subset not in ("train", "val"):
+            raise ValueError("subset must be 'train' or 'val'")
+
+        self.path = path
+        self.subset = subset
+        self.val_fraction = val_fraction
+        self.chunksize = chunksize
+        self.seed = seed
+
+        self.n_pos = self.n_neg = 0
+        self._chunks = None
+        self._pass_counts = [0, 0]
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._chunks = None
+
+    def chunks(self):
+        """
+        Yields this subset's (X, y) chunks.
+        """
+        for i, chunk in enumerate(iter_chunks(self.path, self.chunksize)):
+            chunk = chunk.dropna(subset=["Class"])
+
+            in_val = np.random.default_rng([self.seed, i]).random(len(chunk)) < self.val_fraction
+            part = chunk[in_val if self.subset == "val" else ~in_val]
+
+            if len(part):
+                yield part[FEATURE_NAMES], part["Class"].to_numpy()
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = self.chunks()
+            self._pass_counts = [0, 0]
+
+        try:
+            X, y = next(self._chunks)
+        except StopIteration:
+            self.n_neg, self.n_pos = self._pass_counts
+            return False
+
+        n_pos = int(y.sum())
+        self._pass_counts[0] += len(y) - n_pos
+        self._pass_counts[1] += n_pos
+
+        input_data(data=X, label=y)
+        return True
+
+
+def booster_to_classifier(booster):
+    """
+    Wraps a trained Booster as an XGBClassifier (predict_proba etc.).
+    """
+    model = xgb.XGBClassifier()
+    model.load_model(bytearray(booster.save_raw(raw_format="ubj")))
+    return model
+
+
+def _streamed_dmatrix(it, mode, n_jobs, ref=None):
+    if mode == "quantile":
+        # Data streamed in, histogram pages kept in memory
+        return xgb.QuantileDMatrix(it, ref=ref, nthread=n_jobs)
+
+    if hasattr(xgb, "ExtMemQuantileDMatrix"):  # xgboost >= 3.0
+        return xgb.ExtMemQuantileDMatrix(it, ref=ref, nthread=n_jobs)
+
+    # xgboost 2.x external memory (pages cached under it.cache_prefix)
+    return xgb.DMatrix(it, nthread=n_jobs)
+
+
+def train_xgboost_external(
+        path,
+        mode="external",
+        val_fraction=0.2,
+        chunksize=CHUNK_ROWS,
+        cache_dir=".cache/xgb_extmem",
+        n_estimators=200,
+        n_jobs=-1
+):
+    """
+    Out-of-core XGBoost training (tree_method="hist").
+
+    Training and validation rows are streamed from `path` chunk by chunk
+    into an external-memory DMatrix ("external", pages on disk) or a
+    QuantileDMatrix ("quantile", compressed pages in memory); the raw
+    feature table is never materialised. Hyper-parameters match
+    train_xgboost.
+
+    Returns (model, val_iter); evaluate with evaluate_model_streaming.
+    """
+    if mode not in ("external", "quantile"):
+        raise ValueError("mode must be 'external' or 'quantile'")
+
+    # Only external memory pages go to disk; QuantileDMatrix refuses a cache
+    if mode == "external":
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_prefix(subset):
+        return os.path.join(cache_dir, subset) if mode == "external" else None
+
+    train_it = TransactionChunkIter(
+        path, "train", val_fraction, chunksize, cache_prefix=cache_prefix("train")
+    )
+    val_it = TransactionChunkIter(
+        path, "val", val_fraction, chunksize, cache_prefix=cache_prefix("val")
+    )
+
+    dtrain = _streamed_dmatrix(train_it, mode, n_jobs)
+    dval = _streamed_dmatrix(val_it, mode, n_jobs, ref=dtrain)
+
+    # Handle class imbalance (counts from the streamed pass)
+    scale_pos_weight = train_it.n_neg / max(train_it.n_pos, 1)
+
+    params = {
+        "objective": "binary:logistic",
+        "tree_method": "hist",
+        "max_depth": 6,
+        "learning_rate": 0.1,
+        "subsample": 0.8,
+        "colsample_bytree": 0.8,
+        "scale_pos_weight": scale_pos_weight,
+        "eval_metric": ["logloss", "aucpr"],
+        "seed": 42,
+        "nthread": n_jobs
+    }
+
+    booster = xgb.train(
+        params,
+        dtrain,
+        num_boost_round=n_estimators,
+        evals=[(dval, "val")],
+        verbose_eval=50
+    )
+    return booster_to_classifier(booster), val_it
+
+
+def evaluate_model_streaming(model, val_it):
+    """
+    evaluate_model over a streamed validation subset: only labels and
+    probabilities are kept in memory.
+    """
+    probs, labels = [], []
+    for X, y in val_it.chunks():
+        probs.append(model.predict_proba(X)[:, 1])
+        labels.append(y)
+
+    y_prob = np.concatenate(probs)
+    y_val = np.concatenate(labels)
+    y_pred = (y_prob >= 0.5).astype(int)
+
+    pr_auc = average_precision_score(y_val, y_prob)
+
+    print("\n--- Classification Report ---")
+    print(classification_report(y_val, y_pred, digits=4))
+
+    print(f"PR-AUC: {pr_auc:.4f}")
+    return pr_auc
@@ -1,8 +1,20 @@
 import sqlite3
+import threading
+from datetime import datetime, timedelta
+
 import pandas as pd
 
 DB_PATH = "feedback/feedback.db"
 
+# Rolling windows reported by the monitor, in hourly buckets
+WINDOWS_HOURS = {"last_hour": 1, "last_day": 24, "last_week": 168}
+
+# Hourly buckets older than the longest window are pruned
+RETENTION_HOURS = max(WINDOWS_HOURS.values())
+
+# Seconds between background folds of new feedback (API process)
+REFRESH_INTERVAL = 5.0
+
 def load_feedback():
     conn = sqlite3.connect(DB_PATH)
     df = pd.read_sql("SELECT * FROM feedback", conn)
@@ -10,28 +22,229 @@ def load_feedback():
     return df
 
 
+def init_monitoring(conn):
+    """
+    Summary tables maintained incrementally from the feedback table.
+    """
+    conn.executescript("""
+    CREATE TABLE IF NOT EXISTS monitor_state(
+          id INTEGER PRIMARY KEY CHECK (id = 1),
+          watermark INTEGER NOT NULL,
+          total INTEGER NOT NULL,
+          false_positives INTEGER NOT NULL,
+          missed_fraud INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO monitor_state VALUES (1, 0, 0, 0, 0);
+
+    CREATE TABLE IF NOT EXISTS monitor_hourly(
+          hour TEXT PRIMARY KEY,
+          total INTEGER NOT NULL,
+          false_positives INTEGER NOT NULL,
+          missed_fraud INTEGER NOT NULL
+    );
+    """)
+
+
+def _read_watermark(conn):
+    # None until init_monitoring has created the summary tables
+    try:
+        row = conn.execute("SELECT watermark FROM monitor_state WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return None if row is None else row[0]
+
+
+def _hour_key(ts):
+    # Same prefix as the ISO timestamps stored in feedback ("YYYY-MM-DDTHH")
+    return ts.isoformat()[:13]
+
+
+def refresh_aggregates(conn, now=None):
+    """
+    Folds feedback rows above the watermark into the summary tables.
+    Returns the number of new rows.
+
+    Reading the watermark, folding and moving it happen in one write
+    transaction, so concurrent refreshes cannot fold the same rows twice.
+    When no row is above the watermark nothing is written.
+    """
+    now = now or datetime.utcnow()
+
+    watermark = _read_watermark(conn)
+    if watermark is None:
+        init_monitoring(conn)
+        watermark = 0
+    latest, = conn.execute("SELECT coalesce(max(id), 0) FROM feedback").fetchone()
+    if latest <= watermark:
+        return 0
+
+    with conn:
+        # Take the write lock before reading the watermark
+        conn.execute("BEGIN IMMEDIATE")
+        watermark, = conn.execute(
+            "SELECT watermark FROM monitor_state WHERE id = 1"
+        ).fetchone()
+
+        new_rows, new_watermark, total, fp, missed = conn.execute("""
+        SELECT count(*),
+               coalesce(max(id), ?),
+               count(*),
+               coalesce(sum(model_decision = 2 AND human_label = 0), 0),
+               coalesce(sum(model_decision != 2 AND human_label = 1), 0)
+        FROM feedback WHERE id > ?
+        """, (watermark, watermark)).fetchone()
+
+        if new_rows == 0:
+            return 0
+
+        conn.execute("""
+        INSERT INTO monitor_hourly (hour, total, false_positives, missed_fraud)
+        SELECT substr(timestamp, 1, 13),
+               count(*),
+               sum(model_decision = 2 AND human_label = 0),
+               sum(model_decision != 2 AND human_label = 1)
+        FROM feedback WHERE id > ? AND id <= ?
+        GROUP BY substr(timestamp, 1, 13)
+        ON CONFLICT(hour) DO UPDATE SET
+               total = total + excluded.total,
+               false_positives = false_positives + excluded.false_positives,
+               missed_fraud = missed_fraud + excluded.missed_fraud
+        """, (watermark, new_watermark))
+
+        conn.execute("""
+        UPDATE monitor_state
+        SET watermark = ?,
+            total = total + ?,
+            false_positives = false_positives + ?,
+            missed_fraud = missed_fraud + ?
+        WHERE id = 1
+        """, (new_watermark, total, fp, missed))
+
+        conn.execute(
+            "DELETE FROM monitor_hourly WHERE hour < ?",
+            (_hour_key(now - timedelta(hours=RETENTION_HOURS)),)
+        )
+
+    return new_rows
+
+
+def _alerts(total, false_positives, missed_fraud):
+    # Simple retraining rules
+    alerts = []
+    if total and false_positives / total > 0.3:
+        alerts.append("High false positive rate → consider threshold tuning")
+    if missed_fraud > 0:
+        alerts.append("Missed fraud detected → consider retraining")
+    if total >= 100:
+        alerts.append("Sufficient new labels collected → retraining recommended")
+    return alerts
+
+
+def monitor_report(db_path=None, now=None):
+    """
+    Current aggregates: all-time counts plus rolling windows (hourly
+    bucket granularity), as of the last refresh_aggregates. A plain
+    read: at most a week of hourly buckets is summed and no write lock
+    is taken, so it does not queue behind feedback writes.
+    """
+    now = now or datetime.utcnow()
+    watermark = total = fp = missed = 0
+    windows = {
+        name: {"total": 0, "false_positives": 0, "missed_fraud": 0}
+        for name in WINDOWS_HOURS
+    }
+
+    conn = sqlite3.connect(db_path or DB_PATH)
+    try:
+        # Summary tables exist once the first refresh has run
+        if _read_watermark(conn) is not None:
+            # One read snapshot for the totals and the windows
+            conn.execute("BEGIN")
+            watermark, total, fp, missed = conn.execute(
+                "SELECT watermark, total, false_positives, missed_fraud "
+                "FROM monitor_state WHERE id = 1"
+            ).fetchone()
+
+            for name, hours in WINDOWS_HOURS.items():
+                since = _hour_key(now - timedelta(hours=hours))
+                w_total, w_fp, w_missed = conn.execute("""
+                SELECT coalesce(sum(total), 0),
+                       coalesce(sum(false_positives), 0),
+                       coalesce(sum(missed_fraud), 0)
+                FROM monitor_hourly WHERE hour >= ?
+                """, (since,)).fetchone()
+                windows[name] = {
+                    "total": w_total,
+                    "false_positives": w_fp,
+                    "missed_fraud": w_missed
+                }
+    finally:
+        conn.close()
+
+    return {
+        "watermark": watermark,
+        "total": total,
+        "false_positives": fp,
+        "missed_fraud": missed,
+        "windows": windows,
+        "alerts": _alerts(total, fp, missed)
+    }
+
+
+class AggregateRefresher:
+    """
+    Folds new feedback into the summary tables every `interval` seconds
+    on a background thread, so GET /monitoring stays a read.
+    """
+
+    def __init__(self, db_path=None, interval=REFRESH_INTERVAL):
+        self.db_path = db_path or DB_PATH
+        self.interval = interval
+        self._stop = threading.Event()
+        self._worker = threading.Thread(
+            target=self._run, name="monitor-refresh", daemon=True
+        )
+        self._worker.start()
+
+    def close(self, timeout=10.0):
+        self._stop.set()
+        self._worker.join(timeout=timeout)
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            while True:
+                try:
+                    refresh_aggregates(conn)
+                except sqlite3.Error as e:
+                    print(f"Warning: monitoring refresh failed ({e})")
+                if self._stop.wait(self.interval):
+                    break
+        finally:
+            conn.close()
+
+
 def monitor_model():
-    df = load_feedback()
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        refresh_aggregates(conn)
+    finally:
+        conn.close()
+    report = monitor_report()
 
-    if df.empty:
+    if report["total"] == 0:
         print("No feedback available yet.")
         return
 
-    total = len(df)
-    false_positives = ((df["model_decision"] == 2) & (df["human_label"] == 0)).sum()
-    missed_fraud = ((df["model_decision"] != 2) & (df["human_label"] == 1)).sum()
-
     print("\n--- Monitoring Report ---")
-    print(f"Total feedback samples: {total}")
-    print(f"False positives (blocked but legit): {false_positives}")
-    print(f"Missed fraud (not blocked but fraud): {missed_fraud}")
+    print(f"Total feedback samples: {report['total']}")
+    print(f"False positives (blocked but legit): {report['false_positives']}")
+    print(f"Missed fraud (not blocked but fraud): {report['missed_fraud']}")
 
-    # Simple retraining rules
-    if false_positives / total > 0.3:
-        print("⚠️ Alert: High false positive rate → consider threshold tuning")
+    for name, window in report["windows"].items():
+        print(f"{name}: {window['total']} samples, "
+              f"{window['false_positives']} false positives, "
+              f"{window['missed_fraud']} missed fraud")
 
-    if missed_fraud > 0:
-        print("⚠️ Alert: Missed fraud detected → consider retraining")
-
-    if total >= 100:
-        print("📌 Sufficient new labels collected → retraining recommended")
+    for alert in report["alerts"]:
+        print(f"⚠️ Alert: {alert}")
@@ -0,0 +1,197 @@
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+
+CACHE_DIR = ".cache/stages"
+
+
+class Stage:
+    """
+    One pipeline step.
+
+    fn(*input_values, **params) produces the stage output. The cache key
+    hashes the stage name, the source of `fn` (and of any functions in
+    `code`), `params`, `fingerprint` (key-only values such as a data file
+    hash) and the keys of the input stages, so a change anywhere upstream
+    invalidates everything downstream.
+
+    `uses_cpu` stages receive an `n_jobs` keyword: their share of the
+    pipeline's CPU budget among stages running at the same time.
+
+    Stages with side effects (files written, a model published) give
+    `outputs`: a function of the stage's value returning the paths it
+    wrote. A cached value only counts while all of them still exist.
+    """
+
+    def __init__(self, name, fn, inputs=(), params=None, fingerprint=None,
+                 code=(), cache=True, uses_cpu=False, outputs=None):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.params = params or {}
+        self.fingerprint = fingerprint or {}
+        self.code = tuple(code)
+        self.cache = cache
+        self.uses_cpu = uses_cpu
+        self.outputs = outputs
+
+
+def _source(fn):
+    try:
+        return inspect.getsource(fn)
+    except (OSError, TypeError):
+        return getattr(fn, "__qualname__", repr(fn))
+
+
+class Pipeline:
+    """
+    Runs stages with a content-addressed artifact cache.
+
+    Keys are computed from the graph alone, so a cached stage whose
+    output no later stage needs is neither run nor loaded. Independent
+    stages that must run execute concurrently.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, cpu_budget=None):
+        self.cache_dir = cache_dir
+        self.cpu_budget = cpu_budget or os.cpu_count() or 1
+        self.stages = {}
+        self.report = []
+        self.wall_seconds = 0.0
+        self._values = {}
+        self._keys = {}
+        self._outputs_exist = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, fn, **kwargs):
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        for dep in kwargs.get("inputs", ()):
+            if dep not in self.stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        self.stages[name] = Stage(name, fn, **kwargs)
+
+    # ------------------ Keys & artifacts -------------------------------
+
+    def key(self, name):
+        if name not in self._keys:
+            stage = self.stages[name]
+            payload = json.dumps({
+                "name": name,
+                "code": [_source(stage.fn)] + [_source(f) for f in stage.code],
+                "params": stage.params,
+                "fingerprint": stage.fingerprint,
+                "inputs": [self.key(dep) for dep in stage.inputs]
+            }, sort_keys=True, default=repr)
+            self._keys[name] = hashlib.sha256(payload.encode()).hexdigest()[:16]
+        return self._keys[name]
+
+    def _artifact(self, name):
+        return os.path.join(self.cache_dir, f"{name}-{self.key(name)}.joblib")
+
+    def _is_cached(self, name):
+        stage = self.stages[name]
+        if not stage.cache or not os.path.exists(self._artifact(name)):
+            return False
+        if stage.outputs is None:
+            return True
+
+        # Checked once per run: a stage that reruns is not asked again
+        if name not in self._outputs_exist:
+            value = joblib.load(self._artifact(name))
+            self._outputs_exist[name] = all(os.path.exists(p) for p in stage.outputs(value))
+        return self._outputs_exist[name]
+
+    # ------------------ Execution -------------------------------
+
+    def _plan(self, targets):
+        """
+        Stages to load or run for `targets`, in dependency order.
+        """
+        order, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            # A cached stage only needs its artifact, not its inputs
+            if not self._is_cached(name):
+                for dep in self.stages[name].inputs:
+                    visit(dep)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def _execute(self, name, n_jobs):
+        stage = self.stages[name]
+        started = time.perf_counter()
+
+        if self._is_cached(name):
+            value = joblib.load(self._artifact(name))
+            status = "cached"
+        else:
+            kwargs = dict(stage.params)
+            if stage.uses_cpu:
+                kwargs["n_jobs"] = n_jobs
+            value = stage.fn(*[self._values[dep] for dep in stage.inputs], **kwargs)
+            status = "ran"
+
+            if stage.cache:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = self._artifact(name) + ".tmp"
+                joblib.dump(value, tmp)
+                os.replace(tmp, self._artifact(name))
+
+        with self._lock:
+            self._values[name] = value
+            self.report.append({
+                "stage": name,
+                "status": status,
+                "key": self.key(name),
+                "seconds": time.perf_counter() - started
+            })
+
+    def run(self, *targets):
+        """
+        Produces the outputs of `targets` (all stages if none given).
+        Returns {name: value} for the requested targets.
+        """
+        targets = targets or tuple(self.stages)
+        started = time.perf_counter()
+        pending = [name for name in self._plan(targets) if name not in self._values]
+
+        while pending:
+            # Every stage whose inputs are available can start now
+            ready = [
+                name for name in pending
+                if self._is_cached(name)
+                or all(dep in self._values for dep in self.stages[name].inputs)
+            ]
+            cpu_stages = sum(self.stages[name].uses_cpu for name in ready)
+            n_jobs = max(1, self.cpu_budget // max(cpu_stages, 1))
+
+            if len(ready) == 1:
+                self._execute(ready[0], n_jobs)
+            else:
+                with ThreadPoolExecutor(max_workers=len(ready)) as pool:
+                    for future in [pool.submit(self._execute, n, n_jobs) for n in ready]:
+                        future.result()
+
+            pending = [name for name in pending if name not in ready]
+
+        self.wall_seconds += time.perf_counter() - started
+        return {name: self._values[name] for name in targets}
+
+    def print_report(self):
+        print("\n--- Pipeline stage timings ---")
+        for row in self.report:
+            print(f"{row['stage']:<20} {row['status']:<7} {row['seconds']:8.2f}s  {row['key']}")
+        print(f"{'wall clock':<28} {self.wall_seconds:8.2f}s")
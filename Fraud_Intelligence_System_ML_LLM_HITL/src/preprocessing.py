@@ -7,6 +7,11 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     - Final NaN validation
     """
 
+    # The columnar loader already counted missing values while parsing
+    if df.attrs.get("missing_values") == 0:
+        print("Dropped 0 corrupted rows")
+        return df
+
     initial_rows = df.shape[0]
 
     # Drop rows where target is missing (critical rule)
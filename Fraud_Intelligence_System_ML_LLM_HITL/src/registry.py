@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from src.bundle import save_bundle, read_manifest, MANIFEST
+
+REGISTRY_DIR = "models/registry"
+ACTIVE_FILE = "active.json"
+
+
+class ModelRegistry:
+    """
+    Local directory of versioned model bundles.
+
+        <root>/<version>/   one bundle per version
+        <root>/active.json  active version + previously active ones
+
+    Versions are written to a temporary directory and renamed into place,
+    so a reader never sees a half-written bundle.
+    """
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, version):
+        path = os.path.join(self.root, version)
+        if not os.path.exists(os.path.join(path, MANIFEST)):
+            raise KeyError(f"Unknown model version: {version}")
+        return path
+
+    def versions(self):
+        return sorted(
+            name for name in os.listdir(self.root)
+            if not name.startswith(".")  # bundles still being published
+            and os.path.exists(os.path.join(self.root, name, MANIFEST))
+        )
+
+    def manifest(self, version):
+        return read_manifest(self.path(version))
+
+    def publish(self, xgb_model, iso_model, feature_names, **bundle_kwargs):
+        """
+        Saves a new bundle version; returns its manifest. Raises
+        ValueError if the version already exists (never overwrites).
+        """
+        # One temporary directory per publish: concurrent publishes
+        # (e.g. a retrain and a pipeline run) do not share it
+        tmp = tempfile.mkdtemp(prefix=".publishing-", dir=self.root)
+        os.chmod(tmp, 0o755)  # mkdtemp is owner-only
+        try:
+            manifest = save_bundle(tmp, xgb_model, iso_model, feature_names, **bundle_kwargs)
+            version = manifest["version"]
+
+            target = os.path.join(self.root, version)
+            if os.path.exists(target):
+                raise ValueError(f"Model version {version} already exists")
+            try:
+                os.rename(tmp, target)  # fails if another publish took the name
+            except OSError:
+                raise ValueError(f"Model version {version} already exists") from None
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return manifest
+
+    # ------------------ Active pointer -------------------------------
+
+    def _read_active(self):
+        path = os.path.join(self.root, ACTIVE_FILE)
+        if not os.path.exists(path):
+            return {"active": None, "history": []}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_active(self, state):
+        tmp = os.path.join(self.root, ACTIVE_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, os.path.join(self.root, ACTIVE_FILE))
+
+    def active_version(self):
+        return self._read_active()["active"]
+
+    def set_active(self, version):
+        self.path(version)  # must exist
+
+        with self._lock:
+            state = self._read_active()
+            if state["active"] == version:
+                return
+            if state["active"] is not None:
+                state["history"].append(state["active"])
+            state["active"] = version
+            self._write_active(state)
+
+    def previous_version(self):
+        history = self._read_active()["history"]
+        return history[-1] if history else None
+
+    def rollback(self):
+        """
+        Re-activates the previously active version; returns it.
+        """
+        with self._lock:
+            state = self._read_active()
+            if not state["history"]:
+                raise ValueError("No previous model version to roll back to")
+
+            state["active"] = state["history"].pop()
+            self._write_active(state)
+            return state["active"]
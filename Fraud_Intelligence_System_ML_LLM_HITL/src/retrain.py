@@ -0,0 +1,221 @@
+"""
+Incremental retraining from analyst feedback.
+
+    python -m src.retrain [--rounds 20] [--reference data/val.parquet]
+
+Labelled feedback rows that carry the scored transaction's features and
+arrived after the active model's feedback watermark continue boosting
+its XGBoost booster. The result is published to the registry only if
+PR-AUC on held-out data does not regress; activating it stays a separate
+step (POST /admin/models/{version}/activate).
+"""
+import argparse
+import json
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import average_precision_score
+
+from src.feedback import DB_PATH
+from src.model import booster_to_classifier
+from src.registry import ModelRegistry, REGISTRY_DIR
+from src.bundle import load_bundle
+from src.scoring import FEATURE_NAMES
+
+# Same threshold as the monitoring "retraining recommended" alert
+MIN_NEW_LABELS = 100
+EXTRA_ROUNDS = 20
+HOLDOUT_FRACTION = 0.2
+
+# Shallower, slower trees than the initial fit: a few hundred labels
+# should adjust the model, not overwrite it
+RETRAIN_PARAMS = {
+    "objective": "binary:logistic",
+    "tree_method": "hist",
+    "max_depth": 4,
+    "learning_rate": 0.05,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "seed": 42
+}
+
+
+def load_labelled_feedback(db_path=DB_PATH):
+    """
+    Feedback rows with features and a 0/1 label: (ids, X, y), by id.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("""
+        SELECT id, human_label, features FROM feedback
+        WHERE features IS NOT NULL AND human_label IN (0, 1)
+        ORDER BY id
+        """).fetchall()
+    finally:
+        conn.close()
+
+    ids = np.array([r[0] for r in rows], dtype=np.int64)
+    y = np.array([r[1] for r in rows], dtype=np.int64)
+    X = pd.DataFrame(
+        np.array([json.loads(r[2]) for r in rows], dtype=float).reshape(-1, len(FEATURE_NAMES)),
+        columns=FEATURE_NAMES
+    )
+    return ids, X, y
+
+
+def in_holdout(ids, fraction=HOLDOUT_FRACTION):
+    """
+    Stable per-row assignment (multiplicative hash of the feedback id),
+    so a row held out once is never trained on later.
+    """
+    return (ids * 2654435761 % 2**32) / 2**32 < fraction
+
+
+def _pr_auc(model, X, y):
+    # Undefined unless both classes are present
+    if len(y) == 0 or y.min() == y.max():
+        return None
+    return float(average_precision_score(y, model.predict_proba(X)[:, 1]))
+
+
+def retrain_from_feedback(
+        registry=None,
+        db_path=DB_PATH,
+        rounds=EXTRA_ROUNDS,
+        min_new_labels=MIN_NEW_LABELS,
+        holdout=HOLDOUT_FRACTION,
+        reference=None,
+        tolerance=0.0,
+        n_jobs=-1
+):
+    """
+    Continues boosting the active model on new feedback labels.
+
+    Held-out data is every feedback row in the holdout slice (old and
+    new) plus the optional `reference` (X, y) set; on each slice with
+    both classes the new PR-AUC must be >= old PR-AUC - `tolerance`.
+    Returns a report dict whose "status" is "skipped", "rejected" or
+    "published".
+    """
+    started = time.perf_counter()
+    registry = registry or ModelRegistry()
+
+    active = registry.active_version()
+    if active is None:
+        return {"status": "skipped", "reason": "no active model version"}
+    base = load_bundle(registry.path(active))
+    watermark = base.manifest.get("retrain", {}).get("feedback_watermark", 0)
+
+    ids, X, y = load_labelled_feedback(db_path)
+    held_out = in_holdout(ids, holdout)
+    train = (ids > watermark) & ~held_out
+
+    report = {
+        "base_version": active,
+        "feedback_watermark": watermark,
+        "new_labels": int((ids > watermark).sum()),
+        "train_rows": int(train.sum())
+    }
+    if report["train_rows"] < min_new_labels:
+        return {**report, "status": "skipped",
+                "reason": f"fewer than {min_new_labels} new training labels"}
+
+    X_train, y_train = X[train], y[train]
+    n_pos = int(y_train.sum())
+    n_neg = len(y_train) - n_pos
+
+    params = {
+        **RETRAIN_PARAMS,
+        # Handle class imbalance of the new labels
+        "scale_pos_weight": n_neg / n_pos if n_pos and n_neg else 1.0,
+        "nthread": n_jobs
+    }
+    booster = xgb.train(
+        params,
+        xgb.DMatrix(X_train, label=y_train, nthread=n_jobs),
+        num_boost_round=rounds,
+        xgb_model=base.xgb_model.get_booster()  # copied, not modified
+    )
+    model = booster_to_classifier(booster)
+
+    slices = {"feedback_holdout": (X[held_out], y[held_out])}
+    if reference is not None:
+        slices["reference"] = (reference[0][FEATURE_NAMES], np.asarray(reference[1]))
+
+    evaluation = {}
+    for name, (X_eval, y_eval) in slices.items():
+        before = _pr_auc(base.xgb_model, X_eval, y_eval)
+        if before is not None:
+            evaluation[name] = {
+                "rows": len(y_eval),
+                "pr_auc_before": before,
+                "pr_auc_after": _pr_auc(model, X_eval, y_eval)
+            }
+    report["evaluation"] = evaluation
+    report["seconds"] = time.perf_counter() - started
+
+    if not evaluation:
+        return {**report, "status": "rejected",
+                "reason": "no held-out slice with both classes"}
+
+    regressed = [
+        name for name, e in evaluation.items()
+        if e["pr_auc_after"] < e["pr_auc_before"] - tolerance
+    ]
+    if regressed:
+        return {**report, "status": "rejected",
+                "reason": f"PR-AUC regressed on {', '.join(regressed)}"}
+
+    manifest = registry.publish(
+        model,
+        base.iso_model,
+        feature_names=FEATURE_NAMES,
+        training_data_hash=base.manifest.get("training_data_hash"),
+        calibration=base.calibration,
+        extra={
+            # Base model's tuned thresholds until src.thresholds is re-run
+            "decision": base.manifest.get("decision"),
+            # Same training features; run src.drift to rebin the new scores
+            "drift_reference": base.manifest.get("drift_reference"),
+            "retrain": {
+                "base_version": active,
+                "feedback_watermark": int(ids[ids > watermark].max()),
+                "rounds": rounds,
+                "train_rows": report["train_rows"],
+                "evaluation": evaluation
+            }
+        }
+    )
+    report["seconds"] = time.perf_counter() - started
+    return {**report, "status": "published", "version": manifest["version"]}
+
+
+if __name__ == "__main__":
+    from src.data_loader import load_data_columnar
+
+    parser = argparse.ArgumentParser(description="Warm-start retrain from feedback")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--rounds", type=int, default=EXTRA_ROUNDS)
+    parser.add_argument("--min-new-labels", type=int, default=MIN_NEW_LABELS)
+    parser.add_argument("--reference", help="labelled CSV / Parquet evaluation set")
+    parser.add_argument("--tolerance", type=float, default=0.0)
+    args = parser.parse_args()
+
+    reference = None
+    if args.reference:
+        df = load_data_columnar(args.reference).dropna(subset=["Class"])
+        reference = (df[FEATURE_NAMES], df["Class"].astype(int))
+
+    result = retrain_from_feedback(
+        ModelRegistry(args.registry),
+        db_path=args.db,
+        rounds=args.rounds,
+        min_new_labels=args.min_new_labels,
+        reference=reference,
+        tolerance=args.tolerance
+    )
+    print(json.dumps(result, indent=2))
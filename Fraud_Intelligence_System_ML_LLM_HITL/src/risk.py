@@ -1,13 +1,55 @@
 import numpy as np
 
-def hybrid_risk_score(xgb_probs, anomaly_scores, alpha=0.7):
+def fit_anomaly_calibration(anomaly_scores, n_quantiles=1001):
+    """
+    Builds the anomaly-score calibration table at training time:
+    evenly spaced quantiles of the IsolationForest scores.
+    """
+    probs = np.linspace(0, 1, n_quantiles)
+    return np.quantile(np.asarray(anomaly_scores, dtype=float), probs)
+
+
+def save_calibration(table, path):
+    np.save(path, np.asarray(table, dtype=float))
+
+
+def load_calibration(path):
+    return np.load(path)
+
+
+def calibrated_anomaly_risk(anomaly_scores, calibration):
+    """
+    Maps anomaly scores to [0, 1] risk using the calibration table
+    (lower score = more risky). Each row is a binary search in the
+    fixed table, so the result does not depend on the rest of the batch.
+    """
+    anomaly_scores = np.asarray(anomaly_scores, dtype=float)
+
+    # Fraction of the reference distribution scoring at or below each row
+    cdf = np.searchsorted(calibration, anomaly_scores, side="right") / len(calibration)
+    return 1.0 - cdf
+
+
+def hybrid_risk_score(xgb_probs, anomaly_scores, alpha=0.7, calibration=None):
     """
     Combine supervised probability + anomaly score
+
+    With a calibration table the anomaly part is normalised against the
+    training distribution; without one it falls back to min-max over
+    the given batch.
     """
+    if calibration is not None:
+        anomaly_norm = calibrated_anomaly_risk(anomaly_scores, calibration)
+        return alpha * xgb_probs + (1 - alpha) * anomaly_norm
+
     # Normalize anomaly scores (lower = more risky)
-    anomaly_norm = (anomaly_scores.max() - anomaly_scores) / (
-        anomaly_scores.max() - anomaly_scores.min()
-    )
+    span = anomaly_scores.max() - anomaly_scores.min()
+
+    if span > 0:
+        anomaly_norm = (anomaly_scores.max() - anomaly_scores) / span
+    else:
+        # Single row (or identical rows): nothing to normalise against
+        anomaly_norm = np.zeros_like(anomaly_scores, dtype=float)
 
     risk_scores = alpha * xgb_probs + (1 - alpha) * anomaly_norm
     return risk_scores
@@ -0,0 +1,118 @@
+from contextlib import nullcontext
+
+import numpy as np
+
+from src.risk import hybrid_risk_score
+from src.decision import decision_engine
+
+FEATURE_NAMES = ["Time"] + [f"V{i}" for i in range(1, 29)] + ["Amount"]
+N_FEATURES = len(FEATURE_NAMES)
+
+
+def to_feature_matrix(rows, single=False):
+    """
+    Converts a list of transactions into an (N, 30) float matrix.
+    With single=True, `rows` must be one flat transaction of 30 values
+    and the result is (1, 30).
+    """
+    try:
+        X = np.asarray(rows, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Ragged rows or non-numeric values (e.g. JSON objects)
+        raise ValueError(
+            f"Expected transactions of {N_FEATURES} numeric features"
+        ) from None
+
+    if single:
+        if X.ndim != 1 or X.shape[0] != N_FEATURES:
+            raise ValueError(
+                f"Expected one transaction of {N_FEATURES} features, got shape {X.shape}"
+            )
+        return X.reshape(1, -1)
+
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+
+    if X.ndim != 2 or X.shape[1] != N_FEATURES:
+        raise ValueError(
+            f"Expected transactions with {N_FEATURES} features, got shape {X.shape}"
+        )
+    return X
+
+
+def score_batch(
+        xgb_model,
+        iso_model,
+        X,
+        calibration=None,
+        alpha=0.7,
+        low_threshold=0.3,
+        high_threshold=0.8,
+        threshold_table=None,
+        timer=None
+):
+    """
+    Runs every scoring stage once over the whole feature matrix.
+
+    Returns per-row arrays in the same order as the rows of X. Pass the
+    anomaly calibration table to make each row's risk independent of
+    the batch it was scored in. A ThresholdTable overrides the scalar
+    thresholds with per-segment ones. A StageTimer (src.metrics) records
+    how long each stage took.
+    """
+    stage = timer.stage if timer is not None else (lambda name: nullcontext())
+
+    # Supervised prob
+    with stage("xgboost"):
+        xgb_probs = xgb_model.predict_proba(X)[:, 1]
+
+    # Anomaly score
+    with stage("isolation_forest"):
+        anomaly = iso_model.decision_function(X)
+
+    # Hybrid risk
+    with stage("risk"):
+        risk = hybrid_risk_score(
+            xgb_probs, anomaly, alpha=alpha, calibration=calibration
+        )
+
+    # Decision
+    with stage("decision"):
+        segment_values = None
+        if threshold_table is not None:
+            segment_values = X[:, FEATURE_NAMES.index(threshold_table.feature)]
+
+        decisions = decision_engine(
+            risk,
+            low_threshold=low_threshold,
+            high_threshold=high_threshold,
+            threshold_table=threshold_table,
+            segment_values=segment_values
+        )
+
+    return {
+        "fraud_probability": xgb_probs,
+        "anomaly_score": anomaly,
+        "risk_score": risk,
+        "decision": decisions
+    }
+
+
+def format_results(scores):
+    """
+    Turns score arrays into a list of JSON-ready dicts, one per row.
+    """
+    return [
+        {
+            "fraud_probability": float(p),
+            "anomaly_score": float(a),
+            "risk_score": float(r),
+            "decision": int(d)  # 0 approve, 1 review, 2 block
+        }
+        for p, a, r, d in zip(
+            scores["fraud_probability"],
+            scores["anomaly_score"],
+            scores["risk_score"],
+            scores["decision"]
+        )
+    ]
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import numpy as np
+
+from src.bundle import load_bundle, ModelBundle
+from src.drift import DriftMonitor
+from src.scoring import score_batch, N_FEATURES
+
+WARMUP_ROWS = 256
+
+
+def legacy_bundle(xgb_model, iso_model, calibration=None):
+    """
+    Wraps models loaded from joblib pickles so they serve like a bundle.
+    """
+    manifest = {"version": "legacy", "feature_names": None}
+    return ModelBundle(None, manifest, xgb_model, iso_model, calibration)
+
+
+def warm_up(bundle, n_rows=WARMUP_ROWS):
+    """
+    Scores synthetic rows through every stage so first real requests do
+    not pay for lazy initialisation; fails on non-finite outputs.
+    """
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((n_rows, N_FEATURES))
+    X[:, -1] = np.abs(X[:, -1]) * 100  # Amount
+
+    scores = score_batch(bundle.xgb_model, bundle.iso_model, X, bundle.calibration,
+                         **bundle.decision_params)
+    for name in ("fraud_probability", "anomaly_score", "risk_score"):
+        if not np.all(np.isfinite(scores[name])):
+            raise ValueError(f"Warm-up produced non-finite {name}")
+
+    # Loads (or compiles) the drift monitor's binning kernel
+    reference = bundle.manifest.get("drift_reference")
+    if reference is not None:
+        DriftMonitor(reference).update(X, scores)
+
+
+class ModelSlot:
+    """
+    Holds the serving model bundle.
+
+    Requests read `slot.current` once and score with that object, so a
+    swap (a single reference assignment) never affects in-flight calls.
+    New versions are loaded and warmed up on a background thread.
+    """
+
+    def __init__(self, bundle):
+        self.current = bundle
+        self._lock = threading.Lock()
+        self._loading = None
+        self.last_swap = None
+
+    def status(self):
+        return {
+            "active": self.current.version,
+            "loading": self._loading,
+            "last_swap": self.last_swap
+        }
+
+    def load_async(self, path, on_swap=None):
+        """
+        Loads the bundle at `path` in the background and swaps it in.
+        `on_swap(version)` runs after the swap (e.g. to update the registry).
+        Returns False if another load is already running.
+        """
+        with self._lock:
+            if self._loading is not None:
+                return False
+            self._loading = path
+
+        thread = threading.Thread(
+            target=self._load_and_swap, args=(path, on_swap),
+            name="model-loader", daemon=True
+        )
+        thread.start()
+        return True
+
+    def _load_and_swap(self, path, on_swap):
+        started = time.perf_counter()
+        previous = self.current.version
+        try:
+            bundle = load_bundle(path)
+            warm_up(bundle)
+
+            self.current = bundle
+            if on_swap is not None:
+                on_swap(bundle.version)
+
+            self.last_swap = {
+                "status": "ok",
+                "from": previous,
+                "to": bundle.version,
+                "seconds": time.perf_counter() - started
+            }
+        except Exception as e:
+            self.last_swap = {"status": "failed", "path": path, "error": str(e)}
+        finally:
+            with self._lock:
+                self._loading = None
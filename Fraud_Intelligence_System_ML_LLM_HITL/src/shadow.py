@@ -0,0 +1,234 @@
+"""
+Shadow (champion / challenger) scoring.
+
+A challenger bundle re-scores a sample of live requests after their
+responses have been sent. Sampled requests go into a bounded queue
+served by a few low-priority worker threads; when the queue is full the
+request is dropped from the shadow sample rather than waiting, so the
+champion's latency never depends on the challenger. Each row's champion
+and challenger outputs are appended to a JSONL log, and agreement,
+risk-score deltas and decision flips are aggregated for GET
+/admin/shadow.
+"""
+import json
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src.decision import APPROVE, REVIEW, BLOCK
+from src.metrics import Histogram
+from src.scoring import score_batch
+
+SHADOW_LOG = "logs/shadow.jsonl"
+
+# Challenger scoring latency buckets (ms)
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+# |challenger - champion| risk-score buckets
+DELTA_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+# Worker threads run at a lower CPU priority than request threads
+WORKER_NICENESS = 10
+
+DECISION_NAMES = {APPROVE: "APPROVE", REVIEW: "REVIEW", BLOCK: "BLOCK"}
+
+_STOP = object()
+
+
+class ShadowScorer:
+    """
+    Scores sampled requests with a challenger bundle off the hot path.
+
+    `submit(X, champion_results)` is meant to run from a FastAPI
+    BackgroundTask; it only samples and enqueues.
+    """
+
+    def __init__(self, bundle, sample_rate=0.1, workers=1, max_queue=1000,
+                 log_path=SHADOW_LOG):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be in [0, 1]")
+
+        self.bundle = bundle
+        self.sample_rate = sample_rate
+        self.log_path = log_path
+        self.started_at = datetime.utcnow().isoformat()
+
+        # One XGBoost thread per worker: parallelism comes from the pool
+        bundle.xgb_model.set_params(n_jobs=1)
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self._abs_delta = Histogram(DELTA_BUCKETS)
+        self._flips = np.zeros((3, 3), dtype=np.int64)  # [champion][challenger]
+        self._requests = 0
+        self._dropped = 0
+        self._errors = 0
+        self._delta_sum = 0.0
+        self._max_abs_delta = 0.0
+        self._closed = False
+
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+            self._log = open(log_path, "a")
+        else:
+            self._log = None
+
+        self._workers = [
+            threading.Thread(target=self._run, name=f"shadow-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self._running = len(self._workers)
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def version(self):
+        return self.bundle.version
+
+    def sampled(self):
+        return random.random() < self.sample_rate
+
+    def submit(self, X, champion_results):
+        """
+        Queues a scored request for the challenger if it is sampled.
+        Never blocks: a full queue drops the request from the sample.
+        A no-op once the scorer is closed.
+        """
+        if not self.sampled():
+            return False
+        with self._lock:
+            if self._closed:
+                return False
+            try:
+                self._queue.put_nowait((X, champion_results))
+                return True
+            except queue.Full:
+                self._dropped += 1
+                return False
+
+    def close(self, timeout=10.0):
+        """
+        Scores what is already queued, then stops the workers. Returns
+        True if every worker finished within `timeout`; otherwise the
+        last one to finish closes the log.
+        """
+        with self._lock:
+            if self._closed:
+                return not any(worker.is_alive() for worker in self._workers)
+            self._closed = True
+            if not self._workers:
+                self._close_log()
+
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(timeout=max(deadline - time.monotonic(), 0.0))
+        return not any(worker.is_alive() for worker in self._workers)
+
+    def _close_log(self):
+        # Caller holds self._lock
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    # ------------------ Worker -------------------------------
+
+    def _run(self):
+        try:
+            # Per-thread on Linux: the challenger yields the CPU to requests
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), WORKER_NICENESS)
+        except (AttributeError, OSError):
+            pass
+
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                with self._lock:
+                    self._running -= 1
+                    if self._running == 0:
+                        self._close_log()
+                return
+            try:
+                self._compare(*item)
+            except Exception:
+                with self._lock:
+                    self._errors += 1
+
+    def _compare(self, X, champion_results):
+        bundle = self.bundle
+        start = time.perf_counter()
+        scores = score_batch(bundle.xgb_model, bundle.iso_model, X, bundle.calibration,
+                             **bundle.decision_params)
+        latency_ms = (time.perf_counter() - start) * 1000.0
+
+        champion_risk = np.array([r["risk_score"] for r in champion_results])
+        champion_decision = np.array([r["decision"] for r in champion_results], dtype=np.int64)
+        delta = scores["risk_score"] - champion_risk
+
+        if self._log is not None:
+            timestamp = datetime.utcnow().isoformat()
+            lines = "".join(
+                json.dumps({
+                    "timestamp": timestamp,
+                    "champion": {
+                        "version": champion.get("model_version"),
+                        "risk_score": champion["risk_score"],
+                        "decision": champion["decision"]
+                    },
+                    "challenger": {
+                        "version": bundle.version,
+                        "risk_score": float(risk),
+                        "decision": int(decision)
+                    }
+                }) + "\n"
+                for champion, risk, decision in zip(
+                    champion_results, scores["risk_score"], scores["decision"]
+                )
+            )
+
+        with self._lock:
+            self._requests += 1
+            self._latency_ms.observe(latency_ms)
+            np.add.at(self._flips, (champion_decision, scores["decision"]), 1)
+            self._abs_delta.observe_many(np.abs(delta))
+            self._delta_sum += float(delta.sum())
+            self._max_abs_delta = max(self._max_abs_delta, float(np.abs(delta).max()))
+            if self._log is not None:
+                self._log.write(lines)
+                self._log.flush()
+
+    # ------------------ Stats -------------------------------
+
+    def stats(self):
+        with self._lock:
+            rows = int(self._flips.sum())
+            agree = int(np.trace(self._flips))
+            flips = {
+                f"{DECISION_NAMES[a]}->{DECISION_NAMES[b]}": int(self._flips[a, b])
+                for a in range(3) for b in range(3) if a != b and self._flips[a, b]
+            }
+            return {
+                "challenger_version": self.version,
+                "started_at": self.started_at,
+                "sample_rate": self.sample_rate,
+                "requests": self._requests,
+                "rows": rows,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "dropped": self._dropped,
+                "errors": self._errors,
+                "agreement": agree / rows if rows else None,
+                "decision_flips": flips,
+                "risk_delta_mean": self._delta_sum / rows if rows else None,
+                "risk_delta_max_abs": self._max_abs_delta,
+                "risk_delta_abs": self._abs_delta.snapshot(),
+                "latency_ms": self._latency_ms.snapshot(),
+                "log": self.log_path
+            }
@@ -0,0 +1,404 @@
+"""
+Stream consumer: scores transactions from a stream in micro-batches.
+
+    python -m src.stream --source file:data/stream.jsonl --sink decisions.jsonl
+    python -m src.stream --source unix:/tmp/fraud.sock --sink decisions.jsonl
+
+Records are JSON lines {"id": ..., "features": [30 floats]}. A reader
+thread moves them from the source into a bounded queue; when scoring
+falls behind the queue fills and the reader blocks, which stops reading
+from the source (backpressure). Each micro-batch is written to the sink
+and flushed before its last offset is checkpointed, so after a crash
+records are replayed, never lost (at-least-once; the sink may contain
+duplicates, identified by "offset").
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import threading
+import time
+
+import numpy as np
+
+from src.bundle import load_bundle
+from src.metrics import Histogram
+from src.scoring import to_feature_matrix, score_batch, format_results
+
+# Histogram buckets (upper bounds) for the consumer metrics
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+BATCH_LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+POLL_INTERVAL = 0.05
+
+
+# ------------------ Checkpoint -------------------------------
+
+class Checkpoint:
+    """
+    Last committed source offset, persisted atomically as JSON.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path) as f:
+            return json.load(f)["offset"]
+
+    def commit(self, offset):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"offset": offset, "committed_at": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+# ------------------ Sources -------------------------------
+
+class FileTailSource:
+    """
+    Append-only JSON-lines file, followed like `tail -f`.
+    Offsets are byte positions just after a record's newline.
+    """
+
+    def __init__(self, path, poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+
+    def run(self, offset, emit, stop):
+        """
+        Calls emit(offset, line) for every complete line after `offset`
+        until `stop` is set; emit blocks while the consumer is behind.
+        """
+        while not os.path.exists(self.path) and not stop.is_set():
+            time.sleep(self.poll_interval)
+
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while not stop.is_set():
+                position = f.tell()
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    # Nothing new, or a line still being written
+                    f.seek(position)
+                    time.sleep(self.poll_interval)
+                    continue
+                emit(f.tell(), line)
+
+    def ack(self, offset):
+        pass
+
+    def lag(self, committed):
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {"lag_bytes": max(size - committed, 0)}
+
+
+class UnixSocketSource:
+    """
+    Unix-socket queue standing in for a broker partition: one producer
+    at a time writes JSON lines. Offsets count records; after every
+    commit the consumer replies {"ack": offset}, and a new connection
+    is greeted with the current ack so a producer resends from there.
+    """
+
+    def __init__(self, path, poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._conn = None
+        self._lock = threading.Lock()
+        self._received = 0
+        self._acked = 0
+
+    def run(self, offset, emit, stop):
+        self._received = self._acked = offset
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        server.listen(1)
+        server.settimeout(self.poll_interval)
+
+        try:
+            while not stop.is_set():
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+
+                # Resume point must be exact: let earlier records commit first
+                while self._acked < self._received and not stop.is_set():
+                    time.sleep(self.poll_interval)
+
+                with self._lock:
+                    self._conn = conn
+                self._send({"ack": self._acked})
+
+                try:
+                    with conn, conn.makefile("rb") as lines:
+                        for line in lines:
+                            if stop.is_set():
+                                break
+                            if line.strip():
+                                self._received += 1
+                                emit(self._received, line)
+                except OSError:
+                    pass  # producer disconnected; wait for the next one
+
+                with self._lock:
+                    self._conn = None
+        finally:
+            server.close()
+            os.unlink(self.path)
+
+    def _send(self, message):
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.sendall((json.dumps(message) + "\n").encode())
+            except OSError:
+                pass  # producer went away; it resends from its last ack
+
+    def ack(self, offset):
+        self._acked = offset
+        self._send({"ack": offset})
+
+    def lag(self, committed):
+        return {"lag_records": self._received - committed}
+
+
+def open_source(spec):
+    """
+    "file:<path>" or "unix:<socket path>".
+    """
+    kind, _, path = spec.partition(":")
+    if kind == "file":
+        return FileTailSource(path)
+    if kind == "unix":
+        return UnixSocketSource(path)
+    raise ValueError(f"Unknown source {spec!r} (use file:PATH or unix:PATH)")
+
+
+# ------------------ Sink -------------------------------
+
+class JsonlSink:
+    """
+    Appends decisions as JSON lines; `write` returns once they are on disk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a")
+
+    def write(self, records):
+        self._file.write("".join(json.dumps(r) + "\n" for r in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+# ------------------ Consumer -------------------------------
+
+def bundle_scorer(bundle):
+    """
+    score_fn over an (N, 30) matrix with a loaded model bundle.
+    """
+    def score(X):
+        results = format_results(
+            score_batch(bundle.xgb_model, bundle.iso_model, X, bundle.calibration,
+                        **bundle.decision_params)
+        )
+        for result in results:
+            result["model_version"] = bundle.version
+        return results
+    return score
+
+
+class StreamConsumer:
+    """
+    Source → bounded queue → micro-batch scoring → sink → checkpoint.
+
+    A batch closes at `max_batch` records or `max_wait_ms` after its
+    first record. `score_fn` takes an (N, 30) matrix and returns N
+    result dicts.
+    """
+
+    def __init__(self, source, sink, checkpoint, score_fn, max_batch=256,
+                 max_wait_ms=50.0, max_queue=10_000):
+        self.source = source
+        self.sink = sink
+        self.checkpoint = checkpoint
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self._batch_latency_ms = Histogram(BATCH_LATENCY_BUCKETS_MS)
+
+        self.committed = 0
+        self._started = None
+        self._scored = 0
+        self._invalid = 0
+        self._blocked_seconds = 0.0
+        self._window = (time.perf_counter(), 0)  # start, rows scored at start
+        self._recent_rate = 0.0
+
+    def stop(self):
+        self._stop.set()
+
+    def _emit(self, offset, line):
+        # Blocks while the queue is full: the source stops being read
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self._queue.put((offset, line), timeout=POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+        blocked = time.perf_counter() - started
+        if blocked > 0.001:
+            with self._lock:
+                self._blocked_seconds += blocked
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=POLL_INTERVAL)]
+        except queue.Empty:
+            return []
+
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=max(remaining, 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, batch):
+        started = time.perf_counter()
+
+        records, rows, valid = [], [], []
+        for offset, line in batch:
+            try:
+                record = json.loads(line)
+                row = to_feature_matrix(record["features"], single=True)[0]
+            except (ValueError, KeyError, TypeError) as e:
+                records.append({"offset": offset, "error": str(e)})
+                continue
+            records.append({"offset": offset, "id": record.get("id")})
+            rows.append(row)
+            valid.append(len(records) - 1)
+
+        if rows:
+            for i, result in zip(valid, self.score_fn(np.vstack(rows))):
+                records[i].update(result)
+
+        # Sink first, then checkpoint: a crash in between replays the batch
+        self.sink.write(records)
+        last_offset = batch[-1][0]
+        self.checkpoint.commit(last_offset)
+        self.source.ack(last_offset)
+
+        with self._lock:
+            self.committed = last_offset
+            self._scored += len(rows)
+            self._invalid += len(batch) - len(rows)
+            self._batch_sizes.observe(len(batch))
+            self._batch_latency_ms.observe((time.perf_counter() - started) * 1000.0)
+
+    def run(self, stats_interval=None):
+        """
+        Consumes until stop() (or KeyboardInterrupt); prints stats every
+        `stats_interval` seconds if given.
+        """
+        self.committed = self.checkpoint.load()
+        self._started = time.perf_counter()
+
+        reader = threading.Thread(
+            target=self.source.run, args=(self.committed, self._emit, self._stop),
+            name="stream-reader", daemon=True
+        )
+        reader.start()
+        last_stats = time.perf_counter()
+
+        try:
+            while not self._stop.is_set():
+                batch = self._collect()
+                if batch:
+                    self._process(batch)
+
+                if stats_interval and time.perf_counter() - last_stats >= stats_interval:
+                    print(json.dumps(self.stats()), flush=True)
+                    last_stats = time.perf_counter()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            reader.join(timeout=5.0)
+            # Queued records were never committed: they are re-read on restart
+            self.sink.close()
+
+    def stats(self):
+        now = time.perf_counter()
+        with self._lock:
+            window_start, window_rows = self._window
+            if now - window_start >= 1.0:
+                self._recent_rate = (self._scored - window_rows) / (now - window_start)
+                self._window = (now, self._scored)
+
+            elapsed = now - (self._started or now)
+            return {
+                "committed_offset": self.committed,
+                **self.source.lag(self.committed),
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "scored": self._scored,
+                "invalid": self._invalid,
+                "rows_per_sec": self._scored / elapsed if elapsed else 0.0,
+                "recent_rows_per_sec": self._recent_rate,
+                "backpressure_seconds": self._blocked_seconds,
+                "batch_size": self._batch_sizes.snapshot(),
+                "batch_latency_ms": self._batch_latency_ms.snapshot()
+            }
+
+
+if __name__ == "__main__":
+    from src.batch_score import resolve_bundle
+    from src.registry import REGISTRY_DIR
+
+    parser = argparse.ArgumentParser(description="Score a transaction stream")
+    parser.add_argument("--source", required=True, help="file:PATH or unix:PATH")
+    parser.add_argument("--sink", required=True, help="output JSON-lines file")
+    parser.add_argument("--checkpoint", help="default: <sink>.checkpoint")
+    parser.add_argument("--bundle", help="model bundle (default: registry active version)")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=50.0)
+    parser.add_argument("--max-queue", type=int, default=10_000)
+    parser.add_argument("--stats-interval", type=float, default=10.0)
+    args = parser.parse_args()
+
+    bundle = load_bundle(resolve_bundle(args.bundle, args.registry))
+    consumer = StreamConsumer(
+        open_source(args.source),
+        JsonlSink(args.sink),
+        Checkpoint(args.checkpoint or args.sink + ".checkpoint"),
+        bundle_scorer(bundle),
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        max_queue=args.max_queue
+    )
+    print(f"Consuming {args.source} with model {bundle.version}")
+    consumer.run(stats_interval=args.stats_interval)
@@ -0,0 +1,233 @@
+"""
+Cost-optimal alpha / decision thresholds.
+
+    python -m src.thresholds --data data/val.parquet [--db feedback/feedback.db]
+
+Every (alpha, low, high) candidate on a grid is scored against a cost
+matrix (rows: true label, columns: APPROVE / REVIEW / BLOCK). For each
+alpha the risk scores are binned once on the threshold grid; cumulative
+(weighted) legit / fraud counts give the confusion counts at every
+threshold, and the cost of all (low, high) pairs is a single broadcast
+over the T x T grid. The best candidate is written to the
+bundle manifest ("decision"), which the scorers read in place of the
+0.7 / 0.3 / 0.8 defaults.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from src.bundle import update_manifest
+from src.decision import decision_engine, APPROVE, REVIEW, BLOCK
+from src.risk import calibrated_anomaly_risk
+
+ALPHAS = np.round(np.linspace(0.0, 1.0, 21), 4)
+THRESHOLDS = np.round(np.linspace(0.0, 1.0, 201), 4)
+
+# Analyst time for a review, an approved fraud, a blocked customer
+REVIEW_COST = 5.0
+MISSED_FRAUD_COST = 100.0
+FALSE_BLOCK_COST = 25.0
+
+# Current hardcoded operating point, reported for comparison
+DEFAULT_DECISION = {"alpha": 0.7, "low_threshold": 0.3, "high_threshold": 0.8}
+
+
+def cost_matrix(review=REVIEW_COST, missed_fraud=MISSED_FRAUD_COST, false_block=FALSE_BLOCK_COST):
+    """
+    2 x 3 cost matrix: [label][decision]. Reviews cost the same for both
+    labels; blocking fraud and approving legit transactions are free.
+    """
+    costs = np.zeros((2, 3))
+    costs[:, REVIEW] = review
+    costs[1, APPROVE] = missed_fraud
+    costs[0, BLOCK] = false_block
+    return costs
+
+
+def anomaly_risk(anomaly_scores, calibration=None):
+    """
+    The anomaly half of hybrid_risk_score, in [0, 1] (higher = riskier).
+    """
+    anomaly_scores = np.asarray(anomaly_scores, dtype=float)
+    if calibration is not None:
+        return calibrated_anomaly_risk(anomaly_scores, calibration)
+
+    span = anomaly_scores.max() - anomaly_scores.min()
+    if span > 0:
+        return (anomaly_scores.max() - anomaly_scores) / span
+    return np.zeros_like(anomaly_scores)
+
+
+def sweep_costs(xgb_probs, anomaly_norm, y, alphas=ALPHAS, thresholds=THRESHOLDS,
+                costs=None, sample_weight=None):
+    """
+    Total cost of every candidate: an (A, T, T) array indexed by
+    (alpha, low, high); pairs with low > high are +inf.
+
+    A row is REVIEW at risk >= low and BLOCK at risk >= high, as in
+    decision_engine.
+    """
+    costs = cost_matrix() if costs is None else np.asarray(costs, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+    xgb_probs = np.asarray(xgb_probs, dtype=float)
+    anomaly_norm = np.asarray(anomaly_norm, dtype=float)
+    fraud = np.asarray(y).astype(bool)
+    weight = np.ones(len(fraud)) if sample_weight is None else np.asarray(sample_weight, float)
+
+    # Per-label weights; column 0 legit, column 1 fraud
+    label_weight = np.column_stack([weight * ~fraud, weight * fraud])
+    totals = label_weight.sum(axis=0)
+
+    n = len(thresholds)
+    result = np.empty((len(alphas), n, n))
+    invalid = thresholds[:, None] > thresholds[None, :]
+
+    for i, alpha in enumerate(alphas):
+        risk = alpha * xgb_probs + (1 - alpha) * anomaly_norm
+
+        # Rows in bin b have thresholds[:b] <= risk < thresholds[b:], so
+        # the cumulative histogram is the weight below each threshold
+        bins = np.searchsorted(thresholds, risk, side="right")
+        below = np.column_stack([
+            np.cumsum(np.bincount(bins, weights=label_weight[:, label], minlength=n + 1))[:n]
+            for label in (0, 1)
+        ])
+        at_or_above = totals - below
+
+        # approve = below(low), review = above(low) - above(high),
+        # block = above(high): a low term plus a high term
+        approve = below @ costs[:, APPROVE]
+        review = at_or_above @ costs[:, REVIEW]
+        block = at_or_above @ costs[:, BLOCK]
+        result[i] = (approve + review)[:, None] + (block - review)[None, :]
+
+    result[:, invalid] = np.inf
+    return result
+
+
+def evaluate_decision(xgb_probs, anomaly_norm, y, alpha, low_threshold, high_threshold,
+                      costs=None, sample_weight=None):
+    """
+    Cost and decision counts of one operating point (via decision_engine).
+    """
+    costs = cost_matrix() if costs is None else np.asarray(costs, dtype=float)
+    y = np.asarray(y).astype(np.int64)
+    weight = np.ones(len(y)) if sample_weight is None else np.asarray(sample_weight, float)
+
+    risk = alpha * np.asarray(xgb_probs) + (1 - alpha) * np.asarray(anomaly_norm)
+    decisions = decision_engine(risk, low_threshold=low_threshold, high_threshold=high_threshold)
+
+    total = float(np.sum(weight * costs[y, decisions]))
+    return {
+        "alpha": float(alpha),
+        "low_threshold": float(low_threshold),
+        "high_threshold": float(high_threshold),
+        "expected_cost": total,
+        "cost_per_row": total / weight.sum() if len(y) else 0.0,
+        "approve": int((decisions == APPROVE).sum()),
+        "review": int((decisions == REVIEW).sum()),
+        "block": int((decisions == BLOCK).sum()),
+        "missed_fraud": int(((decisions == APPROVE) & (y == 1)).sum()),
+        "false_block": int(((decisions == BLOCK) & (y == 0)).sum())
+    }
+
+
+def optimise_thresholds(xgb_probs, anomaly_norm, y, alphas=ALPHAS, thresholds=THRESHOLDS,
+                        costs=None, sample_weight=None):
+    """
+    Searches the grid; returns the best operating point (with its counts),
+    the default one for comparison, the cost matrix and search stats.
+    """
+    costs = cost_matrix() if costs is None else np.asarray(costs, dtype=float)
+    started = time.perf_counter()
+
+    grid = sweep_costs(xgb_probs, anomaly_norm, y, alphas, thresholds, costs, sample_weight)
+    a, low, high = np.unravel_index(np.argmin(grid), grid.shape)
+
+    args = (xgb_probs, anomaly_norm, y)
+    kwargs = {"costs": costs, "sample_weight": sample_weight}
+    best = evaluate_decision(*args, alphas[a], thresholds[low], thresholds[high], **kwargs)
+    return {
+        **best,
+        "default": evaluate_decision(*args, **DEFAULT_DECISION, **kwargs),
+        "cost_matrix": costs.tolist(),
+        "rows": len(y),
+        "candidates": int(np.isfinite(grid).sum()),
+        "seconds": time.perf_counter() - started
+    }
+
+
+def score_components(bundle, X):
+    """
+    (xgb_probs, anomaly_norm) of a loaded bundle over a feature matrix.
+    """
+    xgb_probs = bundle.xgb_model.predict_proba(X)[:, 1]
+    anomaly = bundle.iso_model.decision_function(np.asarray(X, dtype=float))
+    return xgb_probs, anomaly_risk(anomaly, bundle.calibration)
+
+
+def decision_config(result):
+    """
+    The manifest "decision" entry for an optimise_thresholds result.
+    """
+    keys = ("alpha", "low_threshold", "high_threshold", "expected_cost",
+            "cost_per_row", "cost_matrix", "rows", "default")
+    return {key: result[key] for key in keys}
+
+
+if __name__ == "__main__":
+    from src.batch_score import resolve_bundle
+    from src.bundle import load_bundle
+    from src.data_loader import load_data_columnar
+    from src.feedback import DB_PATH
+    from src.registry import REGISTRY_DIR
+    from src.retrain import load_labelled_feedback
+    from src.scoring import FEATURE_NAMES
+
+    parser = argparse.ArgumentParser(description="Tune alpha and decision thresholds")
+    parser.add_argument("--bundle", help="bundle directory (default: active registry version)")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    parser.add_argument("--data", help="labelled CSV / Parquet (e.g. the validation split)")
+    parser.add_argument("--db", default=DB_PATH, help="feedback DB with labelled features")
+    parser.add_argument("--feedback-weight", type=float, default=1.0)
+    parser.add_argument("--review-cost", type=float, default=REVIEW_COST)
+    parser.add_argument("--missed-fraud-cost", type=float, default=MISSED_FRAUD_COST)
+    parser.add_argument("--false-block-cost", type=float, default=FALSE_BLOCK_COST)
+    parser.add_argument("--dry-run", action="store_true", help="print, do not write the bundle")
+    args = parser.parse_args()
+
+    bundle_path = resolve_bundle(args.bundle, args.registry)
+    bundle = load_bundle(bundle_path)
+
+    parts = []
+    if args.data:
+        df = load_data_columnar(args.data).dropna(subset=["Class"])
+        parts.append((df[FEATURE_NAMES], df["Class"].to_numpy(int), 1.0))
+    if os.path.exists(args.db):
+        _, X_fb, y_fb = load_labelled_feedback(args.db)
+        if len(y_fb):
+            parts.append((X_fb, y_fb, args.feedback_weight))
+    if not parts:
+        parser.error("no labelled rows: pass --data and/or a feedback DB with features")
+
+    components = [score_components(bundle, X) for X, _, _ in parts]
+    result = optimise_thresholds(
+        np.concatenate([c[0] for c in components]),
+        np.concatenate([c[1] for c in components]),
+        np.concatenate([y for _, y, _ in parts]),
+        costs=cost_matrix(args.review_cost, args.missed_fraud_cost, args.false_block_cost),
+        sample_weight=np.concatenate([np.full(len(y), w) for _, y, w in parts])
+    )
+    print(json.dumps(result, indent=2))
+
+    if not args.dry_run:
+        decision = decision_config(result)
+        # A per-segment table set by hand outlives re-tuning the scalars
+        table = (bundle.manifest.get("decision") or {}).get("threshold_table")
+        if table is not None:
+            decision["threshold_table"] = table
+        update_manifest(bundle_path, {"decision": decision})
+        print(f"Wrote decision thresholds to {bundle_path}")
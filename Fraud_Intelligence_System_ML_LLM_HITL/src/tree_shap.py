@@ -0,0 +1,171 @@
+"""
+Exact TreeSHAP values from XGBoost's native `pred_contribs` output.
+
+One pass over the trees per row (no model re-evaluations as in the
+permutation explainer). Contributions are in log-odds (margin) units:
+per row, base_value + sum(contributions) is the model's raw margin.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+
+from src.scoring import FEATURE_NAMES
+
+CACHE_SIZE = 4096
+TOP_K = 5
+CHUNK_ROWS = 8192
+
+
+def tree_contributions(xgb_model, X):
+    """
+    SHAP values of an XGBClassifier / Booster for the rows of X.
+    Returns (contributions (N, F), base_values (N,)).
+    """
+    booster = xgb_model.get_booster() if hasattr(xgb_model, "get_booster") else xgb_model
+    dmatrix = xgb.DMatrix(np.asarray(X, dtype=np.float32), feature_names=booster.feature_names)
+
+    out = booster.predict(dmatrix, pred_contribs=True)
+    return out[:, :-1], out[:, -1]  # last column is the bias term
+
+
+# ------------------ Process-pool workers -------------------------------
+
+_worker_booster = None
+
+
+def _init_worker(model_raw):
+    # Each worker loads its own single-threaded copy of the booster once
+    global _worker_booster
+    _worker_booster = xgb.Booster(model_file=bytearray(model_raw))
+    _worker_booster.set_param({"nthread": 1})
+
+
+def _worker_contributions(X):
+    return tree_contributions(_worker_booster, X)
+
+
+def iter_contributions(xgb_model, X, n_jobs=-1, chunk_rows=CHUNK_ROWS):
+    """
+    Yields (start_row, contributions, base_values) for consecutive chunks
+    of X, in order. With n_jobs > 1 chunks are explained in a pool of
+    single-threaded worker processes.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    starts = range(0, len(X), chunk_rows)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    if n_jobs <= 1 or len(starts) <= 1:
+        for start in starts:
+            yield (start, *tree_contributions(xgb_model, X[start:start + chunk_rows]))
+        return
+
+    booster = xgb_model.get_booster() if hasattr(xgb_model, "get_booster") else xgb_model
+    # spawn: forking a process that has started OpenMP threads is unsafe
+    with ProcessPoolExecutor(
+            max_workers=min(n_jobs, len(starts)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(bytes(booster.save_raw(raw_format="ubj")),)
+    ) as pool:
+        chunks = (X[start:start + chunk_rows] for start in starts)
+        for start, (contributions, base_values) in zip(
+                starts, pool.map(_worker_contributions, chunks)
+        ):
+            yield start, contributions, base_values
+
+
+def top_contributions(contributions, x, k=TOP_K, feature_names=FEATURE_NAMES):
+    """
+    The k features with the largest |SHAP| for one row, largest first.
+    """
+    order = np.argsort(-np.abs(contributions))[:k]
+    return [
+        {
+            "feature": feature_names[i],
+            "value": float(x[i]),
+            "contribution": float(contributions[i])
+        }
+        for i in order
+    ]
+
+
+def feature_hash(x):
+    """
+    Cache key of one feature vector (exact float64 bytes).
+    """
+    return hashlib.blake2b(np.ascontiguousarray(x, dtype=np.float64).tobytes(),
+                           digest_size=16).hexdigest()
+
+
+class ExplanationCache:
+    """
+    Thread-safe LRU of per-row SHAP values keyed by
+    (model version, feature hash), so a model swap never serves stale
+    explanations. Whole vectors are cached, so any top-k can be served.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "capacity": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+def explain_row(xgb_model, version, x, cache=None, k=TOP_K):
+    """
+    Top-k SHAP contributions for one transaction, served from `cache`
+    when the same row was explained under the same model version.
+    """
+    key = (version, feature_hash(x))
+    entry = cache.get(key) if cache is not None else None
+    cached = entry is not None
+
+    if entry is None:
+        contributions, base_values = tree_contributions(xgb_model, x.reshape(1, -1))
+        entry = (contributions[0], float(base_values[0]))
+        if cache is not None:
+            cache.put(key, entry)
+
+    contributions, base_value = entry
+    return {
+        "base_value": base_value,
+        "margin": base_value + float(contributions.sum()),
+        "contributions": top_contributions(contributions, x, k),
+        "cached": cached
+    }
@@ -0,0 +1,116 @@
+"""
+Binary request formats for high-volume scoring clients.
+
+Raw float32 ("application/x-fraud-float32"):
+
+    offset  size  field
+    0       4     magic b"FRDB"
+    4       2     format version (uint16, = 1)
+    6       2     number of columns (uint16, = 30)
+    8       4     number of rows (uint32)
+    12      16    schema hash: blake2b-128 of the comma-joined column names
+    28      4     reserved (zero)
+    32      ...   rows x columns little-endian float32, row-major
+
+decode_float32 returns a read-only NumPy view of the request body (no
+copy). Arrow IPC streams ("application/vnd.apache.arrow.stream") with
+one float column per feature, in FEATURE_NAMES order, are accepted too;
+those need one copy into a row-major matrix.
+"""
+import hashlib
+import struct
+
+import numpy as np
+
+from src.scoring import FEATURE_NAMES, N_FEATURES
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: Arrow IPC requests are rejected
+    pa = None
+
+FLOAT32_CONTENT_TYPE = "application/x-fraud-float32"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+MAGIC = b"FRDB"
+WIRE_VERSION = 1
+HEADER = struct.Struct("<4sHHI16s4x")
+
+SCHEMA_HASH = hashlib.blake2b(",".join(FEATURE_NAMES).encode(), digest_size=16).digest()
+
+
+def encode_float32(X):
+    """
+    Client side: (N, 30) matrix -> request body.
+    """
+    X = np.ascontiguousarray(X, dtype="<f4")
+    if X.ndim != 2 or X.shape[1] != N_FEATURES:
+        raise ValueError(f"Expected an (N, {N_FEATURES}) matrix, got shape {X.shape}")
+    return HEADER.pack(MAGIC, WIRE_VERSION, N_FEATURES, X.shape[0], SCHEMA_HASH) + X.tobytes()
+
+
+def decode_float32(body):
+    """
+    Request body -> read-only (N, 30) float32 view, after checking the
+    header, the column count and order (schema hash) and the body size.
+    """
+    if len(body) < HEADER.size:
+        raise ValueError("Body is shorter than the binary header")
+
+    magic, version, n_cols, n_rows, schema = HEADER.unpack_from(body)
+    if magic != MAGIC:
+        raise ValueError("Not a fraud float32 payload (bad magic)")
+    if version != WIRE_VERSION:
+        raise ValueError(f"Unsupported payload version {version}")
+    if n_cols != N_FEATURES:
+        raise ValueError(f"Expected {N_FEATURES} columns, got {n_cols}")
+    if schema != SCHEMA_HASH:
+        raise ValueError("Column order does not match the API schema (Time, V1..V28, Amount)")
+
+    expected = HEADER.size + n_rows * n_cols * 4
+    if len(body) != expected:
+        raise ValueError(f"Expected {expected} bytes for {n_rows} rows, got {len(body)}")
+
+    X = np.frombuffer(body, dtype="<f4", count=n_rows * n_cols, offset=HEADER.size)
+    return X.reshape(n_rows, n_cols)
+
+
+def encode_arrow(X):
+    """
+    Client side: (N, 30) matrix -> Arrow IPC stream with named columns.
+    """
+    if pa is None:
+        raise ImportError("Arrow IPC requires pyarrow")
+    X = np.asarray(X, dtype=np.float32)
+    batch = pa.record_batch([pa.array(X[:, j]) for j in range(X.shape[1])], names=FEATURE_NAMES)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_arrow(body):
+    """
+    Arrow IPC stream -> (N, 30) float32 matrix; columns are checked by
+    name and order.
+    """
+    if pa is None:
+        raise ValueError("Arrow IPC requests require pyarrow on the server")
+
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Invalid Arrow IPC stream: {e}")
+
+    if table.column_names != FEATURE_NAMES:
+        raise ValueError("Arrow columns must be Time, V1..V28, Amount in that order")
+    for field in table.schema:
+        if not pa.types.is_floating(field.type):
+            raise ValueError(f"Column {field.name} must be float, got {field.type}")
+
+    X = np.empty((table.num_rows, N_FEATURES), dtype=np.float32)
+    for j, column in enumerate(table.columns):
+        X[:, j] = column.to_numpy()
+    return X
+
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from src import anomaly_engine
+from src.anomaly_engine import FlatIsolationForest
+
+ENGINES = [False] + ([True] if anomaly_engine.njit is not None else [])
+
+
+def _data(n_rows, nan_rate=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n_rows, 6))
+    X[: n_rows // 50] *= 6  # a few outliers
+    if nan_rate:
+        X[rng.random(X.shape) < nan_rate] = np.nan
+    return X
+
+
+@pytest.mark.parametrize("use_numba", ENGINES)
+@pytest.mark.parametrize("max_features", [1.0, 0.5])
+@pytest.mark.parametrize("nan_rate", [0.0, 0.05])
+def test_matches_sklearn(use_numba, max_features, nan_rate):
+    model = IsolationForest(n_estimators=25, max_samples=128, max_features=max_features,
+                            random_state=0).fit(_data(2000, nan_rate))
+    engine = FlatIsolationForest.from_sklearn(model)
+    engine.use_numba = use_numba
+
+    X = _data(500, nan_rate, seed=1)
+    np.testing.assert_allclose(engine.decision_function(X), model.decision_function(X),
+                               rtol=0, atol=1e-9)
+    np.testing.assert_allclose(engine.score_samples(X), model.score_samples(X),
+                               rtol=0, atol=1e-9)
+
+
+def test_nan_rows_without_nan_in_training():
+    model = IsolationForest(n_estimators=25, random_state=0).fit(_data(1000))
+    engine = FlatIsolationForest.from_sklearn(model)
+
+    X = _data(200, nan_rate=0.1, seed=2)
+    np.testing.assert_allclose(engine.decision_function(X), model.decision_function(X),
+                               rtol=0, atol=1e-9)
+
+
+def test_round_trips_through_its_arrays():
+    engine = FlatIsolationForest.from_sklearn(
+        IsolationForest(n_estimators=10, random_state=0).fit(_data(500))
+    )
+    copy = FlatIsolationForest(**engine.arrays(), **engine.params())
+
+    X = _data(100, seed=3)
+    np.testing.assert_array_equal(copy.decision_function(X), engine.decision_function(X))
@@ -0,0 +1,134 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+import pytest
+
+from src.batching import MicroBatcher
+
+ROW = np.zeros(30)
+
+
+def _row_ids(X):
+    # Each row's first value identifies it
+    return [int(v) for v in X[:, 0]]
+
+
+def _row(i):
+    row = ROW.copy()
+    row[0] = i
+    return row
+
+
+def test_concurrent_rows_are_coalesced_in_order():
+    batch_sizes = []
+
+    def score_fn(X):
+        batch_sizes.append(len(X))
+        return _row_ids(X)
+
+    batcher = MicroBatcher(score_fn, max_batch=8, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(_row(i)) for i in range(20)]
+        assert [f.result(timeout=5) for f in futures] == list(range(20))
+    finally:
+        batcher.close()
+    assert sum(batch_sizes) == 20
+    assert max(batch_sizes) <= 8
+    assert len(batch_sizes) < 20
+
+
+def test_score_fn_failure_reaches_every_caller():
+    def score_fn(X):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(score_fn, max_batch=4, max_wait_ms=20)
+    try:
+        futures = [batcher.submit(_row(i)) for i in range(4)]
+        for f in futures:
+            with pytest.raises(RuntimeError, match="model failed"):
+                f.result(timeout=5)
+    finally:
+        batcher.close()
+
+
+def test_score_times_out():
+    release = threading.Event()
+
+    def score_fn(X):
+        release.wait(5)
+        return _row_ids(X)
+
+    batcher = MicroBatcher(score_fn, max_batch=1, max_wait_ms=0)
+    try:
+        started = time.perf_counter()
+        with pytest.raises(FutureTimeoutError):
+            batcher.score(_row(0), timeout=0.1)
+        assert time.perf_counter() - started < 2
+    finally:
+        release.set()
+        batcher.close()
+
+
+def test_close_scores_queued_rows_then_rejects_rows():
+    first_started, release = threading.Event(), threading.Event()
+
+    def score_fn(X):
+        first_started.set()
+        release.wait(5)
+        return _row_ids(X)
+
+    batcher = MicroBatcher(score_fn, max_batch=1, max_wait_ms=0)
+    first = batcher.submit(_row(0))
+    assert first_started.wait(5)
+
+    # Queued behind the running batch and still waiting when close() is called
+    queued = [batcher.submit(_row(i)) for i in range(1, 4)]
+    closer = threading.Thread(target=batcher.close)
+    closer.start()
+    time.sleep(0.05)
+    release.set()
+    closer.join(5)
+
+    assert first.result(timeout=1) == 0
+    assert [f.result(timeout=1) for f in queued] == [1, 2, 3]
+    with pytest.raises(RuntimeError):
+        batcher.submit(_row(4))
+
+
+def test_failure_while_closing_is_set_on_every_future():
+    first_started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def score_fn(X):
+        calls.append(len(X))
+        if len(calls) == 1:
+            first_started.set()
+            release.wait(5)
+            return _row_ids(X)
+        raise RuntimeError("leftovers failed")
+
+    batcher = MicroBatcher(score_fn, max_batch=1, max_wait_ms=0)
+    batcher.submit(_row(0))
+    assert first_started.wait(5)
+    queued = [batcher.submit(_row(i)) for i in range(1, 4)]
+
+    closer = threading.Thread(target=batcher.close)
+    closer.start()
+    time.sleep(0.05)
+    release.set()
+    closer.join(5)
+
+    for f in queued:
+        assert isinstance(f.exception(timeout=1), RuntimeError)
+
+
+def test_close_does_not_wait_for_the_batch_window():
+    batcher = MicroBatcher(_row_ids, max_batch=64, max_wait_ms=10_000)
+    futures = [batcher.submit(_row(i)) for i in range(3)]
+
+    started = time.perf_counter()
+    batcher.close()
+    assert time.perf_counter() - started < 2
+    assert [f.result(timeout=1) for f in futures] == [0, 1, 2]
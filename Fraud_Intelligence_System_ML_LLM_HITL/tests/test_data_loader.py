@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import data_loader
+from src.data_loader import load_data_columnar, file_hash
+from src.scoring import FEATURE_NAMES
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.standard_normal((200, len(FEATURE_NAMES))), columns=FEATURE_NAMES)
+    df["Class"] = (rng.random(200) < 0.1).astype(int)
+    path = str(tmp_path / "transactions.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.skipif(data_loader.pa is None, reason="columnar cache needs pyarrow")
+def test_given_content_hash_skips_rehashing(csv_path, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    digest = file_hash(csv_path)
+    first = load_data_columnar(csv_path, cache_dir=cache_dir, content_hash=digest)
+
+    def no_hash(path):
+        raise AssertionError("file hashed again")
+
+    monkeypatch.setattr(data_loader, "file_hash", no_hash)
+    cached = load_data_columnar(csv_path, cache_dir=cache_dir, content_hash=digest)
+
+    pd.testing.assert_frame_equal(cached, first)
+    assert len(cached) == 200
+    assert cached["V1"].dtype == np.float32
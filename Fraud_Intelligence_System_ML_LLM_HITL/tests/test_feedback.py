@@ -0,0 +1,102 @@
+import queue
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from src import feedback
+from src.feedback import FeedbackWriter, store_feedback, _encode_features
+
+ROW = [0.5] * 30
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "feedback.db")
+    monkeypatch.setattr(feedback, "DB_PATH", path)
+    feedback.init_db()
+    return path
+
+
+def _count(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT count(*) FROM feedback").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class StalledWriter(FeedbackWriter):
+    """
+    Flushes block until `release` is set.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.release = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _flush(self, conn, rows):
+        self.release.wait(5)
+        return super()._flush(conn, rows)
+
+
+def _stall(writer):
+    # The first row is taken into a flush that blocks; later rows queue up
+    writer.submit(0, 0.5, 2, 0)
+    while writer.stats()["queue_depth"]:
+        time.sleep(0.001)
+
+
+def test_close_writes_everything_submitted(db_path):
+    writer = FeedbackWriter(db_path, max_batch=7)
+    for i in range(100):
+        writer.submit(i, 0.5, 2, i % 2, features=ROW if i % 3 else None)
+
+    assert writer.close() == 0
+    assert _count(db_path) == 100
+    assert writer.stats()["rows_written"] == 100
+
+
+def test_submit_after_close_raises(db_path):
+    writer = FeedbackWriter(db_path)
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit(1, 0.5, 2, 0)
+    assert _count(db_path) == 0
+
+
+def test_full_queue_raises_queue_full(db_path):
+    writer = StalledWriter(db_path, max_queue=2)
+    try:
+        _stall(writer)
+        writer.submit(1, 0.5, 2, 0)
+        writer.submit(2, 0.5, 2, 0)
+        with pytest.raises(queue.Full):
+            writer.submit(3, 0.5, 2, 0, timeout=0.05)
+    finally:
+        writer.release.set()
+        writer.close()
+    assert _count(db_path) == 3
+
+
+def test_close_timeout_reports_unwritten_rows(db_path, capsys):
+    writer = StalledWriter(db_path)
+    _stall(writer)
+    for i in range(1, 5):
+        writer.submit(i, 0.5, 2, 0)
+
+    assert writer.close(timeout=0.1) == 4
+    assert "feedback" in capsys.readouterr().out
+    writer.release.set()
+
+
+def test_features_must_be_one_finite_row(db_path):
+    with pytest.raises(ValueError):
+        store_feedback(1, 0.5, 2, 0, features=[ROW])
+    with pytest.raises(ValueError):
+        store_feedback(1, 0.5, 2, 0, features=[float("nan")] * 30)
+    assert _encode_features(None) is None
+
+    store_feedback(1, 0.5, 2, 0, features=ROW)
+    assert _count(db_path) == 1
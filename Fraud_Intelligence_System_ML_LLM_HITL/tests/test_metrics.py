@@ -0,0 +1,42 @@
+import math
+
+import pytest
+
+from src.metrics import MetricsRegistry, _number
+
+
+@pytest.mark.parametrize("value, text", [
+    (3, "3"),
+    (2.0, "2"),
+    (0.25, "0.25"),
+    (math.nan, "NaN"),
+    (math.inf, "+Inf"),
+    (-math.inf, "-Inf")
+])
+def test_number_formats_prometheus_values(value, text):
+    assert _number(value) == text
+
+
+def test_render_non_finite_gauges():
+    registry = MetricsRegistry()
+    registry.gauge("fraud_drift", "Feature drift score")
+    registry.set("fraud_drift", math.nan, feature="V1")
+    registry.set("fraud_drift", math.inf, feature="V2")
+    registry.set("fraud_drift", -math.inf, feature="V3")
+
+    lines = registry.render().splitlines()
+    assert 'fraud_drift{feature="V1"} NaN' in lines
+    assert 'fraud_drift{feature="V2"} +Inf' in lines
+    assert 'fraud_drift{feature="V3"} -Inf' in lines
+
+
+def test_render_histogram_with_infinite_observation():
+    registry = MetricsRegistry()
+    registry.histogram("fraud_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.observe("fraud_latency_seconds", 0.05)
+    registry.observe("fraud_latency_seconds", math.inf)
+
+    lines = registry.render().splitlines()
+    assert 'fraud_latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert "fraud_latency_seconds_sum +Inf" in lines
+    assert "fraud_latency_seconds_count 2" in lines
@@ -0,0 +1,144 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src import feedback
+from src.feedback import _INSERT_SQL
+from src.monitoring import refresh_aggregates, monitor_report, AggregateRefresher, WINDOWS_HOURS
+
+N_ROWS = 2000
+N_THREADS = 8
+N_WAVES = 20
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "feedback.db")
+    monkeypatch.setattr(feedback, "DB_PATH", path)
+    feedback.init_db()
+    return path
+
+
+def _rows(start, count, now):
+    # Decision / label cycle: legit approved, false positive, missed fraud, caught fraud
+    outcomes = [(0, 0), (2, 0), (0, 1), (2, 1)]
+    for i in range(start, start + count):
+        decision, label = outcomes[i % len(outcomes)]
+        timestamp = (now - timedelta(minutes=i % 120)).isoformat()
+        yield i, 0.5, decision, label, timestamp, None
+
+
+def test_concurrent_refreshes_fold_each_row_once(db_path):
+    now = datetime(2026, 1, 1, 12, 30)
+    per_wave = N_ROWS // N_WAVES
+    folded = []
+
+    def refresh(barrier):
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            barrier.wait()
+            folded.append(refresh_aggregates(conn, now))
+        finally:
+            conn.close()
+
+    for wave in range(N_WAVES):
+        conn = sqlite3.connect(db_path)
+        with conn:
+            conn.executemany(_INSERT_SQL, _rows(wave * per_wave, per_wave, now))
+        conn.close()
+
+        barrier = threading.Barrier(N_THREADS)
+        threads = [threading.Thread(target=refresh, args=(barrier,)) for _ in range(N_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert sum(folded) == N_ROWS
+
+    report = monitor_report(db_path, now)
+    assert report["watermark"] == N_ROWS
+    assert report["total"] == N_ROWS
+    assert report["false_positives"] == N_ROWS // 4
+    assert report["missed_fraud"] == N_ROWS // 4
+    assert report["windows"]["last_week"] == {
+        "total": N_ROWS,
+        "false_positives": N_ROWS // 4,
+        "missed_fraud": N_ROWS // 4
+    }
+
+
+def _insert(db_path, start, count, now):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(_INSERT_SQL, _rows(start, count, now))
+    conn.close()
+
+
+def test_report_before_any_refresh_is_empty(db_path):
+    _insert(db_path, 0, 10, datetime.utcnow())
+
+    report = monitor_report(db_path)
+    assert report["total"] == 0
+    assert set(report["windows"]) == set(WINDOWS_HOURS)
+    # The report only reads: the summary tables are not created
+    conn = sqlite3.connect(db_path)
+    tables = {name for name, in conn.execute("SELECT name FROM sqlite_master")}
+    conn.close()
+    assert "monitor_state" not in tables
+
+
+def test_report_does_not_wait_for_writers(db_path):
+    now = datetime.utcnow()
+    _insert(db_path, 0, 40, now)
+    conn = sqlite3.connect(db_path)
+    refresh_aggregates(conn, now)
+    conn.close()
+
+    # A feedback write holding the write lock
+    writer = sqlite3.connect(db_path)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.executemany(_INSERT_SQL, _rows(40, 10, now))
+    try:
+        started = time.perf_counter()
+        report = monitor_report(db_path, now)
+        assert time.perf_counter() - started < 1.0
+        assert report["total"] == 40
+    finally:
+        writer.rollback()
+        writer.close()
+
+
+def test_refresh_without_new_rows_does_not_write(db_path):
+    now = datetime.utcnow()
+    _insert(db_path, 0, 40, now)
+    conn = sqlite3.connect(db_path, timeout=0.1)
+    assert refresh_aggregates(conn, now) == 40
+
+    writer = sqlite3.connect(db_path)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        # Would fail with "database is locked" if it took the write lock
+        assert refresh_aggregates(conn, now) == 0
+    finally:
+        writer.rollback()
+        writer.close()
+        conn.close()
+
+
+def test_background_refresher_folds_new_rows(db_path):
+    refresher = AggregateRefresher(db_path, interval=0.01)
+    try:
+        _insert(db_path, 0, 100, datetime.utcnow())
+        deadline = time.perf_counter() + 5
+        while monitor_report(db_path)["total"] < 100 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+    finally:
+        refresher.close()
+
+    report = monitor_report(db_path)
+    assert report["total"] == 100
+    assert report["false_positives"] == 25
@@ -0,0 +1,64 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+import xgboost as xgb
+from sklearn.ensemble import IsolationForest
+
+from src.registry import ModelRegistry
+from src.scoring import FEATURE_NAMES, N_FEATURES
+
+
+@pytest.fixture(scope="module")
+def models():
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((300, N_FEATURES))
+    y = (X[:, 0] > 1).astype(int)
+    xgb_model = xgb.XGBClassifier(n_estimators=5, max_depth=2, n_jobs=1).fit(X, y)
+    iso_model = IsolationForest(n_estimators=5, random_state=0).fit(X)
+    return xgb_model, iso_model
+
+
+def test_publishes_in_the_same_second_get_distinct_versions(tmp_path, models):
+    registry = ModelRegistry(str(tmp_path))
+    versions = [registry.publish(*models, FEATURE_NAMES)["version"] for _ in range(3)]
+
+    assert len(set(versions)) == 3
+    assert registry.versions() == sorted(versions)
+
+
+def test_concurrent_publishes_do_not_clobber_each_other(tmp_path, models):
+    registry = ModelRegistry(str(tmp_path))
+    manifests, errors = [], []
+
+    def publish():
+        try:
+            manifests.append(registry.publish(*models, FEATURE_NAMES))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=publish) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert sorted(m["version"] for m in manifests) == registry.versions()
+    assert len(registry.versions()) == 4
+    for manifest in manifests:
+        assert registry.manifest(manifest["version"])["files"] == manifest["files"]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".")]
+
+
+def test_existing_version_is_never_overwritten(tmp_path, models):
+    registry = ModelRegistry(str(tmp_path))
+    first = registry.publish(*models, FEATURE_NAMES, version="v1")
+
+    with pytest.raises(ValueError, match="already exists"):
+        registry.publish(*models, FEATURE_NAMES, version="v1")
+
+    assert registry.versions() == ["v1"]
+    assert registry.manifest("v1")["created_at"] == first["created_at"]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".")]
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from src.scoring import to_feature_matrix, N_FEATURES
+
+
+def test_rows_become_a_float_matrix():
+    X = to_feature_matrix([[1] * N_FEATURES, [2] * N_FEATURES])
+    assert X.shape == (2, N_FEATURES)
+    assert X.dtype == np.float64
+
+
+def test_single_row_must_be_flat():
+    assert to_feature_matrix([0.5] * N_FEATURES, single=True).shape == (1, N_FEATURES)
+    with pytest.raises(ValueError):
+        to_feature_matrix([[0.5] * N_FEATURES], single=True)
+    with pytest.raises(ValueError):
+        to_feature_matrix([0.5] * (N_FEATURES - 1), single=True)
+
+
+@pytest.mark.parametrize("rows", [
+    [{}] * N_FEATURES,
+    [[{}] * N_FEATURES],
+    ["a"] * N_FEATURES,
+    [[1.0] * N_FEATURES, [1.0] * 3],
+])
+@pytest.mark.parametrize("single", [False, True])
+def test_non_numeric_rows_raise_value_error(rows, single):
+    with pytest.raises(ValueError):
+        to_feature_matrix(rows, single=single)
@@ -0,0 +1,83 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+import xgboost as xgb
+from sklearn.ensemble import IsolationForest
+
+from src import shadow as shadow_module
+from src.bundle import ModelBundle
+from src.scoring import N_FEATURES, score_batch, format_results
+from src.shadow import ShadowScorer
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((300, N_FEATURES))
+    y = (X[:, 0] > 1).astype(int)
+    xgb_model = xgb.XGBClassifier(n_estimators=5, max_depth=2, n_jobs=1).fit(X, y)
+    iso_model = IsolationForest(n_estimators=5, random_state=0).fit(X)
+    return ModelBundle(None, {"version": "challenger"}, xgb_model, iso_model, None)
+
+
+def _request(bundle, rows=4, seed=1):
+    X = np.random.default_rng(seed).standard_normal((rows, N_FEATURES))
+    results = format_results(score_batch(bundle.xgb_model, bundle.iso_model, X))
+    return X, results
+
+
+def _log_rows(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_close_scores_queued_requests_then_closes_log(tmp_path, bundle):
+    log_path = str(tmp_path / "shadow.jsonl")
+    scorer = ShadowScorer(bundle, sample_rate=1.0, workers=2, log_path=log_path)
+    for seed in range(10):
+        assert scorer.submit(*_request(bundle, seed=seed))
+
+    assert scorer.close() is True
+    assert scorer._log is None
+    assert len(_log_rows(log_path)) == 40
+    assert scorer.stats()["requests"] == 10
+    assert scorer.stats()["agreement"] == 1.0
+
+
+def test_submit_after_close_is_a_no_op(tmp_path, bundle):
+    scorer = ShadowScorer(bundle, sample_rate=1.0, log_path=str(tmp_path / "shadow.jsonl"))
+    scorer.close()
+
+    assert scorer.submit(*_request(bundle)) is False
+    stats = scorer.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["dropped"] == 0
+    assert scorer.close() is True
+
+
+def test_log_stays_open_for_a_worker_still_scoring(tmp_path, bundle, monkeypatch):
+    log_path = str(tmp_path / "shadow.jsonl")
+    started, release = threading.Event(), threading.Event()
+
+    def slow_score(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return score_batch(*args, **kwargs)
+
+    monkeypatch.setattr(shadow_module, "score_batch", slow_score)
+    scorer = ShadowScorer(bundle, sample_rate=1.0, workers=2, log_path=log_path)
+    scorer.submit(*_request(bundle))
+    assert started.wait(5)
+
+    # The busy worker outlives the timeout: its rows must still reach the log
+    assert scorer.close(timeout=0.05) is False
+    assert scorer._log is not None
+    release.set()
+    for worker in scorer._workers:
+        worker.join(5)
+
+    assert scorer._log is None
+    assert len(_log_rows(log_path)) == 4
+    assert scorer.stats()["errors"] == 0
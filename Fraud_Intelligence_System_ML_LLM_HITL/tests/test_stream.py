@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from src.stream import Checkpoint, FileTailSource, JsonlSink, StreamConsumer
+
+N_RECORDS = 95
+
+
+def _score_fn(X):
+    return [{"risk_score": float(row[0])} for row in X]
+
+
+def _write_records(path, ids):
+    with open(path, "a") as f:
+        for i in ids:
+            f.write(json.dumps({"id": i, "features": [float(i)] + [0.0] * 29}) + "\n")
+
+
+def _sink_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _run(consumer, until, timeout=10.0):
+    """
+    Runs the consumer on a thread until `until()` holds; returns the
+    exception run() raised, if any.
+    """
+    errors = []
+
+    def target():
+        try:
+            consumer.run()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    deadline = time.perf_counter() + timeout
+    while not until() and not errors and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    consumer.stop()
+    thread.join(timeout)
+    assert not thread.is_alive()
+    return errors[0] if errors else None
+
+
+class CrashingCheckpoint(Checkpoint):
+    """
+    Dies between the sink write and the checkpoint of batch `crash_at`.
+    """
+
+    def __init__(self, path, crash_at):
+        super().__init__(path)
+        self.crash_at = crash_at
+        self.commits = 0
+
+    def commit(self, offset):
+        self.commits += 1
+        if self.commits == self.crash_at:
+            raise RuntimeError("crash before checkpoint")
+        super().commit(offset)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    source = str(tmp_path / "stream.jsonl")
+    _write_records(source, range(N_RECORDS))
+    return source, str(tmp_path / "decisions.jsonl"), str(tmp_path / "checkpoint.json")
+
+
+def _consumer(source, sink, checkpoint):
+    return StreamConsumer(FileTailSource(source), JsonlSink(sink), checkpoint, _score_fn,
+                          max_batch=10, max_wait_ms=5)
+
+
+def test_scores_everything_and_checkpoints_the_end(paths):
+    source, sink, checkpoint_path = paths
+    checkpoint = Checkpoint(checkpoint_path)
+    end = os.path.getsize(source)
+
+    consumer = _consumer(source, sink, checkpoint)
+    assert _run(consumer, lambda: consumer.committed == end) is None
+
+    records = _sink_records(sink)
+    assert [r["id"] for r in records] == list(range(N_RECORDS))
+    assert [r["risk_score"] for r in records] == [float(i) for i in range(N_RECORDS)]
+    assert checkpoint.load() == end
+
+
+def test_restart_resumes_after_the_checkpoint(paths):
+    source, sink, checkpoint_path = paths
+    checkpoint = Checkpoint(checkpoint_path)
+
+    consumer = _consumer(source, sink, checkpoint)
+    _run(consumer, lambda: consumer.committed == os.path.getsize(source))
+
+    _write_records(source, range(N_RECORDS, N_RECORDS + 5))
+    consumer = _consumer(source, sink, checkpoint)
+    _run(consumer, lambda: consumer.committed == os.path.getsize(source))
+
+    assert [r["id"] for r in _sink_records(sink)] == list(range(N_RECORDS + 5))
+
+
+def test_crash_before_checkpoint_replays_the_batch(paths):
+    source, sink, checkpoint_path = paths
+    end = os.path.getsize(source)
+
+    crashing = _consumer(source, sink, CrashingCheckpoint(checkpoint_path, crash_at=3))
+    error = _run(crashing, lambda: False)
+    assert isinstance(error, RuntimeError)
+
+    # The third batch reached the sink but not the checkpoint
+    committed = Checkpoint(checkpoint_path).load()
+    written = _sink_records(sink)
+    assert max(r["offset"] for r in written) > committed
+
+    consumer = _consumer(source, sink, Checkpoint(checkpoint_path))
+    assert _run(consumer, lambda: consumer.committed == end) is None
+
+    ids = [r["id"] for r in _sink_records(sink)]
+    assert sorted(set(ids)) == list(range(N_RECORDS))  # nothing lost
+    duplicates = [r for r in _sink_records(sink) if ids.count(r["id"]) > 1]
+    assert duplicates and all(r["offset"] > committed for r in duplicates)
+    assert Checkpoint(checkpoint_path).load() == end
+
+
+def test_invalid_records_are_reported_and_committed(tmp_path):
+    source = str(tmp_path / "stream.jsonl")
+    with open(source, "w") as f:
+        f.write("not json\n")
+        f.write(json.dumps({"id": "short", "features": [1.0, 2.0]}) + "\n")
+    _write_records(source, [7])
+    sink = str(tmp_path / "decisions.jsonl")
+
+    consumer = _consumer(source, sink, Checkpoint(str(tmp_path / "checkpoint.json")))
+    _run(consumer, lambda: consumer.committed == os.path.getsize(source))
+
+    records = _sink_records(sink)
+    assert "error" in records[0] and "error" in records[1]
+    assert records[2]["id"] == 7 and "risk_score" in records[2]
+    assert consumer.stats()["invalid"] == 2
+
+
+def test_partial_line_waits_for_its_newline(tmp_path):
+    source = str(tmp_path / "stream.jsonl")
+    _write_records(source, [0])
+    complete = os.path.getsize(source)
+    with open(source, "a") as f:
+        f.write('{"id": 1, "features": [')
+    sink = str(tmp_path / "decisions.jsonl")
+
+    consumer = _consumer(source, sink, Checkpoint(str(tmp_path / "checkpoint.json")))
+    started = time.perf_counter()
+    # Keep polling a while after the complete record is committed
+    _run(consumer, lambda: consumer.committed == complete
+         and time.perf_counter() - started > 0.3)
+
+    assert [r["id"] for r in _sink_records(sink)] == [0]
+    assert consumer.committed == complete
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from src.decision import decision_engine
+from src.thresholds import (
+    sweep_costs, optimise_thresholds, evaluate_decision, cost_matrix, anomaly_risk
+)
+
+ALPHAS = np.array([0.0, 0.3, 0.7, 1.0])
+THRESHOLDS = np.round(np.linspace(0.0, 1.0, 11), 4)
+
+
+def _scores(n_rows=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_rows) < 0.05).astype(np.int64)
+    xgb_probs = np.clip(rng.beta(0.5, 10, n_rows) + 0.5 * y * rng.random(n_rows), 0, 1)
+    anomaly_norm = np.clip(rng.beta(2, 6, n_rows) + 0.3 * y * rng.random(n_rows), 0, 1)
+    # Scores exactly on grid values exercise the >= boundaries
+    xgb_probs[:50] = THRESHOLDS[rng.integers(0, len(THRESHOLDS), 50)]
+    return xgb_probs, anomaly_norm, y
+
+
+def _brute_force(xgb_probs, anomaly_norm, y, costs, weight):
+    grid = np.full((len(ALPHAS), len(THRESHOLDS), len(THRESHOLDS)), np.inf)
+    for a, alpha in enumerate(ALPHAS):
+        risk = alpha * xgb_probs + (1 - alpha) * anomaly_norm
+        for i, low in enumerate(THRESHOLDS):
+            for j, high in enumerate(THRESHOLDS):
+                if low <= high:
+                    decisions = decision_engine(risk, low_threshold=low, high_threshold=high)
+                    grid[a, i, j] = np.sum(weight * costs[y, decisions])
+    return grid
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_sweep_matches_decision_engine(weighted):
+    xgb_probs, anomaly_norm, y = _scores()
+    costs = cost_matrix(review=3.0, missed_fraud=80.0, false_block=40.0)
+    weight = np.random.default_rng(1).uniform(0.5, 2.0, len(y)) if weighted else None
+
+    grid = sweep_costs(xgb_probs, anomaly_norm, y, ALPHAS, THRESHOLDS, costs, weight)
+    expected = _brute_force(xgb_probs, anomaly_norm, y, costs,
+                            np.ones(len(y)) if weight is None else weight)
+
+    assert grid.shape == expected.shape
+    np.testing.assert_array_equal(np.isinf(grid), np.isinf(expected))
+    finite = np.isfinite(expected)
+    np.testing.assert_allclose(grid[finite], expected[finite], rtol=1e-9)
+
+
+def test_optimum_is_the_grid_minimum():
+    xgb_probs, anomaly_norm, y = _scores(seed=2)
+    result = optimise_thresholds(xgb_probs, anomaly_norm, y, ALPHAS, THRESHOLDS)
+
+    grid = sweep_costs(xgb_probs, anomaly_norm, y, ALPHAS, THRESHOLDS)
+    assert result["expected_cost"] == pytest.approx(grid.min())
+    assert result["low_threshold"] <= result["high_threshold"]
+    assert result["expected_cost"] <= result["default"]["expected_cost"]
+
+    check = evaluate_decision(xgb_probs, anomaly_norm, y, result["alpha"],
+                              result["low_threshold"], result["high_threshold"])
+    assert check["expected_cost"] == pytest.approx(result["expected_cost"])
+    assert check["approve"] + check["review"] + check["block"] == len(y)
+
+
+def test_anomaly_risk_without_calibration_is_min_max():
+    risk = anomaly_risk([-0.2, 0.0, 0.2])
+    np.testing.assert_allclose(risk, [1.0, 0.5, 0.0])
+    np.testing.assert_array_equal(anomaly_risk([0.1, 0.1]), [0.0, 0.0])
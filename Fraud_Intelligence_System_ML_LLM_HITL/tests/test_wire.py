@@ -0,0 +1,109 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from src import wire
+from src.scoring import FEATURE_NAMES, N_FEATURES
+from src.wire import (
+    HEADER, MAGIC, SCHEMA_HASH, WIRE_VERSION,
+    encode_float32, decode_float32, encode_arrow, decode_arrow
+)
+
+
+def _matrix(n_rows):
+    return np.random.default_rng(0).standard_normal((n_rows, N_FEATURES)).astype(np.float32)
+
+
+def _header(magic=MAGIC, version=WIRE_VERSION, n_cols=N_FEATURES, n_rows=1, schema=SCHEMA_HASH):
+    return HEADER.pack(magic, version, n_cols, n_rows, schema)
+
+
+@pytest.mark.parametrize("n_rows", [0, 1, 257])
+def test_float32_round_trip_is_a_view(n_rows):
+    X = _matrix(n_rows)
+    body = encode_float32(X)
+    decoded = decode_float32(body)
+
+    np.testing.assert_array_equal(decoded, X)
+    assert decoded.shape == (n_rows, N_FEATURES)
+    assert not decoded.flags.writeable  # frombuffer over the body, no copy
+
+
+def test_encode_rejects_wrong_width():
+    with pytest.raises(ValueError):
+        encode_float32(np.zeros((2, N_FEATURES - 1)))
+
+
+def test_float32_short_body():
+    with pytest.raises(ValueError, match="shorter"):
+        decode_float32(MAGIC)
+
+
+@pytest.mark.parametrize("body, match", [
+    (_header(magic=b"XXXX"), "magic"),
+    (_header(version=WIRE_VERSION + 1), "version"),
+    (_header(n_cols=N_FEATURES - 1), "columns"),
+    (_header(schema=bytes(16)), "Column order"),
+])
+def test_float32_header_is_checked(body, match):
+    with pytest.raises(ValueError, match=match):
+        decode_float32(body + bytes(4 * N_FEATURES))
+
+
+@pytest.mark.parametrize("delta", [-4, -1, 1, 4 * N_FEATURES])
+def test_float32_body_length_must_match_row_count(delta):
+    body = encode_float32(_matrix(3))
+    if delta < 0:
+        body = body[:delta]
+    else:
+        body = body + bytes(delta)
+    with pytest.raises(ValueError, match="bytes"):
+        decode_float32(body)
+
+
+def test_row_count_is_not_trusted_beyond_the_body():
+    body = encode_float32(_matrix(1))
+    # Claims 2**32 - 1 rows but carries one
+    forged = HEADER.pack(MAGIC, WIRE_VERSION, N_FEATURES, 2 ** 32 - 1, SCHEMA_HASH)
+    with pytest.raises(ValueError):
+        decode_float32(forged + body[HEADER.size:])
+
+
+def test_schema_hash_covers_column_order():
+    swapped = FEATURE_NAMES[1:] + FEATURE_NAMES[:1]
+    assert hashlib.blake2b(",".join(swapped).encode(), digest_size=16).digest() != SCHEMA_HASH
+
+
+@pytest.mark.skipif(wire.pa is None, reason="pyarrow not installed")
+class TestArrow:
+
+    def test_round_trip(self):
+        X = _matrix(10)
+        np.testing.assert_array_equal(decode_arrow(encode_arrow(X)), X)
+
+    def test_rejects_garbage(self):
+        with pytest.raises(ValueError, match="Arrow"):
+            decode_arrow(b"not an arrow stream")
+
+    def test_rejects_reordered_columns(self):
+        pa = wire.pa
+        X = _matrix(2)
+        names = FEATURE_NAMES[::-1]
+        batch = pa.record_batch([pa.array(X[:, j]) for j in range(N_FEATURES)], names=names)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        with pytest.raises(ValueError, match="order"):
+            decode_arrow(sink.getvalue().to_pybytes())
+
+    def test_rejects_non_float_columns(self):
+        pa = wire.pa
+        columns = [pa.array(np.zeros(2, dtype=np.float32)) for _ in range(N_FEATURES)]
+        columns[0] = pa.array(["a", "b"])
+        batch = pa.record_batch(columns, names=FEATURE_NAMES)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        with pytest.raises(ValueError, match="float"):
+            decode_arrow(sink.getvalue().to_pybytes())